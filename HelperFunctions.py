@@ -4,6 +4,18 @@ def getOutputCmakeName(name):
 def getOutputSourcesName(name):
   return name.upper() + "_SOURCES"
 
+def getOutputSourcePrefixName(name, index):
+  return name.upper() + "_SOURCE_PREFIX_" + str(index)
+
+def getOutputUnityGroupName(name, index):
+  return name.lower() + "_unity_" + str(index)
+
+def getObjectLibName(firstOwnerName, index):
+  return firstOwnerName.lower() + "_objects" + ("" if index == 0 else "_" + str(index))
+
+def getTargetObjects(name):
+  return "$<TARGET_OBJECTS:" + name + ">"
+
 def inBraces(string):
   return "${" + string + "}"
 
@@ -8,6 +8,9 @@ MAC_OS_NAME = "APPLE"
 LINUX_OS_NAME = "UNIX AND NOT APPLE"
 UNIX_OS_NAME = "UNIX"
 
+# Name of the project's configuration file
+JSON_FILE_NAME = "cmake_data.json"
+
 # cmake_data.json tag strings
 # --------------------------------------------------
 
@@ -19,6 +22,13 @@ PROJECT_NAME_TAGNAME = "project_name"
 OUTPUT_TAGNAME = "output"
 TYPE_TAGNAME = "type"
 SOURCE_FILES_TAGNAME = "source_files"
+SOURCE_GLOBS_TAGNAME = "source_globs"
+UNITY_BATCHES_TAGNAME = "unity_batches"
+UNITY_EXCLUDED_FILES_TAGNAME = "unity_excluded_files"
+PRECOMPILED_HEADERS_TAGNAME = "precompiled_headers"
+READS_FILE_CONTENTS_TAGNAME = "reads_file_contents"
+OBJECT_LIBS_TAGNAME = "object_libs"
+OBJECT_LIB_OWNERS_TAGNAME = "owners"
 BASE_FILE_TAGNAME = "base_file"
 
 # Recursive directory definition tags
@@ -34,6 +44,11 @@ IND_SOURCE_DIRS_TAGNAME = "source_dirs"
 # Include directories tag
 INCLUDE_DIRECTORIES_TAGNAME = "include_directories"
 
+# Directory scanning tags
+EXCLUDE_TAGNAME = "exclude"
+USE_GITIGNORE_TAGNAME = "use_gitignore"
+FOLLOW_SYMLINKS_TAGNAME = "follow_symlinks"
+
 # Output directory tags
 EXE_OUTPUT_DIR_TAGNAME = "executable_output_dir"
 ARCHIVE_OUTPUT_DIR_TAGNAME = "archive_output_dir"
@@ -44,6 +59,7 @@ IMPORTED_LIBS_TAGNAME = "imported_libs"
 ROOT_DIR_TAGNAME = "root_dir"
 LIB_FILES_TAGNAME = "lib_files"
 HEADER_FILES_TAGNAME = "header_files"
+FROZEN_TAGNAME = "frozen"
 
 # Linked libraries tag
 LINK_LIBS_TAGNAME = "link_libs"
@@ -59,8 +75,27 @@ TARGETS_TAGNAME = "targets"
 CPP_FLAGS_TAGNAME = "cpp_flags"
 C_FLAGS_TAGNAME = "c_flags"
 DEFAULT_TARGET_TAGNAME = "default_target"
+
+# Generated file layout tags
+CMAKE_FRAGMENTS_TAGNAME = "cmake_fragments"
+COMPRESS_SOURCE_LISTS_TAGNAME = "compress_source_lists"
+GLOB_SOURCES_TAGNAME = "glob_sources"
+MINIMAL_INCLUDES_TAGNAME = "minimal_includes"
+UNITY_BUILD_TAGNAME = "unity_build"
+UNITY_BATCH_BYTES_TAGNAME = "unity_batch_bytes"
+UNITY_EXCLUDE_TAGNAME = "unity_exclude"
+PRECOMPILE_HEADERS_TAGNAME = "precompile_headers"
+PCH_BUDGET_BYTES_TAGNAME = "pch_budget_bytes"
+PCH_INCLUDE_TAGNAME = "pch_include"
+PCH_EXCLUDE_TAGNAME = "pch_exclude"
+SHARE_OBJECT_FILES_TAGNAME = "share_object_files"
 # --------------------------------------------------
 
+# Directory (relative to the project root) which .cmake fragment files are generated into
+CMAKE_FRAGMENTS_DIR = "cmake_fragments"
+# First line of every generated fragment file. Only files starting with it are ever deleted from CMAKE_FRAGMENTS_DIR
+CMAKE_FRAGMENT_WATERMARK = "# Generated by json_to_cmake as part of this project's CMakeLists.txt. Do not edit."
+
 OUTPUT_TYPES = {
   "EXE": "executable",
   "STATIC_LIB": "static_lib",
@@ -0,0 +1,137 @@
+import contextlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import data
+import HelperVariables
+import write_organizer
+
+# Project generation results
+STATUS_WRITTEN = "written"
+STATUS_UNCHANGED = "unchanged"
+STATUS_ERROR = "error"
+
+# Find every directory under searchDir which contains a cmake_data.json file.
+# Hidden directories (.git, scan caches, etc.) are never entered.
+def discoverProjects(searchDir):
+    projectDirs = []
+    for dirPathString, subdirNames, fileNames in os.walk(searchDir):
+        subdirNames[:] = sorted(name for name in subdirNames if name[0] != '.')
+        if data.jsonFileName in fileNames:
+            projectDirs.append(dirPathString)
+    return projectDirs
+
+# Absolute paths of the directories a project scans (the r_*_dirs of its output items and imported libs).
+# A project whose cmake_data.json can't be read scans nothing, and fails on its own when generated.
+def getProjectScanRoots(projectDir):
+    try:
+        with open(os.path.join(projectDir, data.jsonFileName)) as jsonFile:
+            parsedJSON = json.load(jsonFile)
+    except (OSError, ValueError):
+        return []
+
+    scanRoots = []
+    for itemsTagName in [HelperVariables.OUTPUT_TAGNAME, HelperVariables.IMPORTED_LIBS_TAGNAME]:
+        jsonItems = parsedJSON.get(itemsTagName) if isinstance(parsedJSON, dict) else None
+        if not isinstance(jsonItems, dict):
+            continue
+        for jsonItem in jsonItems.values():
+            if not isinstance(jsonItem, dict):
+                continue
+            for tagName in [HelperVariables.R_SOURCE_DIRS_TAGNAME, HelperVariables.R_HEADER_DIRS_TAGNAME, HelperVariables.R_INCLUDE_DIRS_TAGNAME]:
+                if isinstance(jsonItem.get(tagName), list):
+                    scanRoots += [os.path.normpath(os.path.join(projectDir, relDir)) for relDir in jsonItem[tagName] if isinstance(relDir, str)]
+    return scanRoots
+
+# Group projects which scan overlapping directories (the same directory, or one inside the other).
+# Each group is generated by one worker which shares directory listings between its projects, so
+# the overlapping directories are only read once. Projects which are merely nested inside each other
+# (like sub-projects of a monorepo) but scan separate directories go to separate workers.
+def groupOverlappingProjects(projectDirs):
+    projectDirs = sorted(set(os.path.abspath(projectDir) for projectDir in projectDirs))
+    groupIndexes = list(range(len(projectDirs)))
+
+    def findGroup(projectIndex):
+        while groupIndexes[projectIndex] != projectIndex:
+            groupIndexes[projectIndex] = groupIndexes[groupIndexes[projectIndex]]
+            projectIndex = groupIndexes[projectIndex]
+        return projectIndex
+
+    scanRoots = []
+    for projectIndex, projectDir in enumerate(projectDirs):
+        scanRoots += [(scanRoot, projectIndex) for scanRoot in getProjectScanRoots(projectDir)]
+
+    # Sorted by path components, a directory comes after the directories containing it and before
+    # anything outside of it, so each root only has to be joined with the closest root containing it
+    enclosingRoots = []
+    for scanRoot, projectIndex in sorted(scanRoots, key=lambda rootAndIndex: (rootAndIndex[0].split(os.sep), rootAndIndex[1])):
+        while len(enclosingRoots) > 0 and os.path.commonpath([enclosingRoots[-1][0], scanRoot]) != enclosingRoots[-1][0]:
+            enclosingRoots.pop()
+        if len(enclosingRoots) > 0:
+            groupIndexes[findGroup(projectIndex)] = findGroup(enclosingRoots[-1][1])
+        enclosingRoots.append((scanRoot, projectIndex))
+
+    projectGroups = {}
+    for projectIndex, projectDir in enumerate(projectDirs):
+        projectGroups.setdefault(findGroup(projectIndex), []).append(projectDir)
+    return sorted(projectGroups.values())
+
+# Generate a single project. Anything the generator prints is captured, so output
+# from projects generated in parallel isn't interleaved.
+def generateProject(projectDir, sharedListings):
+    capturedOutput = io.StringIO()
+    startTime = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(capturedOutput):
+            wasWritten = write_organizer.writeCMakeFiles(projectDir, sharedListings=sharedListings)
+        status = STATUS_WRITTEN if wasWritten else STATUS_UNCHANGED
+        message = ""
+    except Exception as e:
+        status = STATUS_ERROR
+        # The generator usually explains the problem itself before raising
+        message = capturedOutput.getvalue().strip()
+        if message == "":
+            message = type(e).__name__ + ": " + str(e)
+
+    return {
+        "project_dir": projectDir,
+        "status": status,
+        "seconds": time.perf_counter() - startTime,
+        "message": message
+    }
+
+def generateProjectGroup(projectGroup):
+    sharedListings = {}
+    return [generateProject(projectDir, sharedListings) for projectDir in projectGroup]
+
+def printSummary(results):
+    for result in results:
+        print("{:<10} {:>8.3f}s  {}".format(result["status"], result["seconds"], result["project_dir"]))
+        if result["message"] != "":
+            for line in result["message"].splitlines():
+                print("    " + line)
+
+    statusCounts = { STATUS_WRITTEN: 0, STATUS_UNCHANGED: 0, STATUS_ERROR: 0 }
+    for result in results:
+        statusCounts[result["status"]] += 1
+    print("\n{} projects: {} written, {} unchanged, {} failed".format(len(results), statusCounts[STATUS_WRITTEN], statusCounts[STATUS_UNCHANGED], statusCounts[STATUS_ERROR]))
+
+# Generate every project in projectDirs using 'processes' worker processes.
+# Prints a per-project summary, and returns the process exit code (1 if any project failed).
+def runBatch(projectDirs, processes=1):
+    projectGroups = groupOverlappingProjects(projectDirs)
+
+    if processes <= 1 or len(projectGroups) <= 1:
+        groupResults = map(generateProjectGroup, projectGroups)
+        results = [result for resultList in groupResults for result in resultList]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            groupResults = executor.map(generateProjectGroup, projectGroups)
+            results = [result for resultList in groupResults for result in resultList]
+
+    results.sort(key=lambda result: result["project_dir"])
+    printSummary(results)
+    return 1 if any(result["status"] == STATUS_ERROR for result in results) else 0
@@ -0,0 +1,131 @@
+import argparse
+import difflib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+# The generator's modules live in the repository root
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import file_scan
+import HelperVariables
+from synthetic_tree import generateTree
+
+MAIN_SCRIPT = os.path.join(REPO_DIR, "main.py")
+
+# Generates each project several times, in separate processes with different hash seeds, thread
+# counts and with or without a warm scan cache, and checks every run produced byte-identical files.
+# Optionally, the output is also compared against (or saved as) golden files.
+
+# Every file the generator wrote for the project, as { path relative to projectDir: bytes }
+def readGeneratedFiles(projectDir):
+    generatedFiles = {}
+    relPaths = ["CMakeLists.txt"]
+    fragmentDir = os.path.join(projectDir, HelperVariables.CMAKE_FRAGMENTS_DIR)
+    if os.path.isdir(fragmentDir):
+        relPaths += [HelperVariables.CMAKE_FRAGMENTS_DIR + "/" + fileName for fileName in sorted(os.listdir(fragmentDir)) if fileName.endswith(".cmake")]
+
+    for relPath in relPaths:
+        with open(os.path.join(projectDir, relPath), mode='rb') as generatedFile:
+            generatedFiles[relPath] = generatedFile.read()
+    return generatedFiles
+
+def runGenerator(projectDir, hashSeed, jobs, coldCache):
+    if coldCache:
+        shutil.rmtree(os.path.join(projectDir, file_scan.SCAN_CACHE_DIR_NAME), ignore_errors=True)
+    environment = dict(os.environ, PYTHONHASHSEED=str(hashSeed))
+    subprocess.run([sys.executable, MAIN_SCRIPT, projectDir, "--jobs", str(jobs)], env=environment, check=True, stdout=subprocess.DEVNULL)
+    return readGeneratedFiles(projectDir)
+
+# Print a short diff of the first file which differs between the two runs. Returns True if they are identical.
+def compareRuns(expectedName, expectedFiles, actualName, actualFiles):
+    for relPath in sorted(set(expectedFiles) | set(actualFiles)):
+        expectedLines = expectedFiles.get(relPath, b"").decode().splitlines(keepends=True)
+        actualLines = actualFiles.get(relPath, b"").decode().splitlines(keepends=True)
+        if expectedLines != actualLines or (relPath in expectedFiles) != (relPath in actualFiles):
+            print("MISMATCH:", relPath, "differs between", expectedName, "and", actualName)
+            diffLines = list(difflib.unified_diff(expectedLines, actualLines, expectedName + "/" + relPath, actualName + "/" + relPath))
+            sys.stdout.writelines(diffLines[:40])
+            return False
+    return True
+
+def readGoldenFiles(goldenDir):
+    goldenFiles = {}
+    for dirPathString, _subdirNames, fileNames in os.walk(goldenDir):
+        for fileName in fileNames:
+            filePath = os.path.join(dirPathString, fileName)
+            with open(filePath, mode='rb') as goldenFile:
+                goldenFiles[os.path.relpath(filePath, goldenDir).replace(os.sep, '/')] = goldenFile.read()
+    return goldenFiles
+
+def writeGoldenFiles(goldenDir, generatedFiles):
+    shutil.rmtree(goldenDir, ignore_errors=True)
+    for relPath, content in generatedFiles.items():
+        filePath = os.path.join(goldenDir, relPath)
+        os.makedirs(os.path.dirname(filePath), exist_ok=True)
+        with open(filePath, mode='wb') as goldenFile:
+            goldenFile.write(content)
+
+# Returns True if every run of the project produced the same files (and they match goldenDir, if given)
+def checkProject(projectDir, hashSeeds, jobCounts, goldenDir=None, updateGolden=False):
+    runConfigs = [(hashSeed, jobs, coldCache) for hashSeed in hashSeeds for jobs in jobCounts for coldCache in [True, False]]
+
+    firstName = None
+    firstFiles = None
+    isReproducible = True
+    for hashSeed, jobs, coldCache in runConfigs:
+        runName = "seed{}_jobs{}_{}".format(hashSeed, jobs, "cold" if coldCache else "warm")
+        generatedFiles = runGenerator(projectDir, hashSeed, jobs, coldCache)
+        if firstFiles == None:
+            firstName, firstFiles = runName, generatedFiles
+        elif not compareRuns(firstName, firstFiles, runName, generatedFiles):
+            isReproducible = False
+
+    print("{}: {} runs, {}".format(projectDir, len(runConfigs), "byte-identical" if isReproducible else "NOT reproducible"))
+
+    if goldenDir != None:
+        if updateGolden:
+            writeGoldenFiles(goldenDir, firstFiles)
+            print("Golden files written to", goldenDir)
+        elif not compareRuns("golden", readGoldenFiles(goldenDir), firstName, firstFiles):
+            isReproducible = False
+        else:
+            print("Matches the golden files in", goldenDir)
+    return isReproducible
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Check json_to_cmake generates byte-identical output across hash seeds, thread counts and scan cache states.")
+    parser.add_argument("project_dirs", nargs="*", metavar="project_dir", help="Projects to check. Without any, a synthetic project is generated and checked.")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1, 2], help="PYTHONHASHSEED values to run the generator with.")
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 4], help="--jobs values to run the generator with.")
+    parser.add_argument("--files", type=int, default=2000, help="File count of the synthetic project.")
+    parser.add_argument("--golden", default=None, metavar="DIR", help="Compare the output of a single project against the golden files in DIR.")
+    parser.add_argument("--update-golden", action="store_true", help="With --golden, save the output as the new golden files instead of comparing.")
+
+    args = parser.parse_args()
+    if args.golden != None and len(args.project_dirs) > 1:
+        parser.error("--golden can only be used with a single project directory")
+    if args.update_golden and args.golden == None:
+        parser.error("--update-golden requires --golden")
+    return args
+
+def main(args):
+    workDir = None
+    projectDirs = args.project_dirs
+    if len(projectDirs) == 0:
+        workDir = tempfile.mkdtemp(prefix="json_to_cmake_repro_")
+        projectDirs = [os.path.join(workDir, "project")]
+        generateTree(projectDirs[0], args.files, overlappingRoots=True)
+
+    try:
+        results = [checkProject(projectDir, args.seeds, args.jobs, args.golden, args.update_golden) for projectDir in projectDirs]
+    finally:
+        if workDir != None:
+            shutil.rmtree(workDir, ignore_errors=True)
+    return 0 if all(results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main(parseArgs()))
@@ -0,0 +1,155 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+# The generator's modules live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import file_scan
+import write_organizer
+from data import Data
+from file_write import CMakeBuilder
+from synthetic_tree import generateTree
+
+# write_organizer phases, in the order writeDataToCMakeFiles runs them
+WRITE_PHASES = [
+    ("writeProjectVersion", write_organizer.writeProjectVersion),
+    ("writeProjectName", write_organizer.writeProjectName),
+    ("writeProjectImportedLibs", write_organizer.writeProjectImportedLibs),
+    ("writeProjectOutputs", write_organizer.writeProjectOutputs),
+    ("writeProjectLinks", write_organizer.writeProjectLinks),
+    ("writeProjectCStandards", write_organizer.writeProjectCStandards),
+    ("writeProjectCppStandards", write_organizer.writeProjectCppStandards),
+    ("writeProjectBuildTargets", write_organizer.writeProjectBuildTargets)
+]
+
+def timeCall(func):
+    startTime = time.perf_counter()
+    result = func()
+    return time.perf_counter() - startTime, result
+
+def removeGeneratedFiles(projectDir):
+    shutil.rmtree(os.path.join(projectDir, file_scan.SCAN_CACHE_DIR_NAME), ignore_errors=True)
+    for fileName in ["CMakeLists.txt"]:
+        if os.path.exists(os.path.join(projectDir, fileName)):
+            os.remove(os.path.join(projectDir, fileName))
+
+# Time every stage of generating the project in projectDir. Each measurement is the best of 'repeat' runs.
+def benchmarkProject(projectDir, repeat):
+    timings = {}
+
+    def best(name, func, setup=None):
+        bestTime = None
+        for _ in range(repeat):
+            if setup != None:
+                setup()
+            elapsed, _result = timeCall(func)
+            bestTime = elapsed if bestTime == None else min(bestTime, elapsed)
+        timings[name] = bestTime
+
+    best("data_no_cache", lambda: Data(projectDir, useScanCache=False))
+    best("data_cold_cache", lambda: Data(projectDir), setup=lambda: removeGeneratedFiles(projectDir))
+    best("data_warm_cache", lambda: Data(projectDir))
+
+    jsonDataObject = Data(projectDir, useScanCache=False)
+    for phaseName, writePhase in WRITE_PHASES:
+        best(phaseName, lambda: writePhase(CMakeBuilder(os.path.join(projectDir, "CMakeLists.txt")), jsonDataObject))
+
+    best("end_to_end_cold", lambda: write_organizer.writeCMakeFiles(projectDir), setup=lambda: removeGeneratedFiles(projectDir))
+    best("end_to_end_warm_unchanged", lambda: write_organizer.writeCMakeFiles(projectDir))
+
+    timings["cmakelists_bytes"] = os.path.getsize(os.path.join(projectDir, "CMakeLists.txt"))
+    return timings
+
+# Results are only compared against results for an identically shaped tree
+def getTreeKey(treeInfo):
+    return json.dumps(treeInfo, sort_keys=True)
+
+# Compare two result files. Returns the list of (files, metric, old, new) which got slower by more than
+# 'threshold' times. Measurements which got slower by less than minSeconds are treated as noise.
+def findRegressions(oldResults, newResults, threshold, minSeconds):
+    regressions = []
+    oldByTree = { getTreeKey(result["tree"]): result for result in oldResults["results"] }
+    for newResult in newResults["results"]:
+        treeKey = getTreeKey(newResult["tree"])
+        if not treeKey in oldByTree:
+            continue
+        oldTimings = oldByTree[treeKey]["timings"]
+        for metricName, newValue in newResult["timings"].items():
+            if not metricName in oldTimings or metricName == "cmakelists_bytes":
+                continue
+            oldValue = oldTimings[metricName]
+            if newValue > oldValue * threshold and newValue - oldValue > minSeconds:
+                regressions.append((newResult["tree"]["files"], metricName, oldValue, newValue))
+    return regressions
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Benchmark json_to_cmake against synthetic project trees.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="File counts of the generated trees. (1000000 works, but takes a while to generate)")
+    parser.add_argument("--depth", type=int, default=3, help="Directory depth below each module's src/include directory.")
+    parser.add_argument("--outputs", type=int, default=4, help="Number of output items in the generated cmake_data.json.")
+    parser.add_argument("--files-per-dir", type=int, default=50)
+    parser.add_argument("--extension-mix", default=None, metavar="JSON", help="Extension weights, e.g. '{\"cpp\": 0.5, \"hpp\": 0.5}'.")
+    parser.add_argument("--overlapping-roots", action="store_true", help="Make every output also scan the whole include directory.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement. The fastest is reported.")
+    parser.add_argument("--work-dir", default=None, help="Where trees are generated. Defaults to a temporary directory which is removed afterwards.")
+    parser.add_argument("--output", default="benchmark_results.json", help="File the JSON results are written to.")
+    parser.add_argument("--compare", default=None, metavar="RESULTS_JSON", help="Earlier results to compare against. Exits with 1 if anything regressed.")
+    parser.add_argument("--threshold", type=float, default=1.25, help="With --compare, how many times slower a measurement may get before it counts as a regression.")
+    parser.add_argument("--min-seconds", type=float, default=0.005, help="With --compare, slowdowns smaller than this many seconds are ignored as noise.")
+    return parser.parse_args()
+
+def main(args):
+    extensionMix = json.loads(args.extension_mix) if args.extension_mix != None else None
+    workDir = args.work_dir if args.work_dir != None else tempfile.mkdtemp(prefix="json_to_cmake_bench_")
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": args.repeat
+        },
+        "results": []
+    }
+
+    try:
+        for fileCount in args.sizes:
+            projectDir = os.path.join(workDir, "tree_" + str(fileCount))
+            shutil.rmtree(projectDir, ignore_errors=True)
+
+            treeArgs = { "depth": args.depth, "outputs": args.outputs, "overlappingRoots": args.overlapping_roots, "filesPerDir": args.files_per_dir }
+            if extensionMix != None:
+                treeArgs["extensionMix"] = extensionMix
+            generateSeconds, treeInfo = timeCall(lambda: generateTree(projectDir, fileCount, **treeArgs))
+            print("Generated", fileCount, "files in", treeInfo["dirs"], "directories ({:.2f}s)".format(generateSeconds))
+
+            timings = benchmarkProject(projectDir, args.repeat)
+            for metricName, value in timings.items():
+                print("    {:<28} {}".format(metricName, value if metricName == "cmakelists_bytes" else "{:.4f}s".format(value)))
+            results["results"].append({ "tree": treeInfo, "timings": timings })
+    finally:
+        if args.work_dir == None:
+            shutil.rmtree(workDir, ignore_errors=True)
+
+    with open(args.output, mode='w') as outputFile:
+        json.dump(results, outputFile, indent=2)
+    print("Results written to", args.output)
+
+    if args.compare != None:
+        with open(args.compare) as compareFile:
+            regressions = findRegressions(json.load(compareFile), results, args.threshold, args.min_seconds)
+        for fileCount, metricName, oldValue, newValue in regressions:
+            print("REGRESSION: {} files, {}: {:.4f}s -> {:.4f}s".format(fileCount, metricName, oldValue, newValue))
+        if len(regressions) > 0:
+            return 1
+        print("No regressions against", args.compare)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(parseArgs()))
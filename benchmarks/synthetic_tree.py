@@ -0,0 +1,124 @@
+import json
+import math
+import os
+
+# Generates synthetic C/C++ project trees (plus a matching cmake_data.json) for benchmarking.
+
+DEFAULT_EXTENSION_MIX = {
+    "cpp": 0.45,
+    "c": 0.05,
+    "hpp": 0.35,
+    "h": 0.15
+}
+
+SOURCE_EXTENSIONS = ["cpp", "c++", "cxx", "c"]
+
+# All generated directories get this mtime, so the scan cache treats them as long settled
+SETTLED_MTIME_SECONDS = 1577836800
+
+# Relative directory paths of a directory tree 'depth' levels deep, with enough
+# leaf directories to hold 'fileCount' files at about 'filesPerDir' files each.
+def getLeafDirs(baseRelDir, fileCount, depth, filesPerDir):
+    leafCount = max(1, math.ceil(fileCount / filesPerDir))
+    fanout = max(1, math.ceil(leafCount ** (1.0 / depth))) if depth > 0 else 1
+
+    leafDirs = [baseRelDir]
+    for level in range(depth):
+        leafDirs = [relDir + "/d" + str(level) + "_" + str(index) for relDir in leafDirs for index in range(fanout)]
+        if len(leafDirs) >= leafCount:
+            break
+    return leafDirs[:leafCount]
+
+# Pick file extensions in the proportions given by extensionMix, deterministically
+def getExtensionSequence(fileCount, extensionMix):
+    totalWeight = sum(extensionMix.values())
+    extensions = []
+    for extension, weight in sorted(extensionMix.items()):
+        extensions += [extension] * int(round(fileCount * weight / totalWeight))
+    while len(extensions) < fileCount:
+        extensions.append(sorted(extensionMix)[0])
+    return extensions[:fileCount]
+
+def _writeFile(filePath, content):
+    with open(filePath, mode='w') as outputFile:
+        outputFile.write(content)
+
+# Write the synthetic project into rootDir. Files are split evenly between 'outputs' modules.
+# Module k's sources live under src/mod_k and its headers under include/mod_k. The last output is
+# an executable which links every other output. With overlappingRoots, every output also scans the
+# whole include directory, so the same directories are requested by every output.
+# Returns a dict describing the generated tree.
+def generateTree(rootDir, fileCount, depth=3, outputs=4, extensionMix=DEFAULT_EXTENSION_MIX, overlappingRoots=False, filesPerDir=50):
+    os.makedirs(rootDir, exist_ok=True)
+    outputs = max(1, outputs)
+    extensions = getExtensionSequence(fileCount, extensionMix)
+
+    outputItems = {}
+    linkLibs = []
+    dirCount = 0
+    for moduleIndex in range(outputs):
+        moduleName = "mod_" + str(moduleIndex)
+        moduleExtensions = extensions[moduleIndex::outputs]
+        sourceExtensions = [extension for extension in moduleExtensions if extension in SOURCE_EXTENSIONS]
+        headerExtensions = [extension for extension in moduleExtensions if not extension in SOURCE_EXTENSIONS]
+
+        for topDir, moduleFileExtensions in [("src", sourceExtensions), ("include", headerExtensions)]:
+            leafDirs = getLeafDirs(topDir + "/" + moduleName, len(moduleFileExtensions), depth, filesPerDir)
+            dirCount += len(leafDirs)
+            for leafDir in leafDirs:
+                os.makedirs(os.path.join(rootDir, leafDir), exist_ok=True)
+            for fileIndex, extension in enumerate(moduleFileExtensions):
+                fileName = "f" + str(fileIndex) + "." + extension
+                _writeFile(os.path.join(rootDir, leafDirs[fileIndex % len(leafDirs)], fileName), "#include \"" + moduleName + ".h\"\n")
+
+        headerDirs = ["include/" + moduleName]
+        if overlappingRoots:
+            headerDirs.append("include")
+
+        outputName = "output_" + str(moduleIndex)
+        outputItem = {
+            "r_source_dirs": ["src/" + moduleName],
+            "r_header_dirs": headerDirs,
+            "r_include_dirs": headerDirs
+        }
+        if moduleIndex == outputs - 1:
+            outputItem["type"] = "executable"
+            outputItem["base_file"] = "main.cpp"
+            outputItem["executable_output_dir"] = "bin"
+        else:
+            outputItem["type"] = "static_lib"
+            outputItem["archive_output_dir"] = "lib"
+            outputItem["library_output_dir"] = "lib"
+            linkLibs.append(outputName)
+        outputItems[outputName] = outputItem
+
+    _writeFile(os.path.join(rootDir, "main.cpp"), "int main() { return 0; }\n")
+
+    cmakeData = {
+        "min_cmake_version": "3.12",
+        "project_name": "synthetic_project",
+        "allowed_cpp_standards": ["11", "14", "17"],
+        "allowed_c_standards": ["99", "11"],
+        "output": outputItems,
+        "imported_libs": {},
+        "link_libs": { "output_" + str(outputs - 1): linkLibs } if len(linkLibs) > 0 else {},
+        "targets": {
+            "debug": { "cpp_flags": ["-g"], "c_flags": ["-g"] },
+            "release": { "cpp_flags": ["-O2"], "c_flags": ["-O2"] }
+        },
+        "default_target": "debug"
+    }
+    _writeFile(os.path.join(rootDir, "cmake_data.json"), json.dumps(cmakeData, indent=4))
+
+    for dirPathString, _subdirNames, _fileNames in os.walk(rootDir):
+        os.utime(dirPathString, (SETTLED_MTIME_SECONDS, SETTLED_MTIME_SECONDS))
+
+    return {
+        "files": fileCount,
+        "dirs": dirCount,
+        "depth": depth,
+        "outputs": outputs,
+        "extension_mix": extensionMix,
+        "overlapping_roots": overlappingRoots,
+        "files_per_dir": filesPerDir
+    }
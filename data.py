@@ -1,21 +1,25 @@
 import io
 import json
+import os
 from pathlib import Path
-import glob
 
+import file_scan
 import HelperFunctions
+import ignore_rules
+import include_scan
+import instrumentation
+import lib_snapshot
 import HelperVariables
+import link_graph
+import pch_select
+import unity_build
+import validate
 
-jsonFileName = "cmake_data.json"
+jsonFileName = HelperVariables.JSON_FILE_NAME
 defCppStandard = "11"
 defCStandard = "99"
 
-allowedImportedLibTypeNames = [
-    "shared",
-    HelperVariables.OUTPUT_TYPES["SHARED_LIB"],
-    "static",
-    HelperVariables.OUTPUT_TYPES["STATIC_LIB"]
-]
+allowedImportedLibTypeNames = validate.IMPORTED_LIB_TYPES
 
 cppSourceFileTypes = [
     "cpp",
@@ -42,31 +46,47 @@ allSourceTypes = set(cppSourceFileTypes + cSourceFileTypes)
 allHeaderTypes = set(cppHeaderFileTypes + cHeaderFileTypes)
 allFileTypes = set(cppSourceFileTypes + cppHeaderFileTypes + cHeaderFileTypes + cSourceFileTypes)
 
+# The output item's C and C++ source files, the ones a unity build can batch. (Header files are never compiled)
+def getUnitySourceFiles(selfOutput):
+    return [sourceFile for sourceFile in selfOutput[HelperVariables.SOURCE_FILES_TAGNAME] if sourceFile[0] != '$' and file_scan.getFileExtension(os.path.basename(sourceFile)) in allSourceTypes]
+
+# Escape the glob metacharacters in a path, so CMake's file(GLOB) matches them literally
+def escapeGlobPath(pathString):
+    return "".join("[" + char + "]" if char in "[*?" else char for char in pathString)
+
+# file(GLOB_RECURSE) patterns matching every file under the given directories whose extension is one of fileExtensionTypes
+def getGlobPatterns(otherPathStrings, fileExtensionTypes):
+    globPatterns = []
+    for relPathString in map(escapeGlobPath, map(file_scan.normalizeRelPath, otherPathStrings)):
+        for extension in sorted(fileExtensionTypes):
+            globPatterns.append(file_scan.joinRelPath(relPathString, "*." + extension))
+    return globPatterns
+
 def fixWindowsPath(pathString):
     return pathString.replace('\\', '/')
 
+# Duplicates are removed, but the order of the paths is kept so the generated output is reproducible
 def fixFilePaths(basePath, arrayOfPathStrings):
     if str(basePath) != ".":
         # Remove the basePath argument data from each returned pathString
         # TODO: Refactor this lambda. 'item.find' should not have to be called twice.
-        return set(map(lambda item : fixWindowsPath(item[ (item.find(str(basePath)) + len(str(basePath)) + 1) if item.find(str(basePath)) >= 0 else 0:]), arrayOfPathStrings))
-    return set(map(lambda item : fixWindowsPath(item), arrayOfPathStrings))
-
-# Recursively get all files whose extensions match any of the ones in the 'fileExtensionTypes' array
-def getFilesRecursively(basePath, otherPathStrings, fileExtensionTypes):
-    fileList = []
-    for pathString in otherPathStrings:
-        for sourceType in fileExtensionTypes:
-            # TODO: Make this more efficient using a combined regex. (The regex should combine all source types, as this currently traverses the directories recursively FOR EACH FILE TYPE. That will get badly very quick for large-scale projects)
-            fileList += glob.glob( str( basePath/pathString/("**/*." + sourceType) ), recursive=True )
-    return set(fixFilePaths(basePath, fileList))
-
-# Get all directories in a folder
-def getDirsRecursively(basePath, otherPathStrings):
-    dirList = []
-    for pathString in otherPathStrings:
-        dirList += glob.glob( str( basePath/pathString ) + '/**/', recursive=True)
-    return set(fixFilePaths(basePath, dirList))
+        return list(dict.fromkeys(map(lambda item : fixWindowsPath(item[ (item.find(str(basePath)) + len(str(basePath)) + 1) if item.find(str(basePath)) >= 0 else 0:]), arrayOfPathStrings)))
+    return list(dict.fromkeys(map(lambda item : fixWindowsPath(item), arrayOfPathStrings)))
+
+# Recursively get all files whose extensions match any of the ones in the 'fileExtensionTypes' array, sorted by path.
+# Each root is walked only once, no matter how many extension types are requested.
+# Pass the scanIndex of a Data object to reuse the directories it has already read.
+# Directories ignored by ignoreRules (see ignore_rules.IgnoreRules) are skipped without being read.
+def getFilesRecursively(basePath, otherPathStrings, fileExtensionTypes, scanIndex=None, ignoreRules=ignore_rules.NO_RULES):
+    if scanIndex == None:
+        scanIndex = file_scan.DirectoryIndex(basePath)
+    return scanIndex.getFiles(otherPathStrings, fileExtensionTypes, ignoreRules)
+
+# Get all directories in a folder, sorted by path
+def getDirsRecursively(basePath, otherPathStrings, scanIndex=None, ignoreRules=ignore_rules.NO_RULES):
+    if scanIndex == None:
+        scanIndex = file_scan.DirectoryIndex(basePath)
+    return scanIndex.getDirs(otherPathStrings, ignoreRules)
 
 # Returns true if the tag is found, else raises a KeyError.
 # Optional parentTag is the tag of the object that should contain the missing tag.
@@ -76,19 +96,19 @@ def _hasTag(pJSON, tag, parentTag = "", why=""):
     if tag in pJSON:
         return True
     else:
-        errorMessage = "Tag \"" + tag + "\" missing in " + jsonFileName + ". "
-
-        if parentTag == "":
-            errorMessage += "Please add it to the file."
-        else:
-            errorMessage += "Please add it inside its parent tag \"" + parentTag + "\"."
-
-        if why != "":
-            errorMessage += "\n" + why
-        raise KeyError(errorMessage)
+        raise KeyError(validate.getMissingTagMessage(tag, parentTag, why))
 
 class Data():
-    def __init__(self, rootDir):
+    # useScanCache: Reuse (and update) the directory listings stored in the project's
+    # scan cache, so unchanged directories don't have to be read again.
+    # jobs: Number of threads used to read the project's directories (and to parse files for minimal_includes).
+    # sharedListings: Optional dict of directory listings shared with other Data objects (see file_scan.DirectoryIndex)
+    # onlyOutputs: Optional list of output item names. Only these output items, and the output items and
+    # imported libs they link to, are scanned and generated. The rest aren't looked at.
+    # streamSources: Don't store scanned source and header file lists. They are scanned again while they are
+    # written instead (see file_scan.StreamedFileList), and the scan cache isn't used.
+    @instrumentation.timed("Data.__init__")
+    def __init__(self, rootDir, useScanCache=True, jobs=1, sharedListings=None, onlyOutputs=None, streamSources=False):
 
         if type(rootDir) is str:
             rootDirPathObject = Path(rootDir)
@@ -96,6 +116,35 @@ class Data():
         else:
             raise TypeError("Passed a non-string value into the Data(str) constructor. Item: ")
 
+        # Report every problem with cmake_data.json up front, before any directory is scanned
+        validate.raiseIfInvalid(parsedJSON)
+
+        self.parsedJSON = parsedJSON
+        self.rootDirPathObject = rootDirPathObject
+        self.streamSources = streamSources
+        self.useScanCache = useScanCache and not streamSources
+        self.jobs = jobs
+        # Created the first time an output item uses minimal_includes
+        self.includeScanner = None
+        self.linkGraph = link_graph.LinkGraph(parsedJSON)
+
+        # None when every output item and imported lib is generated
+        self.selectedOutputNames = None
+        self.selectedImportedLibNames = None
+        if onlyOutputs != None:
+            self.selectedOutputNames, self.selectedImportedLibNames = self.linkGraph.getClosure(onlyOutputs)
+
+        # Needed before anything is scanned, so ignored directories are never read
+        self.setIgnoreRules(parsedJSON)
+        self.setFollowSymlinks(parsedJSON)
+
+        # Every directory under the project is listed at most once per Data object
+        self.scanIndex = file_scan.DirectoryIndex(rootDirPathObject, sharedListings, self.follow_symlinks)
+        if self.useScanCache:
+            self.scanIndex.loadCache(file_scan.getScanCachePath(rootDirPathObject))
+        if not streamSources:
+            self.scanIndex.prefetch(self.getJSONScanRoots(parsedJSON), jobs, self.ignoreRules)
+
         # self.setMinCmakeVersion(parsedJSON)
         self.setProjectName(parsedJSON)
         self.setDefaultCppStandard(parsedJSON)
@@ -105,10 +154,23 @@ class Data():
 
         self.setTargets(parsedJSON)
         self.setTargetDefault(parsedJSON)
+        self.setCMakeFragments(parsedJSON)
+        self.setCompressSourceLists(parsedJSON)
+        self.setMinimalIncludes(parsedJSON)
+        self.setUnityBuild(parsedJSON)
+        self.setPrecompileHeaders(parsedJSON)
 
         self.setOutput(parsedJSON, rootDirPathObject)
         self.setImportedLibs(parsedJSON, rootDirPathObject)
         self.setLinks(parsedJSON)
+        self.setShareObjectFiles(parsedJSON)
+        self.setObjectLibs()
+        self.setUnityGroups()
+
+        if self.useScanCache:
+            self.scanIndex.saveCache(file_scan.getScanCachePath(rootDirPathObject))
+            if self.includeScanner != None:
+                self.includeScanner.saveCache(include_scan.getIncludeCachePath(rootDirPathObject))
 
     # # Check for min_cmake_version
     # def setMinCmakeVersion(self, parsedJSON):
@@ -116,11 +178,13 @@ class Data():
     #         self.cmake_tag_version = parsedJSON[HelperVariables.CMAKE_MIN_VERSION_TAGNAME]
 
     # Check for project_name
+    @instrumentation.timed("Data.setProjectName")
     def setProjectName(self, parsedJSON):
         if _hasTag(parsedJSON, HelperVariables.PROJECT_NAME_TAGNAME):
             self.project_name = parsedJSON[HelperVariables.PROJECT_NAME_TAGNAME]
 
     # Check for default_cpp_standard
+    @instrumentation.timed("Data.setDefaultCppStandard")
     def setDefaultCppStandard(self, parsedJSON):
         if HelperVariables.DEFAULT_CPP_STANDARD_TAGNAME in parsedJSON:
             self.default_cpp_standard = parsedJSON[HelperVariables.DEFAULT_CPP_STANDARD_TAGNAME]
@@ -128,6 +192,7 @@ class Data():
             self.default_cpp_standard = ""
 
     # Check for default_c_standard
+    @instrumentation.timed("Data.setDefaultCStandard")
     def setDefaultCStandard(self, parsedJSON):
         if HelperVariables.DEFAULT_C_STANDARD_TAGNAME in parsedJSON:
             self.default_c_standard = parsedJSON[HelperVariables.DEFAULT_C_STANDARD_TAGNAME]
@@ -135,16 +200,19 @@ class Data():
             self.default_c_standard = ""
 
     # Check for allowed_cpp_standards
+    @instrumentation.timed("Data.setAllowedCppStandards")
     def setAllowedCppStandards(self, parsedJSON):
         if _hasTag(parsedJSON, HelperVariables.ALLOWED_CPP_STANDARDS_TAGNAME):
             self.allowed_cpp_standards = parsedJSON[HelperVariables.ALLOWED_CPP_STANDARDS_TAGNAME]
 
     # Check for allowed_c_standards
+    @instrumentation.timed("Data.setAllowedCStandards")
     def setAllowedCStandards(self, parsedJSON):
         if _hasTag(parsedJSON, HelperVariables.ALLOWED_C_STANDARDS_TAGNAME):
             self.allowed_c_standards = parsedJSON[HelperVariables.ALLOWED_C_STANDARDS_TAGNAME]
 
     # Check for output HelperVariables.TARGETS_TAGNAME such as 'debug' and 'release'
+    @instrumentation.timed("Data.setTargets")
     def setTargets(self, parsedJSON):
         if _hasTag(parsedJSON, HelperVariables.TARGETS_TAGNAME, why="Are you building a release binary? Or maybe a debug one? Add the 'targets' tag and add a build type to it."):
             self.targets = {}
@@ -168,13 +236,223 @@ class Data():
             # different across (for) other compilers
 
     # Check for optional default_target
+    @instrumentation.timed("Data.setTargetDefault")
     def setTargetDefault(self, parsedJSON):
         if HelperVariables.DEFAULT_TARGET_TAGNAME in parsedJSON:
             self.default_target = parsedJSON[HelperVariables.DEFAULT_TARGET_TAGNAME]
         else:
             self.default_target = ""
 
+    # Check for optional cmake_fragments
+    @instrumentation.timed("Data.setCMakeFragments")
+    def setCMakeFragments(self, parsedJSON):
+        if HelperVariables.CMAKE_FRAGMENTS_TAGNAME in parsedJSON:
+            self.cmake_fragments = parsedJSON[HelperVariables.CMAKE_FRAGMENTS_TAGNAME]
+        else:
+            self.cmake_fragments = False
+
+    # Check for optional exclude and use_gitignore. The project's .gitignore patterns come first, so
+    # exclude patterns can override them. Output items and imported libs can add their own exclude patterns.
+    @instrumentation.timed("Data.setIgnoreRules")
+    def setIgnoreRules(self, parsedJSON):
+        patternStrings = []
+        if not HelperVariables.USE_GITIGNORE_TAGNAME in parsedJSON or parsedJSON[HelperVariables.USE_GITIGNORE_TAGNAME]:
+            patternStrings += ignore_rules.readIgnoreFile(str(self.rootDirPathObject/ignore_rules.GITIGNORE_FILE_NAME))
+        if HelperVariables.EXCLUDE_TAGNAME in parsedJSON:
+            patternStrings += parsedJSON[HelperVariables.EXCLUDE_TAGNAME]
+        self.ignoreRules = ignore_rules.IgnoreRules(patternStrings)
+
+    # Check for optional follow_symlinks, which defaults to true. Either way, symlink loops are
+    # detected and every directory is scanned once (see file_scan.DirectoryIndex).
+    @instrumentation.timed("Data.setFollowSymlinks")
+    def setFollowSymlinks(self, parsedJSON):
+        if HelperVariables.FOLLOW_SYMLINKS_TAGNAME in parsedJSON:
+            self.follow_symlinks = parsedJSON[HelperVariables.FOLLOW_SYMLINKS_TAGNAME]
+        else:
+            self.follow_symlinks = True
+
+    # The project wide ignore rules, followed by the exclude patterns of the given output item or imported lib definition
+    def getItemIgnoreRules(self, jsonItem):
+        if HelperVariables.EXCLUDE_TAGNAME in jsonItem:
+            return self.ignoreRules.extend(jsonItem[HelperVariables.EXCLUDE_TAGNAME])
+        return self.ignoreRules
+
+    # An empty file list, which is a file_scan.StreamedFileList when streaming
+    def newFileList(self):
+        return file_scan.StreamedFileList(self.rootDirPathObject, self.follow_symlinks) if self.streamSources else []
+
+    # Add the files under otherPathStrings matching fileExtensionTypes to a list from newFileList.
+    # ignoreRules defaults to the project wide ones.
+    def addFiles(self, fileList, otherPathStrings, fileExtensionTypes, ignoreRules=None):
+        if ignoreRules == None:
+            ignoreRules = self.ignoreRules
+        if self.streamSources:
+            fileList.addRoots(otherPathStrings, fileExtensionTypes, ignoreRules)
+        else:
+            fileList += getFilesRecursively(self.rootDirPathObject, otherPathStrings, fileExtensionTypes, self.scanIndex, ignoreRules)
+
+    def getDirs(self, otherPathStrings, ignoreRules=None):
+        if ignoreRules == None:
+            ignoreRules = self.ignoreRules
+        if self.streamSources:
+            return sorted(set(file_scan.iterDirs(self.rootDirPathObject, otherPathStrings, ignoreRules, self.follow_symlinks)))
+        return getDirsRecursively(self.rootDirPathObject, otherPathStrings, self.scanIndex, ignoreRules)
+
+    # Check for optional compress_source_lists. Output items can override it with their own tag.
+    @instrumentation.timed("Data.setCompressSourceLists")
+    def setCompressSourceLists(self, parsedJSON):
+        if HelperVariables.COMPRESS_SOURCE_LISTS_TAGNAME in parsedJSON:
+            self.compress_source_lists = parsedJSON[HelperVariables.COMPRESS_SOURCE_LISTS_TAGNAME]
+        else:
+            self.compress_source_lists = False
+
+    # Check for optional minimal_includes. Output items can override it with their own tag.
+    @instrumentation.timed("Data.setMinimalIncludes")
+    def setMinimalIncludes(self, parsedJSON):
+        if HelperVariables.MINIMAL_INCLUDES_TAGNAME in parsedJSON:
+            self.minimal_includes = parsedJSON[HelperVariables.MINIMAL_INCLUDES_TAGNAME]
+        else:
+            self.minimal_includes = False
+
+    # Check for optional unity_build and unity_batch_bytes. Output items can override both with their own tags.
+    @instrumentation.timed("Data.setUnityBuild")
+    def setUnityBuild(self, parsedJSON):
+        if HelperVariables.UNITY_BUILD_TAGNAME in parsedJSON:
+            self.unity_build = parsedJSON[HelperVariables.UNITY_BUILD_TAGNAME]
+        else:
+            self.unity_build = False
+
+        if HelperVariables.UNITY_BATCH_BYTES_TAGNAME in parsedJSON:
+            self.unity_batch_bytes = parsedJSON[HelperVariables.UNITY_BATCH_BYTES_TAGNAME]
+        else:
+            self.unity_batch_bytes = unity_build.DEFAULT_BATCH_BYTES
+
+    # Check for optional precompile_headers and pch_budget_bytes. Output items can override both with their own tags.
+    @instrumentation.timed("Data.setPrecompileHeaders")
+    def setPrecompileHeaders(self, parsedJSON):
+        if HelperVariables.PRECOMPILE_HEADERS_TAGNAME in parsedJSON:
+            self.precompile_headers = parsedJSON[HelperVariables.PRECOMPILE_HEADERS_TAGNAME]
+        else:
+            self.precompile_headers = False
+
+        if HelperVariables.PCH_BUDGET_BYTES_TAGNAME in parsedJSON:
+            self.pch_budget_bytes = parsedJSON[HelperVariables.PCH_BUDGET_BYTES_TAGNAME]
+        else:
+            self.pch_budget_bytes = pch_select.DEFAULT_BUDGET_BYTES
+
+    def getIncludeScanner(self):
+        if self.includeScanner == None:
+            self.includeScanner = include_scan.IncludeScanner(self.rootDirPathObject, self.scanIndex)
+            if self.useScanCache:
+                self.includeScanner.loadCache(include_scan.getIncludeCachePath(self.rootDirPathObject))
+        return self.includeScanner
+
+    # Drop the include dirs and header files the output item's sources never reach through #include.
+    # If a reached file includes something named by a macro, the output item is left as it is.
+    @instrumentation.timed("Data.applyMinimalIncludes")
+    def applyMinimalIncludes(self, selfOutput):
+        sourceFiles = selfOutput[HelperVariables.SOURCE_FILES_TAGNAME]
+        sourceRelPaths = [sourceFile for sourceFile in sourceFiles if not file_scan.getFileExtension(os.path.basename(sourceFile)) in allHeaderTypes]
+        minimalIncludes = self.getIncludeScanner().getMinimalIncludes(sourceRelPaths, selfOutput[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME], self.jobs)
+        if minimalIncludes == None:
+            return
+
+        usedIncludeDirs, reachedHeaderPaths = minimalIncludes
+        sourceRelPathSet = set(sourceRelPaths)
+        selfOutput[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME] = usedIncludeDirs
+        selfOutput[HelperVariables.SOURCE_FILES_TAGNAME] = [sourceFile for sourceFile in sourceFiles if sourceFile in sourceRelPathSet or file_scan.normalizeRelPath(sourceFile) in reachedHeaderPaths]
+
+    # The output item's unity_exclude files and batch size. The batches themselves are made by setUnityGroups,
+    # once every output item is known.
+    @instrumentation.timed("Data.setUnityBatches")
+    def setUnityBatches(self, outputItem, selfOutput):
+        excludedPaths = []
+        if HelperVariables.UNITY_EXCLUDE_TAGNAME in outputItem:
+            excludedPaths = list(map(file_scan.normalizeRelPath, outputItem[HelperVariables.UNITY_EXCLUDE_TAGNAME]))
+
+        if HelperVariables.UNITY_BATCH_BYTES_TAGNAME in outputItem:
+            selfOutput[HelperVariables.UNITY_BATCH_BYTES_TAGNAME] = outputItem[HelperVariables.UNITY_BATCH_BYTES_TAGNAME]
+        else:
+            selfOutput[HelperVariables.UNITY_BATCH_BYTES_TAGNAME] = self.unity_batch_bytes
+
+        selfOutput[HelperVariables.UNITY_BATCHES_TAGNAME] = []
+        selfOutput[HelperVariables.UNITY_EXCLUDED_FILES_TAGNAME] = [sourceFile for sourceFile in getUnitySourceFiles(selfOutput) if unity_build.isExcluded(file_scan.normalizeRelPath(sourceFile), excludedPaths)]
+
+    # UNITY_GROUP and SKIP_UNITY_BUILD_INCLUSION are source properties, which belong to the file rather than
+    # to the target. So a file compiled by several output items using unity builds must be in the same batch
+    # for all of them. Files are grouped by the exact set of unity building output items compiling them, and
+    # each group is batched once, with the smallest unity_batch_bytes of those output items.
+    # Raises a KeyError if output items sharing a file disagree on whether it is in unity_exclude.
+    @instrumentation.timed("Data.setUnityGroups")
+    def setUnityGroups(self):
+        ownerNamesBySourceFile = {}
+        for outputName, selfOutput in self.output.items():
+            if selfOutput[HelperVariables.UNITY_BATCHES_TAGNAME] == None:
+                continue
+            selfOutput[HelperVariables.UNITY_BATCHES_TAGNAME] = []
+            for sourceFile in getUnitySourceFiles(selfOutput):
+                if not sourceFile in ownerNamesBySourceFile:
+                    ownerNamesBySourceFile[sourceFile] = []
+                ownerNamesBySourceFile[sourceFile].append(outputName)
+
+        sourceFilesByOwnerNames = {}
+        for sourceFile, ownerNames in ownerNamesBySourceFile.items():
+            excludingNames = [ownerName for ownerName in ownerNames if sourceFile in self.output[ownerName][HelperVariables.UNITY_EXCLUDED_FILES_TAGNAME]]
+            if len(excludingNames) > 0 and len(excludingNames) < len(ownerNames):
+                includingNames = [ownerName for ownerName in ownerNames if not ownerName in excludingNames]
+                raise KeyError("\"" + sourceFile + "\" is in the \"unity_exclude\" of " + ", ".join(excludingNames) + " but not of " + ", ".join(includingNames) + ". Source properties are shared by every output item, so output items compiling the same file with unity builds must exclude it alike.")
+            if len(excludingNames) == 0:
+                if not tuple(ownerNames) in sourceFilesByOwnerNames:
+                    sourceFilesByOwnerNames[tuple(ownerNames)] = []
+                sourceFilesByOwnerNames[tuple(ownerNames)].append(sourceFile)
+
+        groupCounts = {}
+        for ownerNames, sourceFiles in sourceFilesByOwnerNames.items():
+            maxBatchBytes = min(self.output[ownerName][HelperVariables.UNITY_BATCH_BYTES_TAGNAME] for ownerName in ownerNames)
+            for batch in unity_build.getUnityBatches(sourceFiles, lambda relPath : unity_build.getFileCost(self.rootDirPathObject, relPath), maxBatchBytes):
+                groupIndex = groupCounts.get(ownerNames[0], 0)
+                groupCounts[ownerNames[0]] = groupIndex + 1
+                for ownerName in ownerNames:
+                    self.output[ownerName][HelperVariables.UNITY_BATCHES_TAGNAME].append((HelperFunctions.getOutputUnityGroupName(ownerNames[0], groupIndex), batch))
+
+    # The output item's precompiled headers: the ones listed in pch_include, followed by the ones picked from
+    # its sources' includes (see pch_select.selectPrecompiledHeaders) when precompile_headers is on.
+    # Picking is skipped for output items mixing C and C++ sources, since every header would be precompiled for both.
+    @instrumentation.timed("Data.setPrecompiledHeaders")
+    def setPrecompiledHeaders(self, outputItem, selfOutput, usePrecompileHeaders):
+        def normalizeHeader(header):
+            return header if pch_select.isExternalHeader(header) else file_scan.normalizeRelPath(header)
+
+        precompiledHeaders = []
+        if HelperVariables.PCH_INCLUDE_TAGNAME in outputItem:
+            precompiledHeaders += map(normalizeHeader, outputItem[HelperVariables.PCH_INCLUDE_TAGNAME])
+
+        if usePrecompileHeaders:
+            sourceRelPaths = [file_scan.normalizeRelPath(sourceFile) for sourceFile in selfOutput[HelperVariables.SOURCE_FILES_TAGNAME] if file_scan.getFileExtension(os.path.basename(sourceFile)) in allSourceTypes]
+            isCpp = set(file_scan.getFileExtension(os.path.basename(relPath)) in cppSourceFileTypes for relPath in sourceRelPaths)
+            if len(isCpp) == 1:
+                excludedHeaders = precompiledHeaders[:]
+                if HelperVariables.PCH_EXCLUDE_TAGNAME in outputItem:
+                    excludedHeaders += map(normalizeHeader, outputItem[HelperVariables.PCH_EXCLUDE_TAGNAME])
+
+                if HelperVariables.PCH_BUDGET_BYTES_TAGNAME in outputItem:
+                    budgetBytes = outputItem[HelperVariables.PCH_BUDGET_BYTES_TAGNAME]
+                else:
+                    budgetBytes = self.pch_budget_bytes
+                precompiledHeaders += pch_select.selectPrecompiledHeaders(self.getIncludeScanner(), sourceRelPaths, selfOutput[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME], budgetBytes, excludedHeaders, self.jobs)
+
+        selfOutput[HelperVariables.PRECOMPILED_HEADERS_TAGNAME] = list(dict.fromkeys(precompiledHeaders))
+
+    # Whether the source and header files of the given output item definition are found by CMake's
+    # file(GLOB_RECURSE) instead of being scanned here. The optional glob_sources tag of the output item
+    # overrides the one in the root object, which defaults to false.
+    def usesGlobSources(self, outputItem):
+        if HelperVariables.GLOB_SOURCES_TAGNAME in outputItem:
+            return outputItem[HelperVariables.GLOB_SOURCES_TAGNAME]
+        return HelperVariables.GLOB_SOURCES_TAGNAME in self.parsedJSON and self.parsedJSON[HelperVariables.GLOB_SOURCES_TAGNAME]
+
     # Check for output items
+    @instrumentation.timed("Data.setOutput")
     def setOutput(self, parsedJSON, rootDirPathObject):
         if _hasTag(parsedJSON, HelperVariables.OUTPUT_TAGNAME):
             # output = empty dict, for use later. (Makes changing values easier)
@@ -190,110 +468,373 @@ class Data():
                 _hasTag(parsedJSON[HelperVariables.OUTPUT_TAGNAME], "any tag name", parentTag=HelperVariables.OUTPUT_TAGNAME, why="An item must be added to the output tag, otherwise nothing will be compiled and/or built")
 
             for keyName in outputItemKeys:
-                self.output[keyName] = {}
-                outputItem = parsedJSON[HelperVariables.OUTPUT_TAGNAME][keyName]
-                selfOutput = self.output[keyName]
-
-                # Check output item for type
-                if _hasTag(outputItem, HelperVariables.TYPE_TAGNAME, parentTag=keyName, why="Without a type, we do not know what to compile your code into. Options: \"executable\", \"static_lib\", \"shared_lib\""):
-                    selfOutput[HelperVariables.TYPE_TAGNAME] = outputItem[HelperVariables.TYPE_TAGNAME]
-
-                # Define the source_files array for this outputitem
-                selfOutput[HelperVariables.SOURCE_FILES_TAGNAME] = []
-
-                # Check for base_file (this tag is optional)
-                if HelperVariables.BASE_FILE_TAGNAME in outputItem:
-                    selfOutput[HelperVariables.SOURCE_FILES_TAGNAME].append(outputItem[HelperVariables.BASE_FILE_TAGNAME])
-
-                # Check for r_source_dirs
-                if _hasTag(outputItem, HelperVariables.R_SOURCE_DIRS_TAGNAME, parentTag=keyName, why="These are the base directories to be recursively searched for source files. If you are only compiling the (optional) base file, still include this tag with an empty array."):
-                    selfOutput[HelperVariables.SOURCE_FILES_TAGNAME] += getFilesRecursively(rootDirPathObject, outputItem[HelperVariables.R_SOURCE_DIRS_TAGNAME], allSourceTypes)
-
-                # Check for r_header_dirs
-                if _hasTag(outputItem, HelperVariables.R_HEADER_DIRS_TAGNAME, parentTag=keyName, why="Without header files, your files will not be able to include other files, and your program may not compile."):
-                    selfOutput[HelperVariables.SOURCE_FILES_TAGNAME] += getFilesRecursively(rootDirPathObject, outputItem[HelperVariables.R_HEADER_DIRS_TAGNAME], allHeaderTypes)
-
-                if _hasTag(outputItem, HelperVariables.R_INCLUDE_DIRS_TAGNAME, parentTag=keyName, why="Without passing the include directories of your header files to the compiler, there is a good chance they may not be included."):
-                    # Initialize the include_directories array in this output item as well
-                    selfOutput[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME] = list(getDirsRecursively(rootDirPathObject, outputItem[HelperVariables.R_INCLUDE_DIRS_TAGNAME]))
-
-                    if HelperVariables.IND_INCLUDE_DIRS_TAGNAME in outputItem:
-                        selfOutput[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME] += map(lambda relPathString : str(rootDirPathObject/relPathString), outputItem[HelperVariables.IND_INCLUDE_DIRS_TAGNAME])
-                        # Make sure no duplicates were added
-                        selfOutput[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME] = list(dict.fromkeys(selfOutput[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME]))
-
-                    # Fix file paths
-                    selfOutput[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME] = list(fixFilePaths(rootDirPathObject, selfOutput[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME]))
-
-                if selfOutput[HelperVariables.TYPE_TAGNAME].lower() == HelperVariables.OUTPUT_TYPES["EXE"]:
-                    # Only executable_output_dir is required
-                    if _hasTag(outputItem, HelperVariables.EXE_OUTPUT_DIR_TAGNAME, parentTag=keyName, why="Specifies the directory into which the executable will be build. (Don't use a beginning /)"):
-                        selfOutput[HelperVariables.EXE_OUTPUT_DIR_TAGNAME] = outputItem[HelperVariables.EXE_OUTPUT_DIR_TAGNAME]
-                else:
-                    # Assumed to be a library, so both archive_output_dir and library_output_dir are required
-                    # Check for archive_output_dir
-                    if _hasTag(outputItem, HelperVariables.ARCHIVE_OUTPUT_DIR_TAGNAME, parentTag=keyName, why="Specifies the directory into which the library 'archive' files will be built. (Don't use a beginning /)"):
-                        selfOutput[HelperVariables.ARCHIVE_OUTPUT_DIR_TAGNAME] = outputItem[HelperVariables.ARCHIVE_OUTPUT_DIR_TAGNAME]
+                if self.selectedOutputNames == None or keyName in self.selectedOutputNames:
+                    self.setOutputItem(keyName, parsedJSON[HelperVariables.OUTPUT_TAGNAME][keyName], rootDirPathObject)
+
+    # (Re)build a single output item from its cmake_data.json definition
+    def setOutputItem(self, keyName, outputItem, rootDirPathObject):
+        self.output[keyName] = {}
+        selfOutput = self.output[keyName]
+
+        # Check output item for type
+        if _hasTag(outputItem, HelperVariables.TYPE_TAGNAME, parentTag=keyName, why="Without a type, we do not know what to compile your code into. Options: \"executable\", \"static_lib\", \"shared_lib\""):
+            # Types are case insensitive, so store them in the lower case form they are compared with
+            selfOutput[HelperVariables.TYPE_TAGNAME] = outputItem[HelperVariables.TYPE_TAGNAME].lower()
+
+        # Check for optional compress_source_lists, which defaults to the project wide setting.
+        # Compressing needs the whole file list at once, so streamed lists are never compressed.
+        if self.streamSources:
+            selfOutput[HelperVariables.COMPRESS_SOURCE_LISTS_TAGNAME] = False
+        elif HelperVariables.COMPRESS_SOURCE_LISTS_TAGNAME in outputItem:
+            selfOutput[HelperVariables.COMPRESS_SOURCE_LISTS_TAGNAME] = outputItem[HelperVariables.COMPRESS_SOURCE_LISTS_TAGNAME]
+        else:
+            selfOutput[HelperVariables.COMPRESS_SOURCE_LISTS_TAGNAME] = self.compress_source_lists
+
+        # Define the source_files array for this outputitem
+        selfOutput[HelperVariables.SOURCE_FILES_TAGNAME] = self.newFileList()
+
+        # Check for base_file (this tag is optional)
+        if HelperVariables.BASE_FILE_TAGNAME in outputItem:
+            selfOutput[HelperVariables.SOURCE_FILES_TAGNAME].append(outputItem[HelperVariables.BASE_FILE_TAGNAME])
+
+        # With glob_sources, CMake finds the files in r_source_dirs and r_header_dirs itself, so they aren't scanned
+        selfOutput[HelperVariables.SOURCE_GLOBS_TAGNAME] = [] if self.usesGlobSources(outputItem) else None
+
+        # Check for optional exclude, which adds to the project wide ignore rules
+        ignoreRules = self.getItemIgnoreRules(outputItem)
+
+        # Check for r_source_dirs
+        if _hasTag(outputItem, HelperVariables.R_SOURCE_DIRS_TAGNAME, parentTag=keyName, why="These are the base directories to be recursively searched for source files. If you are only compiling the (optional) base file, still include this tag with an empty array."):
+            if selfOutput[HelperVariables.SOURCE_GLOBS_TAGNAME] != None:
+                selfOutput[HelperVariables.SOURCE_GLOBS_TAGNAME] += getGlobPatterns(outputItem[HelperVariables.R_SOURCE_DIRS_TAGNAME], allSourceTypes)
+            else:
+                self.addFiles(selfOutput[HelperVariables.SOURCE_FILES_TAGNAME], outputItem[HelperVariables.R_SOURCE_DIRS_TAGNAME], allSourceTypes, ignoreRules)
+
+        # Check for r_header_dirs
+        if _hasTag(outputItem, HelperVariables.R_HEADER_DIRS_TAGNAME, parentTag=keyName, why="Without header files, your files will not be able to include other files, and your program may not compile."):
+            if selfOutput[HelperVariables.SOURCE_GLOBS_TAGNAME] != None:
+                selfOutput[HelperVariables.SOURCE_GLOBS_TAGNAME] += getGlobPatterns(outputItem[HelperVariables.R_HEADER_DIRS_TAGNAME], allHeaderTypes)
+            else:
+                self.addFiles(selfOutput[HelperVariables.SOURCE_FILES_TAGNAME], outputItem[HelperVariables.R_HEADER_DIRS_TAGNAME], allHeaderTypes, ignoreRules)
+
+        if _hasTag(outputItem, HelperVariables.R_INCLUDE_DIRS_TAGNAME, parentTag=keyName, why="Without passing the include directories of your header files to the compiler, there is a good chance they may not be included."):
+            # Initialize the include_directories array in this output item as well
+            selfOutput[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME] = list(self.getDirs(outputItem[HelperVariables.R_INCLUDE_DIRS_TAGNAME], ignoreRules))
+
+            if HelperVariables.IND_INCLUDE_DIRS_TAGNAME in outputItem:
+                selfOutput[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME] += map(lambda relPathString : str(rootDirPathObject/relPathString), outputItem[HelperVariables.IND_INCLUDE_DIRS_TAGNAME])
+                # Make sure no duplicates were added
+                selfOutput[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME] = list(dict.fromkeys(selfOutput[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME]))
+
+            # Fix file paths
+            selfOutput[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME] = list(fixFilePaths(rootDirPathObject, selfOutput[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME]))
+
+        # Check for optional minimal_includes, which defaults to the project wide setting.
+        # The analysis needs the scanned file lists, so it is skipped for streamed and globbed sources.
+        if HelperVariables.MINIMAL_INCLUDES_TAGNAME in outputItem:
+            useMinimalIncludes = outputItem[HelperVariables.MINIMAL_INCLUDES_TAGNAME]
+        else:
+            useMinimalIncludes = self.minimal_includes
+        useMinimalIncludes = useMinimalIncludes and not self.streamSources and selfOutput[HelperVariables.SOURCE_GLOBS_TAGNAME] == None
+        if useMinimalIncludes:
+            self.applyMinimalIncludes(selfOutput)
+
+        # Check for optional unity_build, which defaults to the project wide setting.
+        # Batches are made from the scanned file lists, so streamed and globbed sources are built file by file.
+        selfOutput[HelperVariables.UNITY_BATCHES_TAGNAME] = None
+        selfOutput[HelperVariables.UNITY_EXCLUDED_FILES_TAGNAME] = []
+        if HelperVariables.UNITY_BUILD_TAGNAME in outputItem:
+            useUnityBuild = outputItem[HelperVariables.UNITY_BUILD_TAGNAME]
+        else:
+            useUnityBuild = self.unity_build
+        useUnityBuild = useUnityBuild and not self.streamSources and selfOutput[HelperVariables.SOURCE_GLOBS_TAGNAME] == None
+        if useUnityBuild:
+            self.setUnityBatches(outputItem, selfOutput)
+
+        # Check for optional precompile_headers, which defaults to the project wide setting.
+        # Picking headers needs the scanned file lists, so streamed and globbed sources only get the pch_include ones.
+        if HelperVariables.PRECOMPILE_HEADERS_TAGNAME in outputItem:
+            usePrecompileHeaders = outputItem[HelperVariables.PRECOMPILE_HEADERS_TAGNAME]
+        else:
+            usePrecompileHeaders = self.precompile_headers
+        usePrecompileHeaders = usePrecompileHeaders and not self.streamSources and selfOutput[HelperVariables.SOURCE_GLOBS_TAGNAME] == None
+        self.setPrecompiledHeaders(outputItem, selfOutput, usePrecompileHeaders)
+
+        # Include lines and file sizes decide the include dirs, unity batches and precompiled headers, so
+        # with any of those, edits to the output item's files (not just adding or removing them) change the result
+        selfOutput[HelperVariables.READS_FILE_CONTENTS_TAGNAME] = useMinimalIncludes or useUnityBuild or usePrecompileHeaders
+
+        if selfOutput[HelperVariables.TYPE_TAGNAME].lower() == HelperVariables.OUTPUT_TYPES["EXE"]:
+            # Only executable_output_dir is required
+            if _hasTag(outputItem, HelperVariables.EXE_OUTPUT_DIR_TAGNAME, parentTag=keyName, why="Specifies the directory into which the executable will be build. (Don't use a beginning /)"):
+                selfOutput[HelperVariables.EXE_OUTPUT_DIR_TAGNAME] = outputItem[HelperVariables.EXE_OUTPUT_DIR_TAGNAME]
+        else:
+            # Assumed to be a library, so both archive_output_dir and library_output_dir are required
+            # Check for archive_output_dir
+            if _hasTag(outputItem, HelperVariables.ARCHIVE_OUTPUT_DIR_TAGNAME, parentTag=keyName, why="Specifies the directory into which the library 'archive' files will be built. (Don't use a beginning /)"):
+                selfOutput[HelperVariables.ARCHIVE_OUTPUT_DIR_TAGNAME] = outputItem[HelperVariables.ARCHIVE_OUTPUT_DIR_TAGNAME]
 
-                    # Check for library_output_dir
-                    if _hasTag(outputItem, HelperVariables.LIB_OUTPUT_DIR_TAGNAME, parentTag=keyName, why="Specifies the directory into which the library files will be built. (Don't use a beginning /)"):
-                        selfOutput[HelperVariables.LIB_OUTPUT_DIR_TAGNAME] = outputItem[HelperVariables.LIB_OUTPUT_DIR_TAGNAME]
+            # Check for library_output_dir
+            if _hasTag(outputItem, HelperVariables.LIB_OUTPUT_DIR_TAGNAME, parentTag=keyName, why="Specifies the directory into which the library files will be built. (Don't use a beginning /)"):
+                selfOutput[HelperVariables.LIB_OUTPUT_DIR_TAGNAME] = outputItem[HelperVariables.LIB_OUTPUT_DIR_TAGNAME]
 
     # Check for imported_libs
+    @instrumentation.timed("Data.setImportedLibs")
     def setImportedLibs(self, parsedJSON, rootDirPathObject):
         self.imported_libs = {}
         if HelperVariables.IMPORTED_LIBS_TAGNAME in parsedJSON:
             importedLibItem = parsedJSON[HelperVariables.IMPORTED_LIBS_TAGNAME]
 
             for libName in importedLibItem:
-                self.imported_libs[libName] = {}
-
-                fileImportedLib = importedLibItem[libName]
-                selfImportedLib = self.imported_libs[libName]
-
-                if _hasTag(fileImportedLib, HelperVariables.ROOT_DIR_TAGNAME, parentTag=libName, why="A root directory should be defined so that library files can easily be found."):
-                    # Initialize the base path object for these files
-                    fileBasePath = Path(fileImportedLib[HelperVariables.ROOT_DIR_TAGNAME])
-
-                    if _hasTag(fileImportedLib, HelperVariables.LIB_FILES_TAGNAME, parentTag=libName, why="Imported library file names must be given, otherwise no libraries will be imported. Please add at least one lib name to import."):
-                        selfImportedLib[HelperVariables.LIB_FILES_TAGNAME] = []
-                        for libFileName in fileImportedLib[HelperVariables.LIB_FILES_TAGNAME]:
-                            selfImportedLib[HelperVariables.LIB_FILES_TAGNAME].append(str(fileBasePath/libFileName))
-                        # Fix file paths so they can be correctly prepended with '${PROJECT_SOURCE_DIR}'
-                        selfImportedLib[HelperVariables.LIB_FILES_TAGNAME] = list(fixFilePaths(rootDirPathObject, selfImportedLib[HelperVariables.LIB_FILES_TAGNAME]))
-
-                if _hasTag(fileImportedLib, HelperVariables.R_INCLUDE_DIRS_TAGNAME, parentTag=libName, why="An array of directories to recursively search for header files should be given here, so that header files needed on library import can be found. If for some reason you do not to import any header files for this project, please define this as an empty array."):
-                    selfImportedLib[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME] = list(getDirsRecursively(rootDirPathObject, fileImportedLib[HelperVariables.R_INCLUDE_DIRS_TAGNAME]))
-
-                    if HelperVariables.IND_INCLUDE_DIRS_TAGNAME in fileImportedLib:
-                        selfImportedLib[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME] += map(lambda relPathString : str(rootDirPathObject/relPathString), fileImportedLib[HelperVariables.IND_INCLUDE_DIRS_TAGNAME])
-                        # Make sure no duplicates were added
-                        selfImportedLib[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME] = list(dict.fromkeys(selfImportedLib[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME]))
-
-                    # Fix file paths
-                    selfImportedLib[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME] = list(fixFilePaths(rootDirPathObject, selfImportedLib[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME]))
-
-                if _hasTag(fileImportedLib, HelperVariables.R_HEADER_DIRS_TAGNAME, parentTag=libName, why="An array of directories to recursively search for header files should be given here, so that header files needed on library import can be found. If for some reason you do not to import any header files for this project, please define this as an empty array."):
-                    selfImportedLib[HelperVariables.HEADER_FILES_TAGNAME] = list(getFilesRecursively(rootDirPathObject, fileImportedLib[HelperVariables.R_HEADER_DIRS_TAGNAME], allHeaderTypes))
-
-    def setLinks(self, parsedJSON):
-        # Check for link_libs
-        self.link_libs = {}
-        if HelperVariables.LINK_LIBS_TAGNAME in parsedJSON:
-
-            for outputName in parsedJSON[HelperVariables.LINK_LIBS_TAGNAME]:
-                if not outputName in parsedJSON[HelperVariables.OUTPUT_TAGNAME]:
-                    raise KeyError("\"" + outputName + "\" tag in \"link_libs\" not found in \"output\". Make sure your names match.")
-                for libName in parsedJSON[HelperVariables.LINK_LIBS_TAGNAME][outputName]:
-                    if not libName in parsedJSON[HelperVariables.OUTPUT_TAGNAME] and not libName in parsedJSON[HelperVariables.IMPORTED_LIBS_TAGNAME]:
-                        raise KeyError("\"" + outputName + "\" tag in \"link_libs\" not found in \"output\" nor \"imported_libs\". Make sure your names match.")
-                    # Since adding 'include directories' to an imported library makes no sense, add them to each output item that imports them.
-                    elif libName in parsedJSON[HelperVariables.IMPORTED_LIBS_TAGNAME] and (len(parsedJSON[HelperVariables.IMPORTED_LIBS_TAGNAME][libName][HelperVariables.R_INCLUDE_DIRS_TAGNAME]) > 0 or HelperVariables.IND_INCLUDE_DIRS_TAGNAME in parsedJSON[HelperVariables.IMPORTED_LIBS_TAGNAME][libName] and len(parsedJSON[HelperVariables.IMPORTED_LIBS_TAGNAME][libName][HelperVariables.IND_INCLUDE_DIRS_TAGNAME]) > 0):
+                if self.selectedImportedLibNames == None or libName in self.selectedImportedLibNames:
+                    self.setImportedLib(libName, importedLibItem[libName], rootDirPathObject)
+
+    # Frozen imported libs (such as vendored third party trees) are never expected to change. Their scan
+    # results are kept in a snapshot shared by every project (see lib_snapshot), and they aren't watched.
+    def isFrozenImportedLib(self, fileImportedLib):
+        return HelperVariables.FROZEN_TAGNAME in fileImportedLib and fileImportedLib[HelperVariables.FROZEN_TAGNAME]
+
+    # (Re)build a single imported lib from its cmake_data.json definition
+    def setImportedLib(self, libName, fileImportedLib, rootDirPathObject):
+        self.imported_libs[libName] = {}
+        selfImportedLib = self.imported_libs[libName]
+
+        if _hasTag(fileImportedLib, HelperVariables.ROOT_DIR_TAGNAME, parentTag=libName, why="A root directory should be defined so that library files can easily be found."):
+            # Initialize the base path object for these files
+            fileBasePath = Path(fileImportedLib[HelperVariables.ROOT_DIR_TAGNAME])
+
+            if _hasTag(fileImportedLib, HelperVariables.LIB_FILES_TAGNAME, parentTag=libName, why="Imported library file names must be given, otherwise no libraries will be imported. Please add at least one lib name to import."):
+                selfImportedLib[HelperVariables.LIB_FILES_TAGNAME] = []
+                for libFileName in fileImportedLib[HelperVariables.LIB_FILES_TAGNAME]:
+                    selfImportedLib[HelperVariables.LIB_FILES_TAGNAME].append(str(fileBasePath/libFileName))
+                # Fix file paths so they can be correctly prepended with '${PROJECT_SOURCE_DIR}'
+                selfImportedLib[HelperVariables.LIB_FILES_TAGNAME] = list(fixFilePaths(rootDirPathObject, selfImportedLib[HelperVariables.LIB_FILES_TAGNAME]))
+
+        # Check for optional exclude, which adds to the project wide ignore rules
+        ignoreRules = self.getItemIgnoreRules(fileImportedLib)
+
+        # Frozen libs are read from their snapshot instead of being scanned
+        librarySnapshot = None
+        if self.isFrozenImportedLib(fileImportedLib):
+            librarySnapshot = lib_snapshot.getLibrarySnapshot(rootDirPathObject, fileImportedLib[HelperVariables.ROOT_DIR_TAGNAME], fileImportedLib[HelperVariables.R_INCLUDE_DIRS_TAGNAME], fileImportedLib[HelperVariables.R_HEADER_DIRS_TAGNAME], allHeaderTypes, self.scanIndex, ignoreRules)
+
+        if _hasTag(fileImportedLib, HelperVariables.R_INCLUDE_DIRS_TAGNAME, parentTag=libName, why="An array of directories to recursively search for header files should be given here, so that header files needed on library import can be found. If for some reason you do not to import any header files for this project, please define this as an empty array."):
+            if librarySnapshot != None:
+                selfImportedLib[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME] = librarySnapshot.getIncludeDirs()
+            else:
+                selfImportedLib[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME] = list(self.getDirs(fileImportedLib[HelperVariables.R_INCLUDE_DIRS_TAGNAME], ignoreRules))
+
+            if HelperVariables.IND_INCLUDE_DIRS_TAGNAME in fileImportedLib:
+                selfImportedLib[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME] += map(lambda relPathString : str(rootDirPathObject/relPathString), fileImportedLib[HelperVariables.IND_INCLUDE_DIRS_TAGNAME])
+                # Make sure no duplicates were added
+                selfImportedLib[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME] = list(dict.fromkeys(selfImportedLib[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME]))
+
+            # Fix file paths
+            selfImportedLib[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME] = list(fixFilePaths(rootDirPathObject, selfImportedLib[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME]))
+
+        if _hasTag(fileImportedLib, HelperVariables.R_HEADER_DIRS_TAGNAME, parentTag=libName, why="An array of directories to recursively search for header files should be given here, so that header files needed on library import can be found. If for some reason you do not to import any header files for this project, please define this as an empty array."):
+            if librarySnapshot != None:
+                selfImportedLib[HelperVariables.HEADER_FILES_TAGNAME] = librarySnapshot.getHeaderFiles()
+            else:
+                selfImportedLib[HelperVariables.HEADER_FILES_TAGNAME] = self.newFileList()
+                self.addFiles(selfImportedLib[HelperVariables.HEADER_FILES_TAGNAME], fileImportedLib[HelperVariables.R_HEADER_DIRS_TAGNAME], allHeaderTypes, ignoreRules)
+
+    # True if the output item or imported lib definition has any include directories
+    def hasIncludeDirs(self, jsonItem):
+        return len(jsonItem[HelperVariables.R_INCLUDE_DIRS_TAGNAME]) > 0 or HelperVariables.IND_INCLUDE_DIRS_TAGNAME in jsonItem and len(jsonItem[HelperVariables.IND_INCLUDE_DIRS_TAGNAME]) > 0
+
+    # Output items are ordered so each library is generated before the output items which link to it, and
+    # every output item gets the include dirs and header files of all the libraries it reaches through
+    # link_libs, not only the ones it links directly.
+    # Optional outputNames limits which output items get the include dirs and header files of their
+    # linked libraries appended. (Used when only some output items were rebuilt)
+    @instrumentation.timed("Data.setLinks")
+    def setLinks(self, parsedJSON, outputNames=None):
+        # The include dirs variable of an output library is set where the library is written, so it has to come first
+        self.output = { outputName: self.output[outputName] for outputName in self.linkGraph.outputOrder if outputName in self.output }
+
+        for outputName in self.output:
+            if outputNames != None and not outputName in outputNames:
+                continue
+            isExe = self.output[outputName][HelperVariables.TYPE_TAGNAME] == HelperVariables.OUTPUT_TYPES["EXE"]
+
+            for libName in self.linkGraph.getReachable(outputName):
+                # Since adding 'include directories' to an imported library makes no sense, add them to each output item that imports them.
+                if self.linkGraph.isImportedLib(libName):
+                    if self.hasIncludeDirs(parsedJSON[HelperVariables.IMPORTED_LIBS_TAGNAME][libName]):
                         self.output[outputName][HelperVariables.INCLUDE_DIRECTORIES_TAGNAME].append( HelperFunctions.inBraces(libName + HelperVariables.INCLUDE_DIRS_SUFFIX) )
                         self.output[outputName][HelperVariables.SOURCE_FILES_TAGNAME].append( HelperFunctions.inBraces(libName + HelperVariables.HEADER_FILES_SUFFIX) )
-                    elif len(parsedJSON[HelperVariables.OUTPUT_TAGNAME][libName][HelperVariables.R_INCLUDE_DIRS_TAGNAME]) > 0 or HelperVariables.IND_INCLUDE_DIRS_TAGNAME in parsedJSON[HelperVariables.OUTPUT_TAGNAME][libName] and len(parsedJSON[HelperVariables.OUTPUT_TAGNAME][libName][HelperVariables.IND_INCLUDE_DIRS_TAGNAME]) > 0:
-                        if parsedJSON[HelperVariables.OUTPUT_TAGNAME][outputName][HelperVariables.TYPE_TAGNAME] == HelperVariables.OUTPUT_TYPES["EXE"]:
-                            self.output[outputName][HelperVariables.INCLUDE_DIRECTORIES_TAGNAME].append( HelperFunctions.inBraces(libName + HelperVariables.INCLUDE_DIRS_SUFFIX) )
-                            self.output[outputName][HelperVariables.SOURCE_FILES_TAGNAME].append( HelperFunctions.inBraces(libName + HelperVariables.HEADER_FILES_SUFFIX) )
-
-            self.link_libs = parsedJSON[HelperVariables.LINK_LIBS_TAGNAME]
\ No newline at end of file
+                elif self.hasIncludeDirs(parsedJSON[HelperVariables.OUTPUT_TAGNAME][libName]):
+                    libVarName = HelperFunctions.getOutputCmakeName(libName)
+                    self.output[outputName][HelperVariables.INCLUDE_DIRECTORIES_TAGNAME].append( HelperFunctions.inBraces(libVarName + HelperVariables.INCLUDE_DIRS_SUFFIX) )
+                    if isExe:
+                        self.output[outputName][HelperVariables.SOURCE_FILES_TAGNAME].append( HelperFunctions.inBraces(libVarName + HelperVariables.HEADER_FILES_SUFFIX) )
+
+        # Links of output items which aren't generated (see onlyOutputs) are left out
+        self.link_libs = { outputName: self.linkGraph.getLinks(outputName) for outputName in self.output if outputName in self.linkGraph.links }
+
+    # Check for optional share_object_files, which defaults to false. Output items can override it with their own tag.
+    @instrumentation.timed("Data.setShareObjectFiles")
+    def setShareObjectFiles(self, parsedJSON):
+        if HelperVariables.SHARE_OBJECT_FILES_TAGNAME in parsedJSON:
+            self.share_object_files = parsedJSON[HelperVariables.SHARE_OBJECT_FILES_TAGNAME]
+        else:
+            self.share_object_files = False
+
+    # Output items using unity builds or precompiled headers compile their sources differently from
+    # other output items, and streamed or globbed file lists aren't known here, so those never share.
+    def sharesObjectFiles(self, outputName, selfOutput):
+        outputItem = self.parsedJSON[HelperVariables.OUTPUT_TAGNAME][outputName]
+        if HelperVariables.SHARE_OBJECT_FILES_TAGNAME in outputItem:
+            shareObjectFiles = outputItem[HelperVariables.SHARE_OBJECT_FILES_TAGNAME]
+        else:
+            shareObjectFiles = self.share_object_files
+        return shareObjectFiles and not self.streamSources and selfOutput[HelperVariables.SOURCE_GLOBS_TAGNAME] == None and selfOutput[HelperVariables.UNITY_BATCHES_TAGNAME] == None and len(selfOutput[HelperVariables.PRECOMPILED_HEADERS_TAGNAME]) == 0
+
+    # Source files compiled by several output items with the same include directories (and so the same
+    # compile command) are moved into OBJECT libraries, which those output items use instead, so each
+    # file is only compiled once. Files are grouped by the exact set of output items compiling them.
+    # Must run after setLinks, since linked libraries add to the include directories.
+    @instrumentation.timed("Data.setObjectLibs")
+    def setObjectLibs(self):
+        self.object_libs = {}
+        outputNamesByIncludeDirs = {}
+        for outputName, selfOutput in self.output.items():
+            selfOutput[HelperVariables.OBJECT_LIBS_TAGNAME] = []
+            if self.sharesObjectFiles(outputName, selfOutput):
+                includeDirs = tuple(selfOutput[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME])
+                if not includeDirs in outputNamesByIncludeDirs:
+                    outputNamesByIncludeDirs[includeDirs] = []
+                outputNamesByIncludeDirs[includeDirs].append(outputName)
+
+        # Object library names (and the <NAME>_SOURCES variables written for them) must not clash with
+        # output items, imported libs or each other. CMake variable names are upper cased, so compare lower case names.
+        takenNames = set(name.lower() for name in list(self.output) + list(self.imported_libs))
+
+        for includeDirs, outputNames in outputNamesByIncludeDirs.items():
+            if len(outputNames) < 2:
+                continue
+
+            ownerNamesBySourceFile = {}
+            for outputName in outputNames:
+                for sourceFile in self.output[outputName][HelperVariables.SOURCE_FILES_TAGNAME]:
+                    if sourceFile[0] != '$' and file_scan.getFileExtension(os.path.basename(sourceFile)) in allSourceTypes:
+                        if not sourceFile in ownerNamesBySourceFile:
+                            ownerNamesBySourceFile[sourceFile] = []
+                        ownerNamesBySourceFile[sourceFile].append(outputName)
+
+            sourceFilesByOwnerNames = {}
+            for sourceFile, ownerNames in ownerNamesBySourceFile.items():
+                if len(ownerNames) > 1:
+                    if not tuple(ownerNames) in sourceFilesByOwnerNames:
+                        sourceFilesByOwnerNames[tuple(ownerNames)] = []
+                    sourceFilesByOwnerNames[tuple(ownerNames)].append(sourceFile)
+
+            for ownerNames, sourceFiles in sourceFilesByOwnerNames.items():
+                firstOwner = self.output[ownerNames[0]]
+                nameIndex = len(firstOwner[HelperVariables.OBJECT_LIBS_TAGNAME])
+                while HelperFunctions.getObjectLibName(ownerNames[0], nameIndex) in takenNames:
+                    nameIndex += 1
+                objectLibName = HelperFunctions.getObjectLibName(ownerNames[0], nameIndex)
+                takenNames.add(objectLibName)
+                self.object_libs[objectLibName] = {
+                    HelperVariables.SOURCE_FILES_TAGNAME: sorted(sourceFiles),
+                    HelperVariables.INCLUDE_DIRECTORIES_TAGNAME: list(includeDirs),
+                    HelperVariables.COMPRESS_SOURCE_LISTS_TAGNAME: firstOwner[HelperVariables.COMPRESS_SOURCE_LISTS_TAGNAME],
+                    HelperVariables.OBJECT_LIB_OWNERS_TAGNAME: list(ownerNames)
+                }
+                for ownerName in ownerNames:
+                    self.output[ownerName][HelperVariables.OBJECT_LIBS_TAGNAME].append(objectLibName)
+
+    # The files the output item compiles itself, followed by the objects of the OBJECT libraries it uses
+    def getCompiledSourceFiles(self, outputName):
+        selfOutput = self.output[outputName]
+        if len(selfOutput[HelperVariables.OBJECT_LIBS_TAGNAME]) == 0:
+            return selfOutput[HelperVariables.SOURCE_FILES_TAGNAME]
+
+        objectLibFiles = set()
+        for objectLibName in selfOutput[HelperVariables.OBJECT_LIBS_TAGNAME]:
+            objectLibFiles.update(self.object_libs[objectLibName][HelperVariables.SOURCE_FILES_TAGNAME])
+        return [sourceFile for sourceFile in selfOutput[HelperVariables.SOURCE_FILES_TAGNAME] if not sourceFile in objectLibFiles] + list(map(HelperFunctions.getTargetObjects, selfOutput[HelperVariables.OBJECT_LIBS_TAGNAME]))
+
+    # Normalized root directories scanned for the given output item or imported lib definition
+    def getItemScanRoots(self, jsonItem, isOutputItem):
+        scanRoots = []
+        scannedTagNames = [HelperVariables.R_SOURCE_DIRS_TAGNAME, HelperVariables.R_HEADER_DIRS_TAGNAME, HelperVariables.R_INCLUDE_DIRS_TAGNAME]
+        if isOutputItem and self.usesGlobSources(jsonItem):
+            scannedTagNames = [HelperVariables.R_INCLUDE_DIRS_TAGNAME]
+        elif not isOutputItem and self.isFrozenImportedLib(jsonItem):
+            scannedTagNames = []
+        for tagName in scannedTagNames:
+            if tagName in jsonItem:
+                scanRoots += map(file_scan.normalizeRelPath, jsonItem[tagName])
+        return scanRoots
+
+    # Every root directory scanned by any (selected) output item or imported lib in cmake_data.json
+    def getJSONScanRoots(self, parsedJSON):
+        scanRoots = []
+        for itemsTagName, selectedNames in [(HelperVariables.OUTPUT_TAGNAME, self.selectedOutputNames), (HelperVariables.IMPORTED_LIBS_TAGNAME, self.selectedImportedLibNames)]:
+            if itemsTagName in parsedJSON and isinstance(parsedJSON[itemsTagName], dict):
+                for itemName, jsonItem in parsedJSON[itemsTagName].items():
+                    if isinstance(jsonItem, dict) and (selectedNames == None or itemName in selectedNames):
+                        scanRoots += self.getItemScanRoots(jsonItem, itemsTagName == HelperVariables.OUTPUT_TAGNAME)
+        return list(dict.fromkeys(scanRoots))
+
+    def getScanRoots(self):
+        scanRoots = []
+        for outputName in self.output:
+            scanRoots += self.getItemScanRoots(self.parsedJSON[HelperVariables.OUTPUT_TAGNAME][outputName], True)
+        for libName in self.imported_libs:
+            scanRoots += self.getItemScanRoots(self.parsedJSON[HelperVariables.IMPORTED_LIBS_TAGNAME][libName], False)
+        return list(dict.fromkeys(scanRoots))
+
+    # Absolute paths of the source and header files whose contents (and not just whether they exist) change
+    # what is generated: the ones under the scanned directories of output items which read file contents
+    def getContentDependentPaths(self):
+        relPaths = []
+        for outputName, selfOutput in self.output.items():
+            if selfOutput[HelperVariables.READS_FILE_CONTENTS_TAGNAME]:
+                jsonItem = self.parsedJSON[HelperVariables.OUTPUT_TAGNAME][outputName]
+                relPaths += getFilesRecursively(self.rootDirPathObject, self.getItemScanRoots(jsonItem, True), allFileTypes, self.scanIndex, self.getItemIgnoreRules(jsonItem))
+        return [os.path.normpath(os.path.abspath(os.path.join(str(self.rootDirPathObject), relPath))) for relPath in dict.fromkeys(relPaths)]
+
+    # Update the model after files or directories were added or removed.
+    # 'changedRelPaths' are paths (relative to the project root) of entries which were added,
+    # removed or whose contents changed. Only the output items and imported libs whose scan roots
+    # contain (or are contained in) a changed path are rebuilt. Changes to paths their ignore rules
+    # skip (such as an in-tree build directory) are left out.
+    # Returns True if anything was rebuilt.
+    def applyChanges(self, changedRelPaths):
+        changedRelPaths = list(map(file_scan.normalizeRelPath, changedRelPaths))
+
+        def isAffected(jsonItem, isOutputItem):
+            ignoreRules = self.getItemIgnoreRules(jsonItem)
+            for scanRoot in self.getItemScanRoots(jsonItem, isOutputItem):
+                for changedRelPath in changedRelPaths:
+                    if file_scan.isSameOrUnder(changedRelPath, scanRoot) and file_scan.isReachedFrom(changedRelPath, scanRoot, ignoreRules):
+                        return True
+                    if file_scan.isSameOrUnder(scanRoot, changedRelPath):
+                        return True
+            return False
+
+        affectedOutputNames = [name for name in self.output if isAffected(self.parsedJSON[HelperVariables.OUTPUT_TAGNAME][name], True)]
+        affectedLibNames = [name for name in self.imported_libs if isAffected(self.parsedJSON[HelperVariables.IMPORTED_LIBS_TAGNAME][name], False)]
+
+        if len(affectedOutputNames) == 0 and len(affectedLibNames) == 0:
+            return False
+
+        self.scanIndex.invalidate(changedRelPaths)
+
+        for outputName in affectedOutputNames:
+            self.setOutputItem(outputName, self.parsedJSON[HelperVariables.OUTPUT_TAGNAME][outputName], self.rootDirPathObject)
+        for libName in affectedLibNames:
+            self.setImportedLib(libName, self.parsedJSON[HelperVariables.IMPORTED_LIBS_TAGNAME][libName], self.rootDirPathObject)
+        self.setLinks(self.parsedJSON, affectedOutputNames)
+        self.setObjectLibs()
+        self.setUnityGroups()
+
+        if self.useScanCache:
+            self.scanIndex.saveCache(file_scan.getScanCachePath(self.rootDirPathObject))
+            if self.includeScanner != None:
+                self.includeScanner.saveCache(include_scan.getIncludeCachePath(self.rootDirPathObject))
+        return True
@@ -0,0 +1,580 @@
+import heapq
+import json
+import os
+import stat
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import PurePath
+
+import ignore_rules
+import instrumentation
+
+# Bump this whenever the layout of the cache file changes, so old caches are ignored
+SCAN_CACHE_VERSION = 2
+SCAN_CACHE_DIR_NAME = ".json_to_cmake"
+SCAN_CACHE_FILE_NAME = "scan_cache.json"
+
+# A directory modified this close to when it was listed could have been modified again
+# within the same mtime tick, so its cached listing is never trusted. (Same idea as git's "racy clean" check)
+RACY_MTIME_WINDOW_NS = 2 * 1000 * 1000 * 1000
+
+# The entries of a single directory, as read by one os.scandir call.
+# Files are bucketed by extension when the directory is first listed.
+# linkedSubdirNames are the subdirectories which are symlinks (they are in subdirNames too).
+class DirListing():
+    def __init__(self, mtimeNs=0, listedAtNs=0):
+        self.mtimeNs = mtimeNs
+        self.listedAtNs = listedAtNs
+        self.subdirNames = []
+        self.linkedSubdirNames = []
+        self.filesByExtension = {}
+        # (st_dev, st_ino) of the directory, set from the stat call made every time the listing is used.
+        # Not cached, since it is only valid for the current run.
+        self.dirId = None
+
+    def isTrustedFor(self, mtimeNs):
+        return self.mtimeNs == mtimeNs and self.listedAtNs - self.mtimeNs > RACY_MTIME_WINDOW_NS
+
+    # Symlinked subdirectories are only entered when following symlinks
+    def isFollowed(self, subdirName, followSymlinks):
+        return followSymlinks or not subdirName in self.linkedSubdirNames
+
+    def toCacheEntry(self):
+        return [self.mtimeNs, self.listedAtNs, self.subdirNames, self.filesByExtension, self.linkedSubdirNames]
+
+    @staticmethod
+    def fromCacheEntry(entry):
+        listing = DirListing(entry[0], entry[1])
+        listing.subdirNames = entry[2]
+        listing.filesByExtension = entry[3]
+        listing.linkedSubdirNames = entry[4]
+        return listing
+
+    def addFile(self, extension, fileName):
+        if not extension in self.filesByExtension:
+            self.filesByExtension[extension] = []
+        self.filesByExtension[extension].append(fileName)
+
+# Results of walking a single root directory once. Every matched file is sorted
+# into a bucket by its extension, so source and header lookups for the same root
+# never need to walk the tree again.
+class RootScan():
+    def __init__(self):
+        self.filesByExtension = {}
+        self.dirs = []
+        # Directory path (with a trailing '/') -> dirId of the directory
+        self.dirIds = {}
+        # Paths of the directories only reached through a symlink below the root
+        self.linkedDirs = set()
+
+    def addDir(self, relDirPath, dirId, isLinked=False):
+        self.dirs.append(relDirPath)
+        self.dirIds[relDirPath] = dirId
+        if isLinked:
+            self.linkedDirs.add(relDirPath)
+
+    # Sort key of the files found, which puts files reached through symlinks after the others (see getEntrySortKey)
+    def getFileSortKey(self, relPath):
+        return (getDirPathOf(relPath) in self.linkedDirs, relPath)
+
+    def addFile(self, extension, relPathString):
+        if not extension in self.filesByExtension:
+            self.filesByExtension[extension] = []
+        self.filesByExtension[extension].append(relPathString)
+
+    def getFiles(self, fileExtensionTypes):
+        fileList = []
+        for extension in fileExtensionTypes:
+            if extension in self.filesByExtension:
+                fileList += self.filesByExtension[extension]
+        return fileList
+
+# Returns the extension of a file name, or None if it has none.
+# Hidden files (".name") are treated like glob treats them, and never match.
+def getFileExtension(fileName):
+    if fileName[0] == '.':
+        return None
+    dotIndex = fileName.rfind('.')
+    if dotIndex < 0:
+        return None
+    return fileName[dotIndex + 1:]
+
+# Turns the relative directory string given in cmake_data.json into the prefix used
+# for every path found under it. "./src/" and "src" both become "src".
+def normalizeRelPath(pathString):
+    return PurePath(pathString).as_posix()
+
+# True if relPath is parentRelPath itself, or somewhere inside it. (Both must be normalized)
+def isSameOrUnder(relPath, parentRelPath):
+    return parentRelPath == "." or relPath == parentRelPath or relPath.startswith(parentRelPath + "/")
+
+def getParentRelPath(relPath):
+    return PurePath(relPath).parent.as_posix()
+
+def joinRelPath(relDir, name):
+    if relDir == ".":
+        return name
+    return relDir + "/" + name
+
+# Path of the directory a file path is in, with a trailing '/', in the form walks give directory paths
+def getDirPathOf(relPath):
+    slashIndex = relPath.rfind('/')
+    return relPath[:slashIndex + 1] if slashIndex >= 0 else "./"
+
+# Identifies a directory no matter which path (through symlinks) it was reached by
+def getDirId(dirStat):
+    return (dirStat.st_dev, dirStat.st_ino)
+
+def getScanCachePath(basePath):
+    return os.path.join(str(basePath), SCAN_CACHE_DIR_NAME, SCAN_CACHE_FILE_NAME)
+
+# Read a single directory whose mtime is already known. Returns None if the directory can't be listed.
+def listDir(dirPathString, mtimeNs):
+    listedAtNs = time.time_ns()
+    try:
+        with os.scandir(dirPathString) as entries:
+            entryList = list(entries)
+    except OSError:
+        return None
+
+    instrumentation.count(instrumentation.DIRS_VISITED)
+    listing = DirListing(mtimeNs, listedAtNs)
+    for entry in entryList:
+        if entry.name[0] == '.':
+            continue
+        if entry.is_dir():
+            listing.subdirNames.append(entry.name)
+            if entry.is_symlink():
+                listing.linkedSubdirNames.append(entry.name)
+        else:
+            extension = getFileExtension(entry.name)
+            if extension != None:
+                listing.addFile(extension, entry.name)
+    return listing
+
+# True if a walk of parentRelRoot reaches relPath, meaning no directory between them is ignored
+def isReachedFrom(relPath, parentRelRoot, ignoreRules):
+    while relPath != parentRelRoot:
+        if ignoreRules.isIgnored(relPath, True):
+            return False
+        relPath = getParentRelPath(relPath)
+    return True
+
+# True if any directory between parentRelRoot and relPath (including relPath itself) is a symlink
+def _hasLinkBetween(basePath, relPath, parentRelRoot):
+    while relPath != parentRelRoot:
+        if os.path.islink(os.path.join(str(basePath), relPath)):
+            return True
+        relPath = getParentRelPath(relPath)
+    return False
+
+# Only keeps the outermost of any roots nested inside each other, since walking those already covers the rest.
+# Roots inside a directory the outer root's walk skips because of ignoreRules are kept, as are roots
+# reached through a symlink, since the outer walk may skip (or collapse) the directories behind it.
+def collapseNestedRoots(basePath, relRoots, ignoreRules=ignore_rules.NO_RULES):
+    collapsedRoots = []
+    for relRoot in sorted(set(relRoots)):
+        if not any(isSameOrUnder(relRoot, collapsedRoot) and isReachedFrom(relRoot, collapsedRoot, ignoreRules) and not _hasLinkBetween(basePath, relRoot, collapsedRoot) for collapsedRoot in collapsedRoots):
+            collapsedRoots.append(relRoot)
+    return collapsedRoots
+
+def _listDirIfExists(dirPathString):
+    try:
+        dirStat = os.stat(dirPathString)
+    except OSError:
+        return None
+    if not stat.S_ISDIR(dirStat.st_mode):
+        return None
+    listing = listDir(dirPathString, dirStat.st_mtime_ns)
+    if listing != None:
+        listing.dirId = getDirId(dirStat)
+    return listing
+
+# Sort key of walk entries. Entries reached through a symlink below their root come after all the others,
+# so a directory reached both through its real path and through symlinks is kept at its real path.
+# The "." root's directory path is "./", but it comes before everything in it.
+def getEntrySortKey(entry):
+    return (entry[3], "" if entry[0] == "./" else entry[0])
+
+# Keeps every directory reached through several paths (symlinks into the same directory, or roots
+# overlapping through symlinks) only at the first of its paths, along with the files under that path.
+# sortedEntries are (relPath, isDir, dirId, isLinked) tuples sorted by getEntrySortKey, where dirId is the
+# directory's own for directories and the one of the directory holding them for files, and isLinked tells
+# whether the entry was reached through a symlink below its root. Yields (relPath, isDir).
+# Entries listed more than once under the same path (by nested roots) are yielded once.
+def collapseAliases(sortedEntries):
+    dirPathsById = {}
+    lastRelPath = None
+    for relPath, isDir, dirId, isLinked in sortedEntries:
+        if relPath == lastRelPath:
+            continue
+        lastRelPath = relPath
+
+        if isDir:
+            if not dirId in dirPathsById:
+                dirPathsById[dirId] = (relPath, isLinked)
+                yield relPath, isDir
+            elif dirPathsById[dirId][0] != relPath:
+                instrumentation.count(instrumentation.DIRS_ALIASED)
+        elif dirPathsById.get(dirId) == (getDirPathOf(relPath), isLinked):
+            yield relPath, isDir
+
+# Depth first walk of relRoot which yields ("relative/path", isDir, dirId, isLinked) for every directory
+# (with a trailing '/') and every file with one of the given extensions (see collapseAliases). Sorting each
+# directory's entries with subdirectory names followed by '/' makes the walk order match sorting the full paths.
+# Symlinked directories are only entered when followSymlinks is true, and only after everything reached
+# without going through one, so the walk order matches getEntrySortKey. Only the entries of the directories
+# on the current path (and the dirIds of the directories visited) are held in memory.
+# Directories ignored by ignoreRules are skipped without being read, and a directory already visited through
+# another path (including a symlink back up the tree) is skipped, so every directory on disk is walked at most once.
+def _walkSorted(basePath, relRoot, fileExtensionTypes, ignoreRules=ignore_rules.NO_RULES, followSymlinks=True):
+    rootListing = _listDirIfExists(os.path.join(str(basePath), relRoot))
+    if rootListing == None:
+        return
+
+    # Symlinked subdirectories found while walking the real tree, walked once it is done
+    linkedDirs = []
+
+    def getSortedEntries(relDir, listing, isLinked):
+        entries = []
+        for subdirName in listing.subdirNames:
+            if listing.isFollowed(subdirName, followSymlinks) and not ignoreRules.isIgnored(joinRelPath(relDir, subdirName), True):
+                if isLinked or not subdirName in listing.linkedSubdirNames:
+                    entries.append((joinRelPath(relDir, subdirName) + "/", True, None, isLinked))
+                else:
+                    linkedDirs.append(joinRelPath(relDir, subdirName) + "/")
+        for extension in listing.filesByExtension:
+            if extension in fileExtensionTypes:
+                entries += [(joinRelPath(relDir, fileName), False, listing.dirId, isLinked) for fileName in listing.filesByExtension[extension] if not ignoreRules.isIgnored(joinRelPath(relDir, fileName), False)]
+        entries.sort()
+        return iter(entries)
+
+    visitedDirIds = set([rootListing.dirId])
+    yield (relRoot + "/", True, rootListing.dirId, False)
+    openDirs = [getSortedEntries(relRoot, rootListing, False)]
+    while len(openDirs) > 0 or len(linkedDirs) > 0:
+        if len(openDirs) == 0:
+            # Every linked directory found is outside of the ones before it, so sorting them keeps the walk sorted
+            linkedDirs.sort()
+            openDirs.append(iter([(relDirPath, True, None, True) for relDirPath in linkedDirs]))
+            linkedDirs.clear()
+
+        entry = next(openDirs[-1], None)
+        if entry == None:
+            openDirs.pop()
+            continue
+
+        relPath, isDir, dirId, isLinked = entry
+        if not isDir:
+            yield entry
+            continue
+
+        listing = _listDirIfExists(os.path.join(str(basePath), relPath))
+        if listing == None:
+            continue
+        if listing.dirId in visitedDirIds:
+            instrumentation.count(instrumentation.DIRS_ALIASED)
+            continue
+        visitedDirIds.add(listing.dirId)
+        yield (relPath, True, listing.dirId, isLinked)
+        openDirs.append(getSortedEntries(relPath[:-1], listing, isLinked))
+
+# Streaming versions of DirectoryIndex.getFiles and getDirs. They yield the same sorted, duplicate free paths,
+# but nothing is cached, so memory use depends on the depth of the tree instead of the number of files in it.
+def iterFiles(basePath, otherPathStrings, fileExtensionTypes, ignoreRules=ignore_rules.NO_RULES, followSymlinks=True):
+    relRoots = collapseNestedRoots(basePath, map(normalizeRelPath, otherPathStrings), ignoreRules)
+    rootWalks = [_walkSorted(basePath, relRoot, fileExtensionTypes, ignoreRules, followSymlinks) for relRoot in relRoots]
+    for relPath, isDir in collapseAliases(heapq.merge(*rootWalks, key=getEntrySortKey)):
+        if not isDir:
+            instrumentation.count(instrumentation.FILES_MATCHED)
+            yield relPath
+
+def iterDirs(basePath, otherPathStrings, ignoreRules=ignore_rules.NO_RULES, followSymlinks=True):
+    relRoots = collapseNestedRoots(basePath, map(normalizeRelPath, otherPathStrings), ignoreRules)
+    rootWalks = [_walkSorted(basePath, relRoot, (), ignoreRules, followSymlinks) for relRoot in relRoots]
+    return (relPath for relPath, isDir in collapseAliases(heapq.merge(*rootWalks, key=getEntrySortKey)) if isDir)
+
+# A file list which is only scanned while it is iterated. It holds single entries (such as base_file or
+# CMake variables) and the roots to scan, in the order they were added. Iterating it streams the scanned
+# files straight from the directory walk, so an output's files never all have to be in memory at once.
+class StreamedFileList():
+    def __init__(self, basePath, followSymlinks=True):
+        self.basePath = basePath
+        self.followSymlinks = followSymlinks
+        self.parts = []
+
+    def append(self, entry):
+        self.parts.append(entry)
+
+    def addRoots(self, otherPathStrings, fileExtensionTypes, ignoreRules=ignore_rules.NO_RULES):
+        self.parts.append((list(otherPathStrings), fileExtensionTypes, ignoreRules))
+
+    def __iter__(self):
+        for part in self.parts:
+            if isinstance(part, str):
+                yield part
+            else:
+                yield from iterFiles(self.basePath, part[0], part[1], part[2], self.followSymlinks)
+
+# In-process index of every directory read while generating a project.
+# Each directory is listed at most once and each root is walked at most once, so
+# outputs, imported libs and include dir queries which share roots (or whose roots
+# are nested inside each other) all read from the same listings.
+#
+# Listings can also be loaded from (and saved to) an on-disk cache. A cached listing
+# is reused as long as its directory's mtime hasn't changed, which turns rescanning a
+# mostly unchanged tree into one stat call per directory.
+#
+# Optional sharedListings is a dict of cached listings shared between several indexes (of
+# different projects), so trees which overlap between projects are only read once.
+#
+# followSymlinks: Whether walks enter symlinked directories. Either way, every directory is walked at
+# most once per root, however many paths lead to it, so symlink loops end and aliased paths are collapsed.
+class DirectoryIndex():
+    def __init__(self, basePath, sharedListings=None, followSymlinks=True):
+        self.basePath = basePath
+        self.followSymlinks = followSymlinks
+        self.listings = {}
+        self.rootScans = {}
+        # Keyed by absolute directory path, so a cache stays valid no matter which
+        # directory the tool is run from
+        self.cachedListings = sharedListings if sharedListings != None else {}
+        # Only the listings loaded from this project's cache file are written back to it
+        self.fileListings = {}
+        self.cacheChanged = False
+
+    @instrumentation.timed("file_scan.loadCache")
+    def loadCache(self, cacheFilePath):
+        try:
+            with open(cacheFilePath) as cacheFile:
+                cacheData = json.load(cacheFile)
+        except (OSError, ValueError):
+            return
+
+        if isinstance(cacheData, dict) and cacheData.get("version") == SCAN_CACHE_VERSION:
+            for dirPathString, entry in cacheData["dirs"].items():
+                listing = DirListing.fromCacheEntry(entry)
+                self.fileListings[dirPathString] = listing
+                if not dirPathString in self.cachedListings or self.cachedListings[dirPathString].listedAtNs < listing.listedAtNs:
+                    self.cachedListings[dirPathString] = listing
+
+    # Write every listing known to this index back to the cache file. Entries for directories
+    # which no longer appear in their (cached) parent are dropped. Failing to write
+    # the cache is never an error, it just means the next run will rescan.
+    @instrumentation.timed("file_scan.saveCache")
+    def saveCache(self, cacheFilePath):
+        if not self.cacheChanged:
+            return
+
+        allListings = dict(self.fileListings)
+        for relDir, listing in self.listings.items():
+            if listing != None:
+                allListings[self._absDirPath(relDir)] = listing
+
+        keptEntries = {}
+        droppedDirs = set()
+        # Parents always sort before their children
+        for dirPathString in sorted(allListings):
+            parentPathString, dirName = os.path.split(dirPathString)
+            if parentPathString in droppedDirs or (parentPathString in allListings and not dirName in allListings[parentPathString].subdirNames):
+                droppedDirs.add(dirPathString)
+            else:
+                keptEntries[dirPathString] = allListings[dirPathString].toCacheEntry()
+
+        try:
+            os.makedirs(os.path.dirname(cacheFilePath), exist_ok=True)
+            with open(cacheFilePath, mode='w') as cacheFile:
+                json.dump({ "version": SCAN_CACHE_VERSION, "dirs": keptEntries }, cacheFile, separators=(',', ':'))
+        except OSError:
+            pass
+
+    def _absDirPath(self, relDir):
+        return os.path.normpath(os.path.abspath(os.path.join(str(self.basePath), relDir)))
+
+    # Missing roots (or roots which are actually files) produce no results, same as glob
+    def _readListing(self, relDir):
+        dirPathString = self._absDirPath(relDir)
+        try:
+            dirStat = os.stat(dirPathString)
+        except OSError:
+            return None
+        if not stat.S_ISDIR(dirStat.st_mode):
+            return None
+
+        if dirPathString in self.cachedListings and self.cachedListings[dirPathString].isTrustedFor(dirStat.st_mtime_ns):
+            listing = self.cachedListings[dirPathString]
+            listing.dirId = getDirId(dirStat)
+            instrumentation.count(instrumentation.CACHE_HITS)
+            # Listings shared by another project still need to be added to this project's cache file
+            if self.fileListings.get(dirPathString) is not listing:
+                self.cacheChanged = True
+            return listing
+
+        self.cacheChanged = True
+        listing = listDir(dirPathString, dirStat.st_mtime_ns)
+        if listing != None:
+            listing.dirId = getDirId(dirStat)
+            self.cachedListings[dirPathString] = listing
+        return listing
+
+    def getListing(self, relDir):
+        if not relDir in self.listings:
+            self.listings[relDir] = self._readListing(relDir)
+        return self.listings[relDir]
+
+    def _prefetchListing(self, relDir):
+        return relDir, self._readListing(relDir)
+
+    # Read every directory under the given roots using a pool of 'jobs' worker threads, so
+    # independent roots and subtrees (often on slow or network backed disks) are read in parallel.
+    # Listings are only stored here. The walks which use them still run in order afterwards,
+    # so results never depend on which thread finished first. Directories ignored by ignoreRules aren't read,
+    # and the subdirectories of a directory already read through another path aren't queued.
+    @instrumentation.timed("file_scan.prefetch")
+    def prefetch(self, otherPathStrings, jobs, ignoreRules=ignore_rules.NO_RULES):
+        if jobs <= 1:
+            return
+
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            queuedDirs = set()
+            pendingReads = set()
+            expandedDirIds = set()
+
+            def queueDir(relDir):
+                if not relDir in self.listings and not relDir in queuedDirs:
+                    queuedDirs.add(relDir)
+                    pendingReads.add(executor.submit(self._prefetchListing, relDir))
+
+            for pathString in otherPathStrings:
+                queueDir(normalizeRelPath(pathString))
+
+            while len(pendingReads) > 0:
+                finishedReads, pendingReads = wait(pendingReads, return_when=FIRST_COMPLETED)
+                for finishedRead in finishedReads:
+                    relDir, listing = finishedRead.result()
+                    self.listings[relDir] = listing
+                    if listing != None and not listing.dirId in expandedDirIds:
+                        expandedDirIds.add(listing.dirId)
+                        for subdirName in listing.subdirNames:
+                            if listing.isFollowed(subdirName, self.followSymlinks) and not ignoreRules.isIgnored(joinRelPath(relDir, subdirName), True):
+                                queueDir(joinRelPath(relDir, subdirName))
+
+    # Forget what is known about the given (normalized) relative paths: their parent directory is
+    # listed again, as is the path itself. Listings for directories inside those paths are kept
+    # only as cached listings, so reading them again costs just a stat call if they didn't change.
+    def invalidate(self, changedRelPaths):
+        relistedDirs = set()
+        for changedRelPath in changedRelPaths:
+            relistedDirs.add(changedRelPath)
+            relistedDirs.add(getParentRelPath(changedRelPath))
+
+        for relDir in list(self.listings):
+            listing = self.listings[relDir]
+            if relDir in relistedDirs:
+                del self.listings[relDir]
+                self.cachedListings.pop(self._absDirPath(relDir), None)
+            elif any(isSameOrUnder(relDir, changedRelPath) for changedRelPath in changedRelPaths):
+                del self.listings[relDir]
+                if listing != None:
+                    self.cachedListings[self._absDirPath(relDir)] = listing
+
+        for rootScanKey in list(self.rootScans):
+            relRoot = rootScanKey[0]
+            for changedRelPath in changedRelPaths:
+                if isSameOrUnder(changedRelPath, relRoot) or isSameOrUnder(relRoot, changedRelPath):
+                    del self.rootScans[rootScanKey]
+                    break
+
+    # Absolute paths of every directory which has been read, or loaded from cache, by this index
+    def getListedDirPaths(self):
+        return [self._absDirPath(relDir) for relDir, listing in self.listings.items() if listing != None]
+
+    # Walk 'pathString' (relative to basePath) using the memoized listings.
+    # Matches the old recursive glob behavior: hidden files and directories are skipped,
+    # and all returned paths are relative to basePath with forward slashes. Directory
+    # paths end in a trailing '/'.
+    # Directories and files ignored by ignoreRules are left out, and ignored directories are never read.
+    # The root itself is always walked, even if ignoreRules would ignore it. Walks of the same root are
+    # shared by every caller using the same rules.
+    # Directories are visited in sorted path order, the same order _walkSorted visits them in, so a
+    # directory reached through several paths is kept at the same (first) path whether streaming or not.
+    @instrumentation.timed("file_scan.scanRoot")
+    def scanRoot(self, pathString, ignoreRules=ignore_rules.NO_RULES):
+        relRoot = normalizeRelPath(pathString)
+        rootScanKey = (relRoot, ignoreRules.key)
+        if rootScanKey in self.rootScans:
+            return self.rootScans[rootScanKey]
+
+        rootScan = RootScan()
+        visitedDirIds = set()
+        # Heap of (isLinked, directory path) pairs, with trailing '/'s so they sort like _walkSorted's entries
+        pendingDirs = [(False, relRoot + "/")]
+
+        while len(pendingDirs) > 0:
+            isLinked, relDirPath = heapq.heappop(pendingDirs)
+            relDir = relDirPath[:-1]
+            listing = self.getListing(relDir)
+            if listing == None:
+                continue
+            if listing.dirId in visitedDirIds:
+                instrumentation.count(instrumentation.DIRS_ALIASED)
+                continue
+            visitedDirIds.add(listing.dirId)
+
+            rootScan.addDir(relDirPath, listing.dirId, isLinked)
+            for extension in listing.filesByExtension:
+                for fileName in listing.filesByExtension[extension]:
+                    if not ignoreRules.isIgnored(joinRelPath(relDir, fileName), False):
+                        rootScan.addFile(extension, joinRelPath(relDir, fileName))
+            for subdirName in listing.subdirNames:
+                if listing.isFollowed(subdirName, self.followSymlinks) and not ignoreRules.isIgnored(joinRelPath(relDir, subdirName), True):
+                    heapq.heappush(pendingDirs, (isLinked or subdirName in listing.linkedSubdirNames, joinRelPath(relDir, subdirName) + "/"))
+
+        self.rootScans[rootScanKey] = rootScan
+        return rootScan
+
+    # Entries of several root scans for collapseAliases, in sorted order. A directory only counts as reached
+    # through a symlink if every root reaching it went through one.
+    @staticmethod
+    def _getSortedEntries(rootScans, fileList):
+        dirIds = {}
+        linkedDirs = set()
+        for rootScan in rootScans:
+            dirIds.update(rootScan.dirIds)
+            linkedDirs.update(rootScan.linkedDirs)
+        for rootScan in rootScans:
+            linkedDirs.difference_update(relDirPath for relDirPath in rootScan.dirIds if not relDirPath in rootScan.linkedDirs)
+        entries = [(relDirPath, True, dirId, relDirPath in linkedDirs) for relDirPath, dirId in dirIds.items()]
+        entries += [(relPath, False, dirIds[getDirPathOf(relPath)], getDirPathOf(relPath) in linkedDirs) for relPath in set(fileList)]
+        entries.sort(key=getEntrySortKey)
+        return entries
+
+    # getFiles and getDirs return sorted lists without duplicates, so the result never depends on
+    # the order directories are listed in by the filesystem. Files reached through a symlink below their
+    # root are sorted after the others. When several paths lead to the same directory through symlinks,
+    # its real path is kept if it was reached, otherwise the first of its paths (see collapseAliases).
+    def getFiles(self, otherPathStrings, fileExtensionTypes, ignoreRules=ignore_rules.NO_RULES):
+        rootScans = [self.scanRoot(pathString, ignoreRules) for pathString in otherPathStrings]
+        fileList = []
+        for rootScan in rootScans:
+            fileList += rootScan.getFiles(fileExtensionTypes)
+        instrumentation.count(instrumentation.FILES_MATCHED, len(fileList))
+        if len(rootScans) > 1:
+            return [relPath for relPath, isDir in collapseAliases(DirectoryIndex._getSortedEntries(rootScans, fileList)) if not isDir]
+        return sorted(set(fileList), key=rootScans[0].getFileSortKey) if len(rootScans) == 1 else []
+
+    def getDirs(self, otherPathStrings, ignoreRules=ignore_rules.NO_RULES):
+        rootScans = [self.scanRoot(pathString, ignoreRules) for pathString in otherPathStrings]
+        if len(rootScans) > 1:
+            return sorted(relPath for relPath, isDir in collapseAliases(DirectoryIndex._getSortedEntries(rootScans, [])) if isDir)
+        return sorted(rootScans[0].dirs) if len(rootScans) == 1 else []
+
+    # True if relPath (relative to basePath) is a file found when its directory was listed.
+    # Only files with an extension are listed, so files without one are never found.
+    def hasFile(self, relPath):
+        relDir, fileName = os.path.split(relPath)
+        extension = getFileExtension(fileName) if fileName != "" else None
+        if extension == None:
+            return False
+        listing = self.getListing(relDir if relDir != "" else ".")
+        return listing != None and fileName in listing.filesByExtension.get(extension, [])
@@ -1,12 +1,90 @@
 import data
+import hashlib
+import io
 import os
+import tempfile
 import HelperFunctions
 import HelperVariables
+import instrumentation
+import pch_select
+import prefix_tree
+import unity_build
+
+def _getNewFileMode(filepath):
+    try:
+        return os.stat(filepath).st_mode & 0o777
+    except OSError:
+        # Same permissions open() would have created the file with
+        currentUmask = os.umask(0)
+        os.umask(currentUmask)
+        return 0o666 & ~currentUmask
+
+# Write content to a hidden temporary file next to filepath in a single write, then move it
+# over filepath. Anything reading filepath (such as a concurrent build) sees either the old
+# file or the complete new one, never a partially written file.
+def publishFileAtomically(filepath, content):
+    dirName, fileName = os.path.split(os.path.abspath(filepath))
+    tempFd, tempFilepath = tempfile.mkstemp(prefix="." + fileName + ".", suffix=".tmp", dir=dirName)
+    try:
+        with os.fdopen(tempFd, mode='w') as tempFile:
+            tempFile.write(content)
+        os.chmod(tempFilepath, _getNewFileMode(filepath))
+        os.replace(tempFilepath, filepath)
+    except BaseException:
+        try:
+            os.remove(tempFilepath)
+        except OSError:
+            pass
+        raise
+
+# sha256 of a text file's content, or None if it can't be read. Read in chunks, so large files are never held in memory.
+def getFileHash(filepath):
+    fileHash = hashlib.sha256()
+    try:
+        with open(filepath, mode='r') as existingFile:
+            for chunk in iter(lambda: existingFile.read(1024 * 1024), ""):
+                fileHash.update(chunk.encode())
+    except (OSError, UnicodeDecodeError):
+        return None
+    return fileHash.hexdigest()
+
+# Text stream which writes straight to a hidden temporary file next to filepath, hashing everything
+# written to it. Used instead of an in-memory buffer when the generated file is too large to keep in memory.
+class HashingTempFileStream():
+    def __init__(self, filepath):
+        dirName, fileName = os.path.split(os.path.abspath(filepath))
+        tempFd, self.tempFilepath = tempfile.mkstemp(prefix="." + fileName + ".", suffix=".tmp", dir=dirName)
+        self.tempFile = os.fdopen(tempFd, mode='w')
+        self.contentHash = hashlib.sha256()
+        self.byteCount = 0
+
+    def write(self, text):
+        encodedText = text.encode()
+        self.contentHash.update(encodedText)
+        self.byteCount += len(encodedText)
+        return self.tempFile.write(text)
+
+    # Move the temporary file over filepath. Anything reading filepath sees either the old or the complete new file.
+    def publish(self, filepath):
+        self.tempFile.close()
+        os.chmod(self.tempFilepath, _getNewFileMode(filepath))
+        os.replace(self.tempFilepath, filepath)
+
+    def discard(self):
+        self.tempFile.close()
+        try:
+            os.remove(self.tempFilepath)
+        except OSError:
+            pass
 
 class CMakeBuilder():
 
-    def __init__(self, filepath):
-        self.writestream = open(filepath, mode='w')
+    # With streamToFile, the generated content goes straight into a temporary file instead of
+    # memory, and save() compares hashes rather than content.
+    def __init__(self, filepath, streamToFile=False):
+        self.filepath = filepath
+        # Everything is generated in memory (or a temporary file) first, and only written to filepath by save()
+        self.writestream = HashingTempFileStream(filepath) if streamToFile else io.StringIO()
 
     def writeNewlines(self, num=1):
         while num > 0:
@@ -20,6 +98,12 @@ class CMakeBuilder():
         self.printToOwnStream("#####################################################################################")
         self.writeNewlines()
 
+    def writeFragmentWaterMark(self):
+        self.printToOwnStream(HelperVariables.CMAKE_FRAGMENT_WATERMARK)
+
+    def writeInclude(self, filepath):
+        self.printToOwnStream("include(", filepath, ")")
+
     def writeVersion(self, version):
         self.printToOwnStream("cmake_minimum_required( VERSION", version, ")")
 
@@ -52,24 +136,100 @@ class CMakeBuilder():
 
         self.writeMessage("Using C compiler standard -std=c${CMAKE_C_STANDARD}")
 
-    def writeExecutableOutput(self, name, sourcesArr, includeDirsArr, exeOutputDir):
-        outputTargetWriteName = HelperFunctions.getOutputCmakeName(name)
+    # With compressSources, files are grouped by directory. Each shared directory prefix is set as
+    # its own variable and files are listed relative to it, which keeps large source lists small.
+    # When sourceGlobs is given, the variable is filled by file(GLOB_RECURSE) using those patterns
+    # (relative to the project root) first, and the files in sourcesArr are appended to it.
+    # followSymlinks makes the glob enter symlinked directories, like the scanner does when following symlinks.
+    def writeSourcesVariable(self, name, sourcesArr, compressSources=False, sourceGlobs=None, followSymlinks=False):
         outputTargetSourcesName = HelperFunctions.getOutputSourcesName(name)
 
-        # Set CMake sources variable for this output
-        # NOTE: This is not necessary for functionality, but will make
-        # the file more human readable
-        self.printToOwnStream("\nset(", outputTargetSourcesName)
+        # file(GLOB_RECURSE) needs at least one pattern, so with none the files are just set as usual
+        if sourceGlobs != None and len(sourceGlobs) == 0:
+            sourceGlobs = None
+
+        if sourceGlobs != None:
+            # CONFIGURE_DEPENDS makes the build rerun the glob, and reconfigure if its result changed
+            if followSymlinks:
+                self.printToOwnStream("\nfile( GLOB_RECURSE", outputTargetSourcesName, "FOLLOW_SYMLINKS CONFIGURE_DEPENDS")
+            else:
+                self.printToOwnStream("\nfile( GLOB_RECURSE", outputTargetSourcesName, "CONFIGURE_DEPENDS")
+            for globPattern in sourceGlobs:
+                self.printToOwnStream("\t${PROJECT_SOURCE_DIR}/", globPattern, sep="")
+            self.printToOwnStream(")")
+            if len(sourcesArr) == 0:
+                return
+
+        if compressSources:
+            # Variables (such as linked libraries' header lists) can't be compressed, so they go last
+            fileNames = [sourceFileName for sourceFileName in sourcesArr if sourceFileName[0] != '$']
+            prefixes, sourceEntries = prefix_tree.getCompressedPaths(fileNames, lambda index : HelperFunctions.getOutputSourcePrefixName(name, index))
+            sourceEntries += [sourceFileName for sourceFileName in sourcesArr if sourceFileName[0] == '$']
+
+            if len(prefixes) > 0:
+                self.writeNewlines()
+            for prefixName, prefixValue in prefixes:
+                self.printToOwnStream("set(", prefixName, prefixValue, ")")
+        else:
+            # A generator, so streamed source lists are written as they are scanned
+            sourceEntries = (sourceFileName if sourceFileName[0] == '$' else "${PROJECT_SOURCE_DIR}/" + sourceFileName for sourceFileName in sourcesArr)
+
+        self.printToOwnStream("\nset(" if sourceGlobs == None else "\nlist( APPEND", outputTargetSourcesName)
 
         # We can assume that the sourcesArray should have at least one name in it
         # since compilation always requires at least one file
-        for sourceFileName in sourcesArr:
-            if sourceFileName[0] == '$':
-                self.printToOwnStream("\t", sourceFileName, sep="")
-            else:
-                self.printToOwnStream("\t${PROJECT_SOURCE_DIR}/", sourceFileName, sep="")
+        for sourceEntry in sourceEntries:
+            self.printToOwnStream("\t", sourceEntry, sep="")
         self.printToOwnStream(")")
 
+    # Build the target's unity batches (see Data.setUnityGroups), given as (group name, files) pairs, as one
+    # file each, using UNITY_GROUP source properties. Files in unityExcludedFiles are always compiled on their own.
+    # CMake versions without UNITY_BUILD_MODE GROUP skip the whole block and build every file separately.
+    def writeUnityBuild(self, name, unityBatches, unityExcludedFiles):
+        outputTargetWriteName = HelperFunctions.getOutputCmakeName(name)
+
+        self.writeNewlines()
+        self.writeIf("CMAKE_VERSION VERSION_GREATER_EQUAL " + unity_build.MIN_CMAKE_VERSION)
+        self.printToOwnStream("\tset_target_properties(", outputTargetWriteName, "PROPERTIES UNITY_BUILD ON UNITY_BUILD_MODE GROUP )")
+
+        for groupName, batch in unityBatches:
+            self.printToOwnStream("\tset_source_files_properties(")
+            for sourceFileName in batch:
+                self.printToOwnStream("\t\t${PROJECT_SOURCE_DIR}/", sourceFileName, sep="")
+            self.printToOwnStream("\t\tPROPERTIES UNITY_GROUP", groupName, ")")
+
+        if unityExcludedFiles != None and len(unityExcludedFiles) > 0:
+            self.printToOwnStream("\tset_source_files_properties(")
+            for sourceFileName in unityExcludedFiles:
+                self.printToOwnStream("\t\t${PROJECT_SOURCE_DIR}/", sourceFileName, sep="")
+            self.printToOwnStream("\t\tPROPERTIES SKIP_UNITY_BUILD_INCLUSION ON )")
+        self.writeEndif()
+
+    # Precompile the given headers (see pch_select) for the target. Headers outside the project are
+    # written the way they are included, project headers by their full path.
+    def writePrecompiledHeaders(self, name, precompiledHeaders):
+        self.writeNewlines()
+        self.writeIf("CMAKE_VERSION VERSION_GREATER_EQUAL " + pch_select.MIN_CMAKE_VERSION)
+        self.printToOwnStream("\ttarget_precompile_headers(", HelperFunctions.getOutputCmakeName(name), "PRIVATE")
+        for header in precompiledHeaders:
+            if header[0] == '<':
+                self.printToOwnStream("\t\t\"", header, "\"", sep="")
+            elif header[0] == '"':
+                self.printToOwnStream("\t\t[[", header, "]]", sep="")
+            else:
+                self.printToOwnStream("\t\t${PROJECT_SOURCE_DIR}/", header, sep="")
+        self.printToOwnStream("\t)")
+        self.writeEndif()
+
+    def writeExecutableOutput(self, name, sourcesArr, includeDirsArr, exeOutputDir, compressSources=False, sourceGlobs=None, unityBatches=None, unityExcludedFiles=None, precompiledHeaders=None, followGlobSymlinks=False):
+        outputTargetWriteName = HelperFunctions.getOutputCmakeName(name)
+        outputTargetSourcesName = HelperFunctions.getOutputSourcesName(name)
+
+        # Set CMake sources variable for this output
+        # NOTE: This is not necessary for functionality, but will make
+        # the file more human readable
+        self.writeSourcesVariable(name, sourcesArr, compressSources, sourceGlobs, followGlobSymlinks)
+
         # Create the CMake executable
         self.printToOwnStream("\nadd_executable(", outputTargetWriteName, HelperFunctions.inBraces(outputTargetSourcesName), ")")
 
@@ -89,7 +249,13 @@ class CMakeBuilder():
         self.printToOwnStream("\tRUNTIME_OUTPUT_DIRECTORY ${CMAKE_BINARY_DIR}/", exeOutputDir, "/${CMAKE_BUILD_TYPE}", sep="")
         self.printToOwnStream(")")
 
-    def writeLibraryOutput(self, name, isStatic, sourcesArr, includeDirsArr, archiveOutputDir, libOutputDir):
+        # Without any batch, a unity build would just compile every file on its own
+        if unityBatches != None and len(unityBatches) > 0:
+            self.writeUnityBuild(name, unityBatches, unityExcludedFiles)
+        if precompiledHeaders != None and len(precompiledHeaders) > 0:
+            self.writePrecompiledHeaders(name, precompiledHeaders)
+
+    def writeLibraryOutput(self, name, isStatic, sourcesArr, includeDirsArr, archiveOutputDir, libOutputDir, compressSources=False, sourceGlobs=None, unityBatches=None, unityExcludedFiles=None, precompiledHeaders=None, followGlobSymlinks=False):
         outputTargetWriteName = HelperFunctions.getOutputCmakeName(name)
         outputTargetSourcesName = HelperFunctions.getOutputSourcesName(name)
         libType = "STATIC" if isStatic else "SHARED"
@@ -97,16 +263,7 @@ class CMakeBuilder():
         # Set CMake sources variable for this output
         # NOTE: This is not necessary for functionality, but will make
         # the file more human readable
-        self.printToOwnStream("\nset(", outputTargetSourcesName)
-
-        # We can assume that the sourcesArray should have at least one name in it
-        # since compilation always requires at least one file
-        for sourceFileName in sourcesArr:
-            if sourceFileName[0] == '$':
-                self.printToOwnStream("\t", sourceFileName, sep="")
-            else:
-                self.printToOwnStream("\t${PROJECT_SOURCE_DIR}/", sourceFileName, sep="")
-        self.printToOwnStream(")")
+        self.writeSourcesVariable(name, sourcesArr, compressSources, sourceGlobs, followGlobSymlinks)
 
         # Create the CMake executable
         self.printToOwnStream("\nadd_library(", outputTargetWriteName, libType, HelperFunctions.inBraces(outputTargetSourcesName), ")")
@@ -129,6 +286,31 @@ class CMakeBuilder():
         self.printToOwnStream("\tLIBRARY_OUTPUT_DIRECTORY ${CMAKE_BINARY_DIR}/", libOutputDir, "/${CMAKE_BUILD_TYPE}", sep="")
         self.printToOwnStream(")")
 
+        # Without any batch, a unity build would just compile every file on its own
+        if unityBatches != None and len(unityBatches) > 0:
+            self.writeUnityBuild(name, unityBatches, unityExcludedFiles)
+        if precompiledHeaders != None and len(precompiledHeaders) > 0:
+            self.writePrecompiledHeaders(name, precompiledHeaders)
+
+    # An OBJECT library compiling files shared by several output items (see Data.setObjectLibs).
+    # Its objects also go into shared libraries, so they are always position independent.
+    def writeObjectLibrary(self, name, sourcesArr, includeDirsArr, compressSources=False):
+        outputTargetSourcesName = HelperFunctions.getOutputSourcesName(name)
+
+        self.writeSourcesVariable(name, sourcesArr, compressSources)
+
+        self.printToOwnStream("\nadd_library(", name, "OBJECT", HelperFunctions.inBraces(outputTargetSourcesName), ")")
+
+        self.printToOwnStream("\ntarget_include_directories(", name, "PRIVATE")
+        for includedDir in includeDirsArr:
+            if includedDir[0] == '$':
+                self.printToOwnStream("\t", includedDir, sep="")
+            else:
+                self.printToOwnStream("\t${PROJECT_SOURCE_DIR}/", includedDir, sep="")
+        self.printToOwnStream(")")
+
+        self.printToOwnStream("\nset_target_properties(", name, "PROPERTIES POSITION_INDEPENDENT_CODE ON )")
+
     # Problem: if one library has multiple lib_files, then they should be written as separate library entries.
     # Ex: libname_0, libname_1
     def writeImportedLib(self, name, libFilesArr, includeDirsArr, headerFilesArr):
@@ -230,5 +412,44 @@ class CMakeBuilder():
     def writeEndif(self):
         self.printToOwnStream("endif()")
 
+    # Write the generated content to the file, unless the file already contains exactly that content.
+    # Leaving an unchanged file untouched keeps its mtime, so builds don't rerun the CMake configure step.
+    # Returns True if the file was written.
+    @instrumentation.timed("CMakeBuilder.save")
+    def save(self):
+        if isinstance(self.writestream, HashingTempFileStream):
+            return self._saveStreamed()
+
+        content = self.writestream.getvalue()
+        try:
+            with open(self.filepath, mode='r') as existingFile:
+                if existingFile.read() == content:
+                    instrumentation.count(instrumentation.FILES_UNCHANGED)
+                    return False
+        except (OSError, UnicodeDecodeError):
+            pass
+
+        publishFileAtomically(self.filepath, content)
+        instrumentation.count(instrumentation.FILES_WRITTEN)
+        instrumentation.count(instrumentation.BYTES_WRITTEN, len(content.encode()))
+        return True
+
+    def _saveStreamed(self):
+        if getFileHash(self.filepath) == self.writestream.contentHash.hexdigest():
+            self.writestream.discard()
+            instrumentation.count(instrumentation.FILES_UNCHANGED)
+            return False
+
+        self.writestream.publish(self.filepath)
+        instrumentation.count(instrumentation.FILES_WRITTEN)
+        instrumentation.count(instrumentation.BYTES_WRITTEN, self.writestream.byteCount)
+        return True
+
+    # Throw away the generated content without saving it. Only needed when streaming to a temporary file,
+    # which is removed if save() wasn't called (or failed).
+    def discard(self):
+        if isinstance(self.writestream, HashingTempFileStream):
+            self.writestream.discard()
+
     def printToOwnStream(self, *args, **kwargs):
         print(*args, **kwargs, file=self.writestream)
\ No newline at end of file
@@ -0,0 +1,115 @@
+import re
+
+# Ignore file read from the project root, unless use_gitignore is false
+GITIGNORE_FILE_NAME = ".gitignore"
+
+# Translate the part of a .gitignore style pattern between slashes into a regex.
+# '*' and '?' never match '/', and '[...]' character classes work like they do in git.
+def _translateGlob(globString):
+    regexString = ""
+    index = 0
+    while index < len(globString):
+        char = globString[index]
+        index += 1
+        if char == '\\' and index < len(globString):
+            regexString += re.escape(globString[index])
+            index += 1
+        elif char == '*':
+            regexString += "[^/]*"
+        elif char == '?':
+            regexString += "[^/]"
+        elif char == '[':
+            closingIndex = globString.find(']', index + 1 if index < len(globString) and globString[index] in "!^" else index)
+            if closingIndex <= index:
+                regexString += re.escape(char)
+                continue
+            classString = globString[index:closingIndex]
+            index = closingIndex + 1
+            if classString[0] in "!^":
+                classString = "^" + classString[1:]
+            regexString += "[" + classString.replace("\\", "\\\\") + "]"
+        else:
+            regexString += re.escape(char)
+    return regexString
+
+# A single line of a .gitignore style exclude list, matched against paths relative to the project root.
+# Same rules as git: a pattern containing a '/' (other than a trailing one) only matches from the project
+# root, otherwise it matches at any depth. A trailing '/' only matches directories, '**' matches any number
+# of directories, and a leading '!' re-includes what an earlier pattern excluded.
+class IgnorePattern():
+    def __init__(self, patternString):
+        self.patternString = patternString
+        self.isNegated = patternString.startswith("!")
+        if self.isNegated:
+            patternString = patternString[1:]
+        elif patternString.startswith("\\!") or patternString.startswith("\\#"):
+            patternString = patternString[1:]
+
+        self.isDirOnly = patternString.endswith("/")
+        patternString = patternString.rstrip("/")
+
+        isAnchored = "/" in patternString
+        parts = patternString.lstrip("/").split("/")
+
+        regexString = ""
+        for partIndex, part in enumerate(parts):
+            isLastPart = partIndex == len(parts) - 1
+            if part == "**":
+                # "a/**" matches everything inside a, "**/b" and "a/**/b" match b at any depth below
+                regexString += ".*" if isLastPart else "(?:.*/)?"
+            else:
+                regexString += _translateGlob(part) + ("" if isLastPart else "/")
+
+        if not isAnchored:
+            regexString = "(?:.*/)?" + regexString
+        self.regex = re.compile(regexString, re.DOTALL)
+
+    def matches(self, relPath, isDir):
+        return (isDir or not self.isDirOnly) and self.regex.fullmatch(relPath) != None
+
+# Comments, blank lines and trailing spaces are dropped, like git does
+def parsePatternLines(lines):
+    patternStrings = []
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if not line.endswith("\\ "):
+            line = line.rstrip(" ")
+        if line != "" and not line.startswith("#"):
+            patternStrings.append(line)
+    return patternStrings
+
+# Patterns of an ignore file, or none if it doesn't exist
+def readIgnoreFile(filePathString):
+    try:
+        with open(filePathString) as ignoreFile:
+            return parsePatternLines(ignoreFile)
+    except (OSError, UnicodeDecodeError):
+        return []
+
+# An ordered list of ignore patterns. As in git, the last pattern matching a path decides whether it is ignored.
+# Directory walks check each directory before entering it, so an ignored directory is never read, and
+# nothing inside it can be re-included.
+class IgnoreRules():
+    def __init__(self, patternStrings=None):
+        self.patterns = [IgnorePattern(patternString) for patternString in parsePatternLines(patternStrings if patternStrings != None else [])]
+        # Identifies the rules, so walks made with the same rules can be shared
+        self.key = tuple(pattern.patternString for pattern in self.patterns)
+
+    def isEmpty(self):
+        return len(self.patterns) == 0
+
+    # New rules with morePatternStrings after these ones, so they take precedence
+    def extend(self, morePatternStrings):
+        if len(morePatternStrings) == 0:
+            return self
+        return IgnoreRules(list(self.key) + list(morePatternStrings))
+
+    # relPath is relative to the project root, with forward slashes and no trailing '/'
+    def isIgnored(self, relPath, isDir):
+        for pattern in reversed(self.patterns):
+            if pattern.matches(relPath, isDir):
+                return not pattern.isNegated
+        return False
+
+# Rules which ignore nothing, used when no rules are given
+NO_RULES = IgnoreRules()
@@ -0,0 +1,194 @@
+import json
+import os
+import posixpath
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import file_scan
+import instrumentation
+
+# Bump this whenever the layout of the cache file changes, so old caches are ignored
+INCLUDE_CACHE_VERSION = 1
+INCLUDE_CACHE_FILE_NAME = "include_cache.json"
+
+# Every #include (and #include_next) line. What follows the directive is checked separately,
+# so includes whose file name comes from a macro can be told apart from normal ones.
+INCLUDE_LINE_PATTERN = re.compile(rb'^[ \t]*#[ \t]*include(?:_next)?\b[ \t]*(.*)$', re.MULTILINE)
+
+def getIncludeCachePath(basePath):
+    return os.path.join(str(basePath), file_scan.SCAN_CACHE_DIR_NAME, INCLUDE_CACHE_FILE_NAME)
+
+# Returns (includes, hasMacroInclude). Each include is the quote or angle bracket it was written
+# with, followed by the file name: '"util/u.hpp' or '<vector'.
+# Includes inside comments and disabled #if blocks are kept, so the result is never missing anything.
+def parseIncludes(fileBytes):
+    includes = []
+    hasMacroInclude = False
+    for match in INCLUDE_LINE_PATTERN.finditer(fileBytes):
+        directiveRest = match.group(1)
+        if directiveRest.startswith(b'"'):
+            closingIndex = directiveRest.find(b'"', 1)
+        elif directiveRest.startswith(b'<'):
+            closingIndex = directiveRest.find(b'>', 1)
+        else:
+            closingIndex = -1
+
+        if closingIndex < 0:
+            hasMacroInclude = True
+        else:
+            includes.append(directiveRest[0:closingIndex].decode("utf-8", "replace"))
+    return includes, hasMacroInclude
+
+# The includes of a single file, as parsed at scannedAtNs
+class ParsedFile():
+    def __init__(self, mtimeNs, size, scannedAtNs, includes, hasMacroInclude):
+        self.mtimeNs = mtimeNs
+        self.size = size
+        self.scannedAtNs = scannedAtNs
+        self.includes = includes
+        self.hasMacroInclude = hasMacroInclude
+
+    # Same racy mtime check as file_scan.DirListing
+    def isTrustedFor(self, mtimeNs, size):
+        return self.mtimeNs == mtimeNs and self.size == size and self.scannedAtNs - self.mtimeNs > file_scan.RACY_MTIME_WINDOW_NS
+
+    def toCacheEntry(self):
+        return [self.mtimeNs, self.size, self.scannedAtNs, self.includes, self.hasMacroInclude]
+
+    @staticmethod
+    def fromCacheEntry(entry):
+        return ParsedFile(entry[0], entry[1], entry[2], entry[3], entry[4])
+
+# Follows the #include directives of an output item's sources to find which of its include
+# directories and header files are actually used. Every file is parsed at most once per IncludeScanner,
+# and parsed files are kept in a cache next to the scan cache, so unchanged files are never read again.
+# Include paths are resolved using the directory listings of a file_scan.DirectoryIndex.
+class IncludeScanner():
+    def __init__(self, basePath, scanIndex):
+        self.basePath = basePath
+        self.scanIndex = scanIndex
+        # Keyed by absolute file path, like the scan cache
+        self.cachedFiles = {}
+        # Relative path -> ParsedFile, or None if the file couldn't be read
+        self.parsedFiles = {}
+        self.cacheChanged = False
+
+    @instrumentation.timed("include_scan.loadCache")
+    def loadCache(self, cacheFilePath):
+        try:
+            with open(cacheFilePath) as cacheFile:
+                cacheData = json.load(cacheFile)
+        except (OSError, ValueError):
+            return
+
+        if isinstance(cacheData, dict) and cacheData.get("version") == INCLUDE_CACHE_VERSION:
+            for filePathString, entry in cacheData["files"].items():
+                self.cachedFiles[filePathString] = ParsedFile.fromCacheEntry(entry)
+
+    # Failing to write the cache is never an error, it just means the next run will parse the files again
+    @instrumentation.timed("include_scan.saveCache")
+    def saveCache(self, cacheFilePath):
+        if not self.cacheChanged:
+            return
+
+        try:
+            os.makedirs(os.path.dirname(cacheFilePath), exist_ok=True)
+            with open(cacheFilePath, mode='w') as cacheFile:
+                json.dump({ "version": INCLUDE_CACHE_VERSION, "files": { filePathString: self.cachedFiles[filePathString].toCacheEntry() for filePathString in sorted(self.cachedFiles) } }, cacheFile, separators=(',', ':'))
+        except OSError:
+            pass
+
+    def _absFilePath(self, relPath):
+        return os.path.normpath(os.path.abspath(os.path.join(str(self.basePath), relPath)))
+
+    # Runs on worker threads, so nothing is stored here. Returns (relPath, ParsedFile or None).
+    def _parseFile(self, relPath):
+        filePathString = self._absFilePath(relPath)
+        try:
+            fileStat = os.stat(filePathString)
+        except OSError:
+            return relPath, None
+
+        cachedFile = self.cachedFiles.get(filePathString)
+        if cachedFile != None and cachedFile.isTrustedFor(fileStat.st_mtime_ns, fileStat.st_size):
+            instrumentation.count(instrumentation.CACHE_HITS)
+            return relPath, cachedFile
+
+        scannedAtNs = time.time_ns()
+        try:
+            with open(filePathString, mode='rb') as sourceFile:
+                includes, hasMacroInclude = parseIncludes(sourceFile.read())
+        except OSError:
+            return relPath, None
+        instrumentation.count(instrumentation.FILES_PARSED)
+        return relPath, ParsedFile(fileStat.st_mtime_ns, fileStat.st_size, scannedAtNs, includes, hasMacroInclude)
+
+    # Parse the files which haven't been parsed yet using a pool of 'jobs' worker threads
+    def parseFiles(self, relPaths, jobs):
+        unparsedPaths = [relPath for relPath in dict.fromkeys(relPaths) if not relPath in self.parsedFiles]
+        if jobs <= 1 or len(unparsedPaths) <= 1:
+            results = map(self._parseFile, unparsedPaths)
+        else:
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                results = list(executor.map(self._parseFile, unparsedPaths))
+
+        for relPath, parsedFile in results:
+            self.parsedFiles[relPath] = parsedFile
+            if parsedFile != None and self.cachedFiles.get(self._absFilePath(relPath)) is not parsedFile:
+                self.cachedFiles[self._absFilePath(relPath)] = parsedFile
+                self.cacheChanged = True
+
+    # Resolve an include the way the compiler does: a quoted include is first looked for next to the
+    # file including it, then every include is looked for in includeDirs, in order.
+    # Returns (relative path of the header or None if it isn't in the project, include dir it was found through or None)
+    def resolveInclude(self, includingRelPath, include, includeDirs):
+        includeName = include[1:]
+        if include[0] == '"':
+            headerRelPath = posixpath.normpath(posixpath.join(posixpath.dirname(includingRelPath), includeName))
+            if self.scanIndex.hasFile(headerRelPath):
+                return headerRelPath, None
+        for includeDir in includeDirs:
+            headerRelPath = posixpath.normpath(posixpath.join(includeDir, includeName))
+            if self.scanIndex.hasFile(headerRelPath):
+                return headerRelPath, includeDir
+        return None, None
+
+    # Follow the includes of sourceRelPaths through every header they reach.
+    # Returns (the include dirs which were needed, in includeDirs order, set of reached header paths),
+    # or None if any reached file includes a file named by a macro, since then nothing can be left out.
+    # Includes which aren't found in the project (system and linked library headers) are skipped.
+    @instrumentation.timed("include_scan.getMinimalIncludes")
+    def getMinimalIncludes(self, sourceRelPaths, includeDirs, jobs=1):
+        sourceRelPaths = [file_scan.normalizeRelPath(relPath) for relPath in sourceRelPaths]
+        usedIncludeDirs = set()
+        reachedPaths = set(sourceRelPaths)
+        # (directory of the including file for quoted includes, include) -> resolved (path, include dir)
+        resolvedIncludes = {}
+
+        # Breadth first, so each level's files are parsed in parallel
+        pendingPaths = sourceRelPaths
+        while len(pendingPaths) > 0:
+            self.parseFiles(pendingPaths, jobs)
+            nextPaths = []
+            for relPath in pendingPaths:
+                parsedFile = self.parsedFiles[relPath]
+                if parsedFile == None:
+                    continue
+                if parsedFile.hasMacroInclude:
+                    return None
+
+                for include in parsedFile.includes:
+                    resolveKey = (posixpath.dirname(relPath) if include[0] == '"' else None, include)
+                    if not resolveKey in resolvedIncludes:
+                        resolvedIncludes[resolveKey] = self.resolveInclude(relPath, include, includeDirs)
+                    headerRelPath, includeDir = resolvedIncludes[resolveKey]
+
+                    if includeDir != None:
+                        usedIncludeDirs.add(includeDir)
+                    if headerRelPath != None and not headerRelPath in reachedPaths:
+                        reachedPaths.add(headerRelPath)
+                        nextPaths.append(headerRelPath)
+            pendingPaths = nextPaths
+
+        return [includeDir for includeDir in includeDirs if includeDir in usedIncludeDirs], reachedPaths - set(sourceRelPaths)
@@ -0,0 +1,107 @@
+import functools
+import json
+import threading
+import time
+
+# Counter names
+DIRS_VISITED = "dirs_visited"
+CACHE_HITS = "cache_hits"
+FILES_MATCHED = "files_matched"
+FILES_WRITTEN = "files_written"
+FILES_UNCHANGED = "files_unchanged"
+BYTES_WRITTEN = "bytes_written"
+FILES_PARSED = "files_parsed"
+SNAPSHOT_HITS = "snapshot_hits"
+DIRS_ALIASED = "dirs_aliased"
+
+# Records how long each instrumented phase took, and counts of the work done.
+# Nothing is recorded until enable() is called, and disabled phases cost one attribute check.
+class Recorder():
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        # Phase name -> [total seconds, number of calls], in the order phases first ran
+        self.phases = {}
+        self.counters = {}
+
+    def enable(self):
+        self.enabled = True
+
+    def addPhaseTime(self, name, seconds):
+        with self.lock:
+            if not name in self.phases:
+                self.phases[name] = [0.0, 0]
+            self.phases[name][0] += seconds
+            self.phases[name][1] += 1
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            with self.lock:
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+    def toDict(self):
+        return {
+            "phases": { name: { "seconds": seconds, "calls": calls } for name, (seconds, calls) in self.phases.items() },
+            "counters": dict(self.counters)
+        }
+
+    def toJSON(self):
+        return json.dumps(self.toDict(), indent=2)
+
+    # Human readable report. Phases can be nested (Data.setOutput includes the time of the
+    # file_scan calls it makes), so phase times don't add up to the total.
+    def formatTable(self):
+        nameWidth = max([len(name) for name in self.phases] + [len(name) for name in self.counters] + [len("Phase")])
+        lines = ["{:<{width}} {:>10} {:>7}".format("Phase", "Seconds", "Calls", width=nameWidth)]
+        for name, (seconds, calls) in self.phases.items():
+            lines.append("{:<{width}} {:>10.4f} {:>7}".format(name, seconds, calls, width=nameWidth))
+
+        lines.append("")
+        lines.append("{:<{width}} {:>10}".format("Counter", "Value", width=nameWidth))
+        for name in sorted(self.counters):
+            lines.append("{:<{width}} {:>10}".format(name, self.counters[name], width=nameWidth))
+        return "\n".join(lines)
+
+recorder = Recorder()
+
+class _Phase():
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.startTime = time.perf_counter()
+
+    def __exit__(self, *exceptionInfo):
+        recorder.addPhaseTime(self.name, time.perf_counter() - self.startTime)
+        return False
+
+class _DisabledPhase():
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exceptionInfo):
+        return False
+
+_disabledPhase = _DisabledPhase()
+
+# Context manager which records the time spent inside it as the phase 'name'
+def phase(name):
+    return _Phase(name) if recorder.enabled else _disabledPhase
+
+# Decorator which records every call of the decorated function as the phase 'name'
+def timed(name):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not recorder.enabled:
+                return func(*args, **kwargs)
+            with _Phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def count(name, amount=1):
+    recorder.count(name, amount)
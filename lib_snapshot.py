@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import file_scan
+import ignore_rules
+import instrumentation
+
+# Bump this whenever the layout of snapshot files changes, so old snapshots are ignored
+SNAPSHOT_VERSION = 3
+
+# Snapshots are shared by every project on the machine, so they live in the user's cache directory
+def getSnapshotDir():
+    cacheHome = os.environ.get("XDG_CACHE_HOME", "")
+    if cacheHome == "":
+        cacheHome = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cacheHome, "json_to_cmake", "snapshots")
+
+# Hash of the names (and kinds) of the entries of a directory which ignoreRules doesn't ignore
+def _getNamesHash(relDir, dirEntries, ignoreRules):
+    namesHash = hashlib.sha256()
+    for entry in sorted(dirEntries, key=lambda entry: entry.name):
+        try:
+            isDir = entry.is_dir()
+        except OSError:
+            isDir = False
+        if not ignoreRules.isIgnored(file_scan.joinRelPath(relDir, entry.name), isDir):
+            namesHash.update((("d " if isDir else "f ") + entry.name + "\0").encode("utf-8", "surrogateescape"))
+    return namesHash.hexdigest()
+
+# State of every directory of the trees under the given roots: its modification time and a hash of the
+# names of its entries, keyed by path relative to the project root. Scan results only depend on names, and
+# adding, removing or renaming an entry changes the modification time of the directory it is in, so this
+# is all needed to tell whether a snapshot still matches the tree. Like in the scan cache, a modification time
+# too close to the listing to be trusted is left out (see file_scan.DirListing.isTrustedFor).
+# Symlinked directories are only entered when followSymlinks is set, and each directory is entered once,
+# so symlink loops end. Directories which can't be read have no state.
+def getTreeState(basePath, relRoots, followSymlinks=True, ignoreRules=ignore_rules.NO_RULES):
+    treeState = {}
+    visitedDirIds = set()
+    dirsToVisit = list(reversed(relRoots))
+    while len(dirsToVisit) > 0:
+        relDir = dirsToVisit.pop()
+        try:
+            dirStat = os.stat(os.path.join(str(basePath), relDir))
+            if (dirStat.st_dev, dirStat.st_ino) in visitedDirIds:
+                continue
+            visitedDirIds.add((dirStat.st_dev, dirStat.st_ino))
+            listedAtNs = time.time_ns()
+            with os.scandir(os.path.join(str(basePath), relDir)) as dirEntries:
+                entries = list(dirEntries)
+        except OSError:
+            treeState[relDir] = None
+            continue
+
+        mtimeNs = dirStat.st_mtime_ns if listedAtNs - dirStat.st_mtime_ns > file_scan.RACY_MTIME_WINDOW_NS else None
+        treeState[relDir] = [mtimeNs, _getNamesHash(relDir, entries, ignoreRules)]
+        for entry in entries:
+            relPath = file_scan.joinRelPath(relDir, entry.name)
+            try:
+                if entry.is_dir() and (followSymlinks or not entry.is_symlink()) and not ignoreRules.isIgnored(relPath, True):
+                    dirsToVisit.append(relPath)
+            except OSError:
+                pass
+    return treeState
+
+# The scanned include dirs and header files of a frozen imported lib, stored relative to the root they
+# were found under, so the snapshot can be used by any project with the same tree at the same place.
+# treeState (see getTreeState) is the state of the tree they were scanned from.
+class LibrarySnapshot():
+    def __init__(self, dirsByRoot, filesByRoot, treeState):
+        self.dirsByRoot = dirsByRoot
+        self.filesByRoot = filesByRoot
+        self.treeState = treeState
+
+    # True if no directory of the scanned tree changed. Like the scan cache, that is one stat call per directory.
+    # Only a directory whose modification time differs (such as in another copy of the tree) is listed, and it
+    # still matches if its entry names are the same. Such directories get their current modification time,
+    # and isRefreshed is set, so the snapshot can be saved again to skip listing them next time.
+    def matchesTree(self, basePath, ignoreRules=ignore_rules.NO_RULES):
+        self.isRefreshed = False
+        for relDir, dirState in self.treeState.items():
+            dirPathString = os.path.join(str(basePath), relDir)
+            if dirState == None:
+                if os.path.isdir(dirPathString):
+                    return False
+                continue
+            try:
+                dirStat = os.stat(dirPathString)
+                if dirStat.st_mtime_ns == dirState[0]:
+                    continue
+                listedAtNs = time.time_ns()
+                with os.scandir(dirPathString) as dirEntries:
+                    if _getNamesHash(relDir, list(dirEntries), ignoreRules) != dirState[1]:
+                        return False
+            except OSError:
+                return False
+            if listedAtNs - dirStat.st_mtime_ns > file_scan.RACY_MTIME_WINDOW_NS:
+                dirState[0] = dirStat.st_mtime_ns
+                self.isRefreshed = True
+        return True
+
+    # Sorted include dirs, in the form file_scan.DirectoryIndex.getDirs returns them
+    def getIncludeDirs(self):
+        includeDirs = []
+        for relRoot, relDirs in self.dirsByRoot.items():
+            includeDirs += [(relRoot if relDir == "." else file_scan.joinRelPath(relRoot, relDir)) + "/" for relDir in relDirs]
+        return sorted(set(includeDirs))
+
+    # Sorted header files, in the form file_scan.DirectoryIndex.getFiles returns them
+    def getHeaderFiles(self):
+        headerFiles = []
+        for relRoot, relPaths in self.filesByRoot.items():
+            headerFiles += [file_scan.joinRelPath(relRoot, relPath) for relPath in relPaths]
+        return sorted(set(headerFiles))
+
+    def toJSON(self):
+        return { "version": SNAPSHOT_VERSION, "dirs": self.dirsByRoot, "files": self.filesByRoot, "tree": self.treeState }
+
+    @staticmethod
+    def fromJSON(snapshotJSON):
+        return LibrarySnapshot(snapshotJSON["dirs"], snapshotJSON["files"], snapshotJSON["tree"])
+
+# Path relative to relRoot, of a path found under it
+def _getRelativeTo(relRoot, relPath):
+    if relRoot == ".":
+        return relPath
+    return relPath[len(relRoot) + 1:] if len(relPath) > len(relRoot) else "."
+
+# The snapshot key is a hash of the configuration the scan result depends on: the imported lib's root_dir
+# and scanned directories as written in cmake_data.json, the matched header extensions, and the ignore patterns
+# and symlink policy the tree was walked with. Whether the tree itself changed is checked with the snapshot's tree state.
+def getSnapshotKey(rootDir, includeRoots, headerRoots, headerTypes, ignorePatterns, followSymlinks):
+    keyJSON = json.dumps([SNAPSHOT_VERSION, rootDir, includeRoots, headerRoots, sorted(headerTypes), list(ignorePatterns), followSymlinks], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(keyJSON.encode()).hexdigest()
+
+def loadSnapshot(snapshotKey):
+    try:
+        with open(os.path.join(getSnapshotDir(), snapshotKey + ".json")) as snapshotFile:
+            snapshotJSON = json.load(snapshotFile)
+    except (OSError, ValueError):
+        return None
+    if isinstance(snapshotJSON, dict) and snapshotJSON.get("version") == SNAPSHOT_VERSION:
+        return LibrarySnapshot.fromJSON(snapshotJSON)
+    return None
+
+# Written to a temporary file first, so projects generated at the same time never read half a snapshot.
+# Failing to write a snapshot is never an error, the lib is just scanned again next time.
+def saveSnapshot(snapshotKey, librarySnapshot):
+    snapshotDir = getSnapshotDir()
+    try:
+        os.makedirs(snapshotDir, exist_ok=True)
+        tempFileDescriptor, tempFilePath = tempfile.mkstemp(dir=snapshotDir, suffix=".tmp")
+        try:
+            with os.fdopen(tempFileDescriptor, mode='w') as tempFile:
+                json.dump(librarySnapshot.toJSON(), tempFile, separators=(',', ':'))
+            os.replace(tempFilePath, os.path.join(snapshotDir, snapshotKey + ".json"))
+        except OSError:
+            os.remove(tempFilePath)
+            raise
+    except OSError:
+        pass
+
+# Get the include dirs and header files of a frozen imported lib from its snapshot, or scan them
+# with scanIndex (skipping what ignoreRules ignores) and store a new snapshot if there isn't one or the tree changed.
+@instrumentation.timed("lib_snapshot.getLibrarySnapshot")
+def getLibrarySnapshot(basePath, rootDir, includeRoots, headerRoots, headerTypes, scanIndex, ignoreRules=ignore_rules.NO_RULES):
+    includeRoots = list(dict.fromkeys(map(file_scan.normalizeRelPath, includeRoots)))
+    headerRoots = list(dict.fromkeys(map(file_scan.normalizeRelPath, headerRoots)))
+    snapshotKey = getSnapshotKey(rootDir, includeRoots, headerRoots, headerTypes, ignoreRules.key, scanIndex.followSymlinks)
+
+    librarySnapshot = loadSnapshot(snapshotKey)
+    if librarySnapshot != None and librarySnapshot.matchesTree(basePath, ignoreRules):
+        instrumentation.count(instrumentation.SNAPSHOT_HITS)
+        if librarySnapshot.isRefreshed:
+            saveSnapshot(snapshotKey, librarySnapshot)
+        return librarySnapshot
+
+    # Taken before scanning, so anything changing during the scan makes the snapshot stale rather than wrong
+    treeState = getTreeState(basePath, list(dict.fromkeys(includeRoots + headerRoots)), scanIndex.followSymlinks, ignoreRules)
+
+    dirsByRoot = {}
+    for relRoot in includeRoots:
+        dirsByRoot[relRoot] = sorted(_getRelativeTo(relRoot, relDir.rstrip('/')) for relDir in scanIndex.scanRoot(relRoot, ignoreRules).dirs)
+    filesByRoot = {}
+    for relRoot in headerRoots:
+        filesByRoot[relRoot] = sorted(_getRelativeTo(relRoot, relPath) for relPath in scanIndex.scanRoot(relRoot, ignoreRules).getFiles(headerTypes))
+
+    librarySnapshot = LibrarySnapshot(dirsByRoot, filesByRoot, treeState)
+    saveSnapshot(snapshotKey, librarySnapshot)
+    return librarySnapshot
@@ -0,0 +1,101 @@
+import HelperVariables
+
+# Dependency graph of the output items and imported libs in cmake_data.json, built once from "link_libs".
+# Output items are ordered so every library comes before the output items which link to it, and the
+# libraries each output item reaches (directly, or through other output items) are worked out once per item.
+# Imported libs never link to anything, so they are always leaves.
+class LinkGraph():
+    def __init__(self, parsedJSON):
+        # Lists keep cmake_data.json order, sets are for membership checks
+        self.outputNames = list(parsedJSON[HelperVariables.OUTPUT_TAGNAME])
+        self.importedLibNames = list(parsedJSON.get(HelperVariables.IMPORTED_LIBS_TAGNAME, {}))
+        outputNameSet = set(self.outputNames)
+        self.importedLibNameSet = set(self.importedLibNames)
+
+        # Output item name -> names it links to directly, in link_libs order without duplicates
+        self.links = {}
+        for outputName, libNames in parsedJSON.get(HelperVariables.LINK_LIBS_TAGNAME, {}).items():
+            if not outputName in outputNameSet:
+                raise KeyError("\"" + outputName + "\" tag in \"link_libs\" not found in \"output\". Make sure your names match.")
+            for libName in libNames:
+                if not libName in outputNameSet and not libName in self.importedLibNameSet:
+                    raise KeyError("\"" + outputName + "\" tag in \"link_libs\" not found in \"output\" nor \"imported_libs\". Make sure your names match.")
+            self.links[outputName] = list(dict.fromkeys(libNames))
+
+        self.outputOrder = self._sortOutputs()
+        self.reachable = self._getReachableLibs()
+
+    def isImportedLib(self, name):
+        return name in self.importedLibNameSet
+
+    def getLinks(self, outputName):
+        return self.links.get(outputName, [])
+
+    # Every library the output item links to, directly or through other output items. Direct links come
+    # first, in link_libs order, followed by what each of them links to.
+    def getReachable(self, name):
+        return self.reachable.get(name, [])
+
+    # Output item names in dependency order. Output items which don't depend on each other keep their
+    # cmake_data.json order. Raises a KeyError naming the cycle if output items link to each other in a loop.
+    # Iterative depth first search, so long dependency chains can't hit the recursion limit. O(V + E).
+    def _sortOutputs(self):
+        sortedNames = []
+        # Output names currently being visited (in visiting order) and names already sorted
+        visitingNames = []
+        visitingSet = set()
+        sortedSet = set()
+
+        for startName in self.outputNames:
+            if startName in sortedSet:
+                continue
+            pendingLinks = [iter(self.getLinks(startName))]
+            visitingNames.append(startName)
+            visitingSet.add(startName)
+
+            while len(pendingLinks) > 0:
+                libName = next(pendingLinks[-1], None)
+                if libName == None:
+                    pendingLinks.pop()
+                    finishedName = visitingNames.pop()
+                    visitingSet.discard(finishedName)
+                    sortedSet.add(finishedName)
+                    sortedNames.append(finishedName)
+                elif libName in visitingSet:
+                    cycle = visitingNames[visitingNames.index(libName):] + [libName]
+                    raise KeyError("Circular dependency in \"link_libs\": " + " -> ".join(cycle) + ". Output items can't link to each other in a loop.")
+                elif libName in self.links and not libName in sortedSet:
+                    pendingLinks.append(iter(self.getLinks(libName)))
+                    visitingNames.append(libName)
+                    visitingSet.add(libName)
+                elif not libName in sortedSet and not libName in self.importedLibNameSet:
+                    # An output item which doesn't link anything
+                    sortedSet.add(libName)
+                    sortedNames.append(libName)
+        return sortedNames
+
+    # Since outputOrder puts every library before its dependents, each item's reachable libraries are just
+    # its direct links plus what those already reach.
+    def _getReachableLibs(self):
+        reachable = {}
+        for outputName in self.outputOrder:
+            reachableNames = {}
+            for libName in self.getLinks(outputName):
+                reachableNames[libName] = True
+            for libName in self.getLinks(outputName):
+                for transitiveName in reachable.get(libName, []):
+                    reachableNames[transitiveName] = True
+            reachable[outputName] = list(reachableNames)
+        return reachable
+
+    # The given output items plus everything they reach. Returns (output names, imported lib names), both
+    # in cmake_data.json order. Raises a KeyError if a name isn't an output item.
+    def getClosure(self, outputNames):
+        for outputName in outputNames:
+            if not outputName in self.reachable:
+                raise KeyError("\"" + outputName + "\" given to --only not found in \"output\". Options: " + ", ".join(self.outputNames))
+
+        selectedNames = set(outputNames)
+        for outputName in outputNames:
+            selectedNames.update(self.getReachable(outputName))
+        return [name for name in self.outputNames if name in selectedNames], [name for name in self.importedLibNames if name in selectedNames]
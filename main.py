@@ -1,17 +1,86 @@
 from json.decoder import JSONDecodeError
+import argparse
+import cProfile
 import sys
+import batch
+import instrumentation
+import validate
+import watch
 import write_organizer
 
-def ifArgsDo(func):
-    if len(sys.argv) <= 1:
-        func(".")
-    else:
-        func(sys.argv[1])
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Generate a CMakeLists.txt file from a project's cmake_data.json file.")
+    parser.add_argument("project_dirs", nargs="*", default=["."], metavar="project_dir", help="Root directory of the project, which contains cmake_data.json. Defaults to the current directory. Several can be given with --batch.")
+    parser.add_argument("--watch", action="store_true", help="Keep running, and regenerate CMakeLists.txt whenever cmake_data.json changes or a source/header file is added or removed.")
+    parser.add_argument("--poll", action="store_true", help="With --watch, detect changes by polling instead of using inotify.")
+    parser.add_argument("-j", "--jobs", type=int, default=1, metavar="N", help="Number of threads used to scan the project's directories in parallel. With --batch, the number of projects generated in parallel. Defaults to 1.")
+    parser.add_argument("--batch", action="store_true", help="Generate every given project directory, then print a summary of the results.")
+    parser.add_argument("--discover", metavar="DIR", help="Generate every project (directory containing cmake_data.json) found under DIR. Implies --batch.")
+    parser.add_argument("--only", metavar="NAME[,NAME]", type=lambda value : [name for name in value.split(",") if name != ""], help="Only generate these output items, along with every output item and imported lib they link to. Nothing else is scanned.")
+    parser.add_argument("--stream", action="store_true", help="Stream source and header file lists from the directory scan straight into CMakeLists.txt instead of keeping them in memory. For very large projects. The scan cache isn't used.")
+    parser.add_argument("--check", action="store_true", help="Only validate the cmake_data.json file of each given project directory (or each project found with --discover), reporting every problem found. The projects' directories aren't scanned, and nothing is written.")
+    parser.add_argument("--timings", action="store_true", help="Print how long each generation phase took, along with scan and write statistics.")
+    parser.add_argument("--timings-json", metavar="FILE", help="Write the phase timings and statistics to FILE as JSON.")
+    parser.add_argument("--profile", metavar="FILE", help="Run the generator under cProfile and dump the stats to FILE.")
 
-def main(arg):
+    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.check:
+        if args.watch or args.batch:
+            parser.error("--check can't be used with --watch or --batch")
+        return args
+    if args.discover != None:
+        args.batch = True
+    if args.batch and args.watch:
+        parser.error("--watch can't be used with --batch or --discover")
+    if args.batch and args.only != None:
+        parser.error("--only can't be used with --batch or --discover")
+    if args.stream and (args.batch or args.watch):
+        parser.error("--stream can't be used with --watch or --batch")
+    if not args.batch and len(args.project_dirs) > 1:
+        parser.error("Only one project directory can be given without --batch")
+    if (args.timings or args.timings_json != None or args.profile != None) and (args.batch or args.watch):
+        parser.error("--timings, --timings-json and --profile can't be used with --watch or --batch")
+    return args
+
+# Generate a single project, reporting timings and profiling data if they were asked for
+def runInstrumented(args, projectDir):
+    if args.timings or args.timings_json != None:
+        instrumentation.recorder.enable()
+
+    profiler = cProfile.Profile() if args.profile != None else None
+    if profiler != None:
+        profiler.enable()
     try:
-        write_organizer.writeCMakeFiles(arg)
-        print("CMakeLists.txt file written successfully!")
+        return write_organizer.writeCMakeFiles(projectDir, jobs=args.jobs, onlyOutputs=args.only, streamSources=args.stream)
+    finally:
+        if profiler != None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+        if args.timings:
+            print(instrumentation.recorder.formatTable())
+        if args.timings_json != None:
+            with open(args.timings_json, mode='w') as timingsFile:
+                timingsFile.write(instrumentation.recorder.toJSON())
+
+def main(args):
+    if args.check:
+        projectDirs = batch.discoverProjects(args.discover) if args.discover != None else args.project_dirs
+        return validate.checkProjects(projectDirs)
+
+    if args.batch:
+        projectDirs = batch.discoverProjects(args.discover) if args.discover != None else args.project_dirs
+        return batch.runBatch(projectDirs, args.jobs)
+
+    arg = args.project_dirs[0]
+    try:
+        if args.watch:
+            watch.watchProject(arg, forcePolling=args.poll, jobs=args.jobs, onlyOutputs=args.only)
+        elif runInstrumented(args, arg):
+            print("CMakeLists.txt file written successfully!")
+        else:
+            print("CMakeLists.txt unchanged")
     except FileNotFoundError as e:
         print("ERROR: JSON file not found in directory", arg,"... make sure the file exists and is located in your project's root directory. Also make sure the directory argument given IS the root directory of you project")
         pass
@@ -19,5 +88,10 @@ def main(arg):
         # print("Problem with JSON: ", str(e)[str(e).index(':'):])
         print("Problem with JSON:", str(e))
         pass
+    except KeyboardInterrupt:
+        pass
+    return 0
 
-ifArgsDo(main)
+# Guarded so worker processes started by --batch don't run the generator again on import
+if __name__ == "__main__":
+    sys.exit(main(parseArgs()))
@@ -0,0 +1,101 @@
+import posixpath
+
+# Default total estimated size (in bytes) of the headers precompiled for one output item
+DEFAULT_BUDGET_BYTES = 1024 * 1024
+
+# Headers outside the project (system and linked library headers) can't be measured, so each one is
+# assumed to be about the size of a preprocessed standard library header
+EXTERNAL_HEADER_COST = 64 * 1024
+
+# A header has to be included by at least this share of an output item's source files (and by at least
+# MIN_INCLUDE_COUNT of them) to be precompiled, since it ends up included in every one of them
+MIN_SOURCE_SHARE = 0.25
+MIN_INCLUDE_COUNT = 2
+
+# target_precompile_headers needs CMake 3.16. Older versions build without precompiled headers.
+MIN_CMAKE_VERSION = "3.16"
+
+# Precompiled headers are either project header paths (relative to the project root), or headers outside
+# the project written the way they are included: "<vector>" or "\"config.h\"".
+def isExternalHeader(header):
+    return header[0] == '<' or header[0] == '"'
+
+# include_scan includes ('"config.h' or '<vector') which aren't in the project, in their written form
+def _getExternalHeader(include):
+    return include + ('>' if include[0] == '<' else '"')
+
+class _HeaderGraph():
+    def __init__(self, includeScanner, includeDirs, jobs):
+        self.includeScanner = includeScanner
+        self.includeDirs = includeDirs
+        self.jobs = jobs
+        self.resolvedIncludes = {}
+        self.costs = {}
+
+    # The headers a file includes, as precompiled header entries, in include order without duplicates
+    def getIncludedHeaders(self, relPath):
+        parsedFile = self.includeScanner.parsedFiles.get(relPath)
+        if parsedFile == None:
+            return []
+
+        headers = []
+        for include in parsedFile.includes:
+            resolveKey = (posixpath.dirname(relPath) if include[0] == '"' else None, include)
+            if not resolveKey in self.resolvedIncludes:
+                headerRelPath, _includeDir = self.includeScanner.resolveInclude(relPath, include, self.includeDirs)
+                self.resolvedIncludes[resolveKey] = headerRelPath if headerRelPath != None else _getExternalHeader(include)
+            headers.append(self.resolvedIncludes[resolveKey])
+        return list(dict.fromkeys(headers))
+
+    # Estimated cost of precompiling a header: its own size plus the size of everything it includes
+    def getCost(self, header):
+        if isExternalHeader(header):
+            return EXTERNAL_HEADER_COST
+        if not header in self.costs:
+            cost = 0
+            reachedHeaders = set([header])
+            pendingPaths = [header]
+            while len(pendingPaths) > 0:
+                self.includeScanner.parseFiles(pendingPaths, self.jobs)
+                nextPaths = []
+                for relPath in pendingPaths:
+                    parsedFile = self.includeScanner.parsedFiles[relPath]
+                    cost += parsedFile.size if parsedFile != None else 0
+                    for includedHeader in self.getIncludedHeaders(relPath):
+                        if includedHeader in reachedHeaders:
+                            continue
+                        reachedHeaders.add(includedHeader)
+                        if isExternalHeader(includedHeader):
+                            cost += EXTERNAL_HEADER_COST
+                        else:
+                            nextPaths.append(includedHeader)
+                pendingPaths = nextPaths
+            self.costs[header] = cost
+        return self.costs[header]
+
+# Pick the headers worth precompiling for an output item. Each header included directly by the source
+# files is scored by how many of them include it times its estimated cost, and the best scoring ones
+# are picked until budgetBytes is used up. Headers in excludedHeaders are never picked.
+# Returns the picked headers in the order the source files first include them.
+def selectPrecompiledHeaders(includeScanner, sourceRelPaths, includeDirs, budgetBytes=DEFAULT_BUDGET_BYTES, excludedHeaders=None, jobs=1):
+    excludedHeaders = set(excludedHeaders) if excludedHeaders != None else set()
+    headerGraph = _HeaderGraph(includeScanner, includeDirs, jobs)
+    includeScanner.parseFiles(sourceRelPaths, jobs)
+
+    # Header -> number of source files including it directly. Dicts keep first include order.
+    includeCounts = {}
+    for relPath in sourceRelPaths:
+        for header in headerGraph.getIncludedHeaders(relPath):
+            includeCounts[header] = includeCounts.get(header, 0) + 1
+
+    minIncludeCount = max(MIN_INCLUDE_COUNT, MIN_SOURCE_SHARE * len(sourceRelPaths))
+    candidates = [header for header, count in includeCounts.items() if count >= minIncludeCount and not header in excludedHeaders]
+    firstIncludeIndexes = { header: index for index, header in enumerate(includeCounts) }
+
+    selectedHeaders = []
+    usedBytes = 0
+    for header in sorted(candidates, key=lambda header : (-includeCounts[header] * headerGraph.getCost(header), firstIncludeIndexes[header])):
+        if usedBytes + headerGraph.getCost(header) <= budgetBytes:
+            selectedHeaders.append(header)
+            usedBytes += headerGraph.getCost(header)
+    return sorted(selectedHeaders, key=lambda header : firstIncludeIndexes[header])
@@ -0,0 +1,68 @@
+import HelperFunctions
+
+# In-memory prefix tree of '/' separated relative file paths. Each node is a directory.
+class PrefixNode():
+    def __init__(self):
+        self.subdirs = {}
+        self.fileNames = []
+        # Number of files in this directory and all of its subdirectories
+        self.fileCount = 0
+
+    def addPath(self, relPathString):
+        pathParts = relPathString.split('/')
+        node = self
+        node.fileCount += 1
+        for dirName in pathParts[:-1]:
+            if not dirName in node.subdirs:
+                node.subdirs[dirName] = PrefixNode()
+            node = node.subdirs[dirName]
+            node.fileCount += 1
+        node.fileNames.append(pathParts[-1])
+
+    # A directory is worth a variable when the characters it saves exceed what its own set() line costs.
+    # Every file below it is written as ${prefixName}/... instead of ${anchorName}/path/from/anchor/...
+    # (files under a subdirectory which gets its own variable use this one once, through that set() line).
+    # A directory holding no files and a single subdirectory is only passed through, so the variable is
+    # left to the subdirectory, which saves more per use.
+    def needsPrefix(self, anchorName, pathFromAnchor, prefixName):
+        if len(self.fileNames) == 0 and len(self.subdirs) == 1:
+            return False
+        prefixValue = HelperFunctions.inBraces(anchorName) + "/" + "/".join(pathFromAnchor)
+        savedPerUse = len(prefixValue) - len(HelperFunctions.inBraces(prefixName))
+        # "set( <prefixName> <prefixValue> )" plus its newline
+        setLineCost = len("set(  )\n") + len(prefixName) + 1 + len(prefixValue)
+        return self.fileCount * savedPerUse > setLineCost
+
+def buildPrefixTree(relPathStrings):
+    rootNode = PrefixNode()
+    for relPathString in relPathStrings:
+        rootNode.addPath(relPathString)
+    return rootNode
+
+# Group relPathStrings (relative to the project root) by directory.
+# Returns (prefixes, entries). 'prefixes' is a list of (variable name, value) pairs, in the order they must
+# be set. Each value is relative to an earlier prefix variable, or to PROJECT_SOURCE_DIR.
+# 'entries' are the files, each written relative to the prefix variable of its nearest prefixed directory.
+# getPrefixName(index) gives the variable name of the index'th prefix.
+def getCompressedPaths(relPathStrings, getPrefixName):
+    prefixes = []
+    entries = []
+
+    # Iterative, since source trees can be deeper than the recursion limit allows for
+    nodeStack = [(buildPrefixTree(relPathStrings), "PROJECT_SOURCE_DIR", [])]
+    while len(nodeStack) > 0:
+        node, anchorName, pathFromAnchor = nodeStack.pop()
+
+        prefixName = getPrefixName(len(prefixes))
+        if len(pathFromAnchor) > 0 and node.needsPrefix(anchorName, pathFromAnchor, prefixName):
+            prefixes.append((prefixName, HelperFunctions.inBraces(anchorName) + "/" + "/".join(pathFromAnchor)))
+            anchorName = prefixName
+            pathFromAnchor = []
+
+        for fileName in sorted(node.fileNames):
+            entries.append("/".join([HelperFunctions.inBraces(anchorName)] + pathFromAnchor + [fileName]))
+
+        for dirName in sorted(node.subdirs, reverse=True):
+            nodeStack.append((node.subdirs[dirName], anchorName, pathFromAnchor + [dirName]))
+
+    return prefixes, entries
@@ -0,0 +1,58 @@
+import json
+import os
+import sys
+
+import pytest
+
+# The generator's modules live in the repository root
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+# Smallest cmake_data.json the generator accepts, for a project with the given output items.
+# rootOptions are added to (or replace) the root object's tags.
+def getProjectJSON(outputs, importedLibs=None, linkLibs=None, **rootOptions):
+    projectJSON = {
+        "min_cmake_version": "3.16",
+        "project_name": "test_project",
+        "default_cpp_standard": "11",
+        "default_c_standard": "99",
+        "allowed_cpp_standards": ["11"],
+        "allowed_c_standards": ["99"],
+        "output": outputs,
+        "targets": { "debug": { "cpp_flags": [], "c_flags": [] } },
+        "default_target": "debug"
+    }
+    if importedLibs != None:
+        projectJSON["imported_libs"] = importedLibs
+    if linkLibs != None:
+        projectJSON["link_libs"] = linkLibs
+    projectJSON.update(rootOptions)
+    return projectJSON
+
+def getStaticLib(sourceDirs, includeDirs=(), **options):
+    outputItem = {
+        "type": "static_lib",
+        "r_source_dirs": list(sourceDirs),
+        "r_header_dirs": [],
+        "r_include_dirs": list(includeDirs),
+        "archive_output_dir": "lib",
+        "library_output_dir": "lib"
+    }
+    outputItem.update(options)
+    return outputItem
+
+# Writes { relative path: contents } files under rootPath, creating directories as needed
+def writeFiles(rootPath, filesByRelPath):
+    for relPath, contents in filesByRelPath.items():
+        filePath = rootPath / relPath
+        filePath.parent.mkdir(parents=True, exist_ok=True)
+        filePath.write_text(contents)
+
+# Returns a function which writes a project (its cmake_data.json and files) into a fresh directory
+@pytest.fixture
+def makeProject(tmp_path):
+    def make(projectJSON, filesByRelPath={}):
+        writeFiles(tmp_path, filesByRelPath)
+        (tmp_path / "cmake_data.json").write_text(json.dumps(projectJSON, indent=2))
+        return tmp_path
+    return make
@@ -0,0 +1,44 @@
+import os
+
+import data
+import HelperVariables
+from conftest import getProjectJSON, getStaticLib
+
+def loadOutput(rootPath, outputName):
+    return data.Data(str(rootPath), False).output[outputName]
+
+# A directory reached both through a symlink and at its real path is listed once, at its real path,
+# even when the symlinked path sorts first
+def testAliasKeepsRealPath(makeProject):
+    rootPath = makeProject(getProjectJSON({ "lib": getStaticLib(["include", "src"], ["include", "src"]) }), {
+        "src/a.cpp": "int a;\n",
+        "src/sub/c.cxx": "int c;\n"
+    })
+    (rootPath / "include").mkdir()
+    os.symlink("../src/sub", str(rootPath / "include" / "alias"))
+    os.symlink("..", str(rootPath / "src" / "sub" / "loop"))
+
+    libOutput = loadOutput(rootPath, "lib")
+    assert libOutput[HelperVariables.SOURCE_FILES_TAGNAME] == ["src/a.cpp", "src/sub/c.cxx"]
+    assert libOutput[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME] == ["include/", "src/", "src/sub/"]
+
+# A directory only reached through symlinks is listed at the first of its symlinked paths
+def testLinkedOnlyAliasUsesSortedPath(makeProject):
+    rootPath = makeProject(getProjectJSON({ "lib": getStaticLib(["src"]) }), {
+        "src/a.cpp": "int a;\n",
+        "ext/e.cpp": "int e;\n"
+    })
+    os.symlink("../ext", str(rootPath / "src" / "zz"))
+    os.symlink("../ext", str(rootPath / "src" / "bb"))
+
+    assert loadOutput(rootPath, "lib")[HelperVariables.SOURCE_FILES_TAGNAME] == ["src/a.cpp", "src/bb/e.cpp"]
+
+# With follow_symlinks off, symlinked directories aren't scanned at all
+def testSymlinksNotFollowed(makeProject):
+    rootPath = makeProject(getProjectJSON({ "lib": getStaticLib(["src"]) }, follow_symlinks=False), {
+        "src/a.cpp": "int a;\n",
+        "ext/e.cpp": "int e;\n"
+    })
+    os.symlink("../ext", str(rootPath / "src" / "linked"))
+
+    assert loadOutput(rootPath, "lib")[HelperVariables.SOURCE_FILES_TAGNAME] == ["src/a.cpp"]
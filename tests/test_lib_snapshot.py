@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+import data
+import HelperVariables
+import instrumentation
+from conftest import getProjectJSON, getStaticLib
+
+HEADER_FILES = {
+    "dep/color/include/color.h": "",
+    "dep/color/include/c/cc.hpp": ""
+}
+
+def getFrozenLibProject():
+    return getProjectJSON({ "lib": getStaticLib(["src"]) }, importedLibs={
+        "color": {
+            "type": "static",
+            "root_dir": "dep/color/lib",
+            "lib_files": ["color"],
+            "r_header_dirs": ["dep/color/include"],
+            "r_include_dirs": ["dep/color/include"],
+            "frozen": True
+        }
+    }, linkLibs={ "lib": ["color"] })
+
+# Snapshots go to a fresh cache directory, and snapshot hits are counted
+@pytest.fixture
+def snapshotProject(makeProject, tmp_path_factory, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path_factory.mktemp("cache")))
+    monkeypatch.setattr(instrumentation.recorder, "enabled", True)
+    instrumentation.recorder.reset()
+    return makeProject(getFrozenLibProject(), dict(HEADER_FILES, **{ "src/a.cpp": "int a;\n" }))
+
+# Move the modification times of every directory under relDir far enough into the past to be trusted
+def ageDirs(rootPath, relDir):
+    for dirPathString, _dirNames, _fileNames in os.walk(str(rootPath / relDir)):
+        os.utime(dirPathString, ns=(1000000000000000000, 1000000000000000000))
+
+def loadHeaderFiles(rootPath):
+    return data.Data(str(rootPath), False).imported_libs["color"][HelperVariables.HEADER_FILES_TAGNAME]
+
+def getSnapshotHits():
+    return instrumentation.recorder.counters.get(instrumentation.SNAPSHOT_HITS, 0)
+
+def testSnapshotReused(snapshotProject):
+    firstHeaderFiles = loadHeaderFiles(snapshotProject)
+    assert firstHeaderFiles == ["dep/color/include/c/cc.hpp", "dep/color/include/color.h"]
+    assert getSnapshotHits() == 0
+
+    assert loadHeaderFiles(snapshotProject) == firstHeaderFiles
+    assert getSnapshotHits() == 1
+
+# Directories whose modification time is unchanged are only stat'ed, never listed
+def testSnapshotHitOnlyStats(snapshotProject, monkeypatch):
+    ageDirs(snapshotProject, "dep")
+    loadHeaderFiles(snapshotProject)
+
+    listedPathStrings = []
+    scandir = os.scandir
+    def recordingScandir(pathString):
+        listedPathStrings.append(str(pathString))
+        return scandir(pathString)
+    monkeypatch.setattr(os, "scandir", recordingScandir)
+
+    assert loadHeaderFiles(snapshotProject) == ["dep/color/include/c/cc.hpp", "dep/color/include/color.h"]
+    assert getSnapshotHits() == 1
+    depDirString = os.path.join(str(snapshotProject), "dep")
+    assert [pathString for pathString in listedPathStrings if pathString.startswith(depDirString)] == []
+
+@pytest.mark.parametrize("changeTree", [
+    lambda rootPath : (rootPath / "dep/color/include/added.h").write_text(""),
+    lambda rootPath : (rootPath / "dep/color/include/c/cc.hpp").rename(rootPath / "dep/color/include/c/renamed.hpp"),
+    lambda rootPath : (rootPath / "dep/color/include/color.h").unlink(),
+    lambda rootPath : (rootPath / "dep/color/include/new_dir").mkdir()
+])
+def testSnapshotInvalidatedByTreeChanges(snapshotProject, changeTree):
+    ageDirs(snapshotProject, "dep")
+    loadHeaderFiles(snapshotProject)
+    changeTree(snapshotProject)
+
+    rescannedFiles = loadHeaderFiles(snapshotProject)
+    assert getSnapshotHits() == 0
+    headerRoot = snapshotProject / "dep/color/include"
+    assert rescannedFiles == sorted("dep/color/include/" + path.relative_to(headerRoot).as_posix() for path in headerRoot.rglob("*.h*"))
@@ -0,0 +1,30 @@
+import pytest
+
+import link_graph
+
+def getLinkGraph(outputNames, importedLibNames, linkLibs):
+    return link_graph.LinkGraph({
+        "output": { name: {} for name in outputNames },
+        "imported_libs": { name: {} for name in importedLibNames },
+        "link_libs": linkLibs
+    })
+
+def testLibrariesSortedBeforeDependents():
+    linkGraph = getLinkGraph(["exe", "static", "shared"], ["color"], { "exe": ["static", "color"], "static": ["shared"] })
+
+    assert linkGraph.outputOrder == ["shared", "static", "exe"]
+    assert linkGraph.getReachable("exe") == ["static", "color", "shared"]
+    assert linkGraph.isImportedLib("color")
+    assert not linkGraph.isImportedLib("static")
+
+def testClosureKeepsJSONOrder():
+    linkGraph = getLinkGraph(["exe", "other", "static"], ["grass", "color"], { "exe": ["static", "color", "grass"] })
+    assert linkGraph.getClosure(["exe"]) == (["exe", "static"], ["grass", "color"])
+
+def testCycleNamed():
+    with pytest.raises(KeyError, match="a -> b -> c -> a"):
+        getLinkGraph(["a", "b", "c"], [], { "a": ["b"], "b": ["c"], "c": ["a"] })
+
+def testUnknownLinkName():
+    with pytest.raises(KeyError, match="not found in \"output\" nor \"imported_libs\""):
+        getLinkGraph(["a"], [], { "a": ["missing"] })
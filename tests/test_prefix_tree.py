@@ -0,0 +1,29 @@
+import prefix_tree
+
+def getPrefixName(index):
+    return "MY_LIB_SOURCE_PREFIX_" + str(index)
+
+def testPrefixWhenItSavesCharacters():
+    relPaths = ["libs/my_lib/src/a.cpp", "libs/my_lib/src/b.cpp"] + ["libs/my_lib/src/platform/windows/" + name for name in ["files.cpp", "paths.cpp", "strings.cpp", "threads.cpp", "time.cpp"]]
+    prefixes, entries = prefix_tree.getCompressedPaths(relPaths, getPrefixName)
+
+    assert prefixes == [
+        ("MY_LIB_SOURCE_PREFIX_0", "${PROJECT_SOURCE_DIR}/libs/my_lib/src"),
+        ("MY_LIB_SOURCE_PREFIX_1", "${MY_LIB_SOURCE_PREFIX_0}/platform/windows")
+    ]
+    assert entries[:3] == ["${MY_LIB_SOURCE_PREFIX_0}/a.cpp", "${MY_LIB_SOURCE_PREFIX_0}/b.cpp", "${MY_LIB_SOURCE_PREFIX_1}/files.cpp"]
+
+# ${MY_LIB_SOURCE_PREFIX_0} is as long as ${PROJECT_SOURCE_DIR}/src, so a variable would only add its set() line
+def testNoPrefixWhenNothingIsSaved():
+    relPaths = ["src/a.cpp", "src/b.cpp", "src/util/files.cpp", "src/util/strings.cpp"]
+    prefixes, entries = prefix_tree.getCompressedPaths(relPaths, getPrefixName)
+
+    assert prefixes == []
+    assert entries == ["${PROJECT_SOURCE_DIR}/" + relPath for relPath in relPaths]
+
+def testCompressedListIsNeverLonger():
+    relPaths = ["a/b/c/d/" + str(index) + ".cpp" for index in range(3)] + ["a/x.cpp", "e/f.cpp", "e/g/h.cpp"]
+    for getName in [getPrefixName, lambda index : "A_VERY_LONG_OUTPUT_ITEM_NAME_SOURCE_PREFIX_" + str(index)]:
+        prefixes, entries = prefix_tree.getCompressedPaths(relPaths, getName)
+        compressedLength = sum(len("set( " + name + " " + value + " )\n") for name, value in prefixes) + sum(len(entry) for entry in entries)
+        assert compressedLength <= sum(len("${PROJECT_SOURCE_DIR}/" + relPath) for relPath in relPaths)
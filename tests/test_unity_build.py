@@ -0,0 +1,59 @@
+import pytest
+
+import data
+import HelperVariables
+import write_organizer
+from conftest import getProjectJSON, getStaticLib
+
+SOURCE_FILES = {
+    "src/a.cpp": "int a;\n",
+    "src/b.cpp": "int b;\n",
+    "src/c.cpp": "int c;\n",
+    "src/util/u.cpp": "int u;\n",
+    "src/util/w.cpp": "int w;\n"
+}
+
+# Two libraries compiling the same sources, with different batch sizes
+def getSharedSourceProject(staticLibOptions={}):
+    return getProjectJSON({
+        "shared_lib": getStaticLib(["src"], type="shared_lib", unity_batch_bytes=1000),
+        "static_lib": getStaticLib(["src"], **staticLibOptions)
+    }, unity_build=True, unity_batch_bytes=30)
+
+# UNITY_GROUP is a source property, so output items compiling the same files must put them in the same groups
+def testSharedSourcesGetOneLayout(makeProject):
+    rootPath = makeProject(getSharedSourceProject(), SOURCE_FILES)
+    jsonDataObject = data.Data(str(rootPath), False)
+
+    sharedBatches = jsonDataObject.output["shared_lib"][HelperVariables.UNITY_BATCHES_TAGNAME]
+    staticBatches = jsonDataObject.output["static_lib"][HelperVariables.UNITY_BATCHES_TAGNAME]
+    assert len(sharedBatches) > 0
+    assert sharedBatches == staticBatches
+    # The smaller unity_batch_bytes of the two is used
+    for _groupName, batch in sharedBatches:
+        assert sum(len(SOURCE_FILES[relPath]) for relPath in batch) <= 30
+
+    groupNames = [groupName for groupName, _batch in sharedBatches]
+    assert len(set(groupNames)) == len(groupNames)
+
+def testSharedSourcesWrittenOnce(makeProject):
+    rootPath = makeProject(getSharedSourceProject(), SOURCE_FILES)
+    write_organizer.writeCMakeFiles(str(rootPath), useScanCache=False)
+    cmakeLists = (rootPath / "CMakeLists.txt").read_text()
+
+    # Each group is given its files once per target, always under the same name
+    groupLines = [line.strip() for line in cmakeLists.splitlines() if "PROPERTIES UNITY_GROUP" in line]
+    assert len(groupLines) > 0
+    assert len(groupLines) == 2 * len(set(groupLines))
+
+def testSharedSourceExclusionMismatch(makeProject):
+    rootPath = makeProject(getSharedSourceProject({ "unity_exclude": ["src/util"] }), SOURCE_FILES)
+    with pytest.raises(KeyError, match="unity_exclude"):
+        data.Data(str(rootPath), False)
+
+# Files too big to share a batch with anything leave no batches, and then no unity build block is written
+def testNoBatchesSkipsBlock(makeProject):
+    rootPath = makeProject(getProjectJSON({ "lib": getStaticLib(["src"]) }, unity_build=True, unity_batch_bytes=5), SOURCE_FILES)
+    write_organizer.writeCMakeFiles(str(rootPath), useScanCache=False)
+
+    assert not "UNITY_BUILD" in (rootPath / "CMakeLists.txt").read_text()
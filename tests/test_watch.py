@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+import data
+import HelperVariables
+import watch
+from conftest import getProjectJSON, getStaticLib
+
+SOURCE_FILES = {
+    "src/a.cpp": "int a;\n",
+    "src/b.cpp": "int b;\n"
+}
+
+def getUnityProject():
+    return getProjectJSON({ "lib": getStaticLib(["src"]) }, unity_build=True, unity_batch_bytes=100)
+
+def getAbsPath(rootPath, relPath):
+    return os.path.normpath(os.path.abspath(str(rootPath / relPath)))
+
+# Unity batches depend on file sizes, so the files of unity building output items are watched for edits
+def testContentPathsOfUnityBuild(makeProject):
+    rootPath = makeProject(getUnityProject(), SOURCE_FILES)
+    jsonDataObject = data.Data(str(rootPath), False)
+
+    assert sorted(watch.getContentWatchedPaths(jsonDataObject)) == [getAbsPath(rootPath, "src/a.cpp"), getAbsPath(rootPath, "src/b.cpp")]
+
+def testNoContentPathsWithoutContentOptions(makeProject):
+    rootPath = makeProject(getProjectJSON({ "lib": getStaticLib(["src"]) }), SOURCE_FILES)
+    assert watch.getContentWatchedPaths(data.Data(str(rootPath), False)) == []
+
+def testPollingWatcherReportsContentWrites(makeProject):
+    rootPath = makeProject(getUnityProject(), SOURCE_FILES)
+    watcher = watch.PollingWatcher(pollInterval=0)
+    watcher.setWatchedPaths([str(rootPath / "src")], [getAbsPath(rootPath, "src/a.cpp")])
+
+    (rootPath / "src/a.cpp").write_text("int a = 1;\n")
+    assert watcher.waitForChanges() == [(getAbsPath(rootPath, "src/a.cpp"), False)]
+
+def testInotifyWatcherReportsContentWrites(makeProject):
+    rootPath = makeProject(getUnityProject(), SOURCE_FILES)
+    try:
+        watcher = watch.InotifyWatcher()
+    except OSError:
+        pytest.skip("inotify unavailable")
+    watcher.setWatchedPaths([getAbsPath(rootPath, "src")], [getAbsPath(rootPath, "src/a.cpp")])
+
+    # Only writes to the content paths are reported
+    (rootPath / "src/b.cpp").write_text("int b = 1;\n")
+    (rootPath / "src/a.cpp").write_text("int a = 1;\n")
+    assert watcher.waitForChanges() == [(getAbsPath(rootPath, "src/a.cpp"), False)]
+
+# Growing a file past the batch size takes it out of its unity batch
+def testContentWriteRegenerates(makeProject):
+    rootPath = makeProject(getUnityProject(), SOURCE_FILES)
+    jsonDataObject = data.Data(str(rootPath), False)
+    assert jsonDataObject.output["lib"][HelperVariables.UNITY_BATCHES_TAGNAME] == [("lib_unity_0", ["src/a.cpp", "src/b.cpp"])]
+
+    (rootPath / "src/a.cpp").write_text("int a;\n" + "// padding\n" * 20)
+    jsonChanged, changedRelPaths = watch.getRelevantChanges(str(rootPath), [(getAbsPath(rootPath, "src/a.cpp"), False)])
+    assert not jsonChanged
+    assert changedRelPaths == ["src/a.cpp"]
+
+    assert jsonDataObject.applyChanges(changedRelPaths)
+    assert jsonDataObject.output["lib"][HelperVariables.UNITY_BATCHES_TAGNAME] == []
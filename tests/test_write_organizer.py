@@ -0,0 +1,18 @@
+import write_organizer
+from conftest import getProjectJSON, getStaticLib
+
+# Fragments of removed output items are deleted, hand-written .cmake files are left alone
+def testOnlyGeneratedFragmentsDeleted(makeProject):
+    rootPath = makeProject(getProjectJSON({ "lib": getStaticLib(["src"]), "old": getStaticLib(["src"]) }, cmake_fragments=True), {
+        "src/a.cpp": "int a;\n",
+        "cmake_fragments/custom.cmake": "message( \"mine\" )\n",
+        "cmake_fragments/output_helpers.cmake": "message( \"mine\" )\n"
+    })
+    write_organizer.writeCMakeFiles(str(rootPath), useScanCache=False)
+    fragmentDir = rootPath / "cmake_fragments"
+    assert (fragmentDir / "output_old.cmake").is_file()
+
+    makeProject(getProjectJSON({ "lib": getStaticLib(["src"]) }, cmake_fragments=True))
+    write_organizer.writeCMakeFiles(str(rootPath), useScanCache=False)
+
+    assert sorted(path.name for path in fragmentDir.iterdir()) == ["custom.cmake", "links.cmake", "output_helpers.cmake", "output_lib.cmake", "settings.cmake"]
@@ -0,0 +1,95 @@
+import math
+import os
+import posixpath
+
+import file_scan
+
+# Default total size (in bytes) of the source files compiled together in one unity batch
+DEFAULT_BATCH_BYTES = 256 * 1024
+
+# UNITY_BUILD_MODE GROUP needs CMake 3.18. Older versions build every file on its own.
+MIN_CMAKE_VERSION = "3.18"
+
+# True if relPath is one of excludedPaths, or inside one of them. (All normalized, relative to the project root)
+def isExcluded(relPath, excludedPaths):
+    for excludedPath in excludedPaths:
+        if file_scan.isSameOrUnder(relPath, excludedPath):
+            return True
+    return False
+
+# Size of the file in bytes, or 0 if it can't be read. (Base files may not exist yet)
+def getFileCost(basePath, relPath):
+    try:
+        return os.stat(os.path.join(str(basePath), relPath)).st_size
+    except OSError:
+        return 0
+
+# Fill batchCount batches (or more, if maxBatchCost doesn't allow that few) with the files in order.
+# Each batch aims for an equal share of the cost that is still left, so the batches end up evenly sized.
+def _fillBatches(relPaths, costs, maxBatchCost, batchCount):
+    batches = []
+    remainingCost = sum(costs)
+    fileIndex = 0
+    while fileIndex < len(relPaths):
+        targetCost = remainingCost / max(1, batchCount - len(batches))
+        batch = [relPaths[fileIndex]]
+        batchCost = costs[fileIndex]
+        fileIndex += 1
+
+        # A file is added if that leaves the batch closer to the target than not adding it
+        while fileIndex < len(relPaths) and batchCost + costs[fileIndex] <= maxBatchCost and batchCost + costs[fileIndex] / 2 <= targetCost:
+            batch.append(relPaths[fileIndex])
+            batchCost += costs[fileIndex]
+            fileIndex += 1
+
+        batches.append(batch)
+        remainingCost -= batchCost
+    return batches
+
+# Split the sorted files of a single directory into the fewest evenly sized batches of at most
+# maxBatchCost. A file costing more than maxBatchCost gets a batch of its own.
+def _splitDirectory(relPaths, costs, maxBatchCost):
+    batchCount = max(1, math.ceil(sum(costs) / maxBatchCost))
+    while True:
+        batches = _fillBatches(relPaths, costs, maxBatchCost, batchCount)
+        if len(batches) <= batchCount:
+            return batches
+        batchCount += 1
+
+# Group the source files into unity batches. Files are grouped by directory, since files next to
+# each other usually include the same headers. Directories too big for a single batch are split
+# into evenly sized batches, and neighbouring directories which fit together share one.
+# getCost(relPath) returns the cost (file size) of a file. Returns a list of batches, each a list of
+# paths in sorted order. Batches holding a single file are left out, since they gain nothing.
+def getUnityBatches(relPaths, getCost, maxBatchCost=DEFAULT_BATCH_BYTES):
+    pathsByDir = {}
+    for relPath in sorted(relPaths):
+        dirPath = posixpath.dirname(relPath)
+        if not dirPath in pathsByDir:
+            pathsByDir[dirPath] = []
+        pathsByDir[dirPath].append(relPath)
+
+    batches = []
+    # The last batch, while more directories can still be added to it
+    openBatch = None
+    openBatchCost = 0
+    for dirPath in sorted(pathsByDir):
+        dirPaths = pathsByDir[dirPath]
+        costs = [getCost(relPath) for relPath in dirPaths]
+        dirCost = sum(costs)
+
+        if openBatch != None and openBatchCost + dirCost <= maxBatchCost:
+            openBatch += dirPaths
+            openBatchCost += dirCost
+            continue
+
+        dirBatches = _splitDirectory(dirPaths, costs, maxBatchCost)
+        batches += dirBatches
+        # Only a directory which fit in one batch leaves room for the next one
+        if len(dirBatches) == 1 and dirCost < maxBatchCost:
+            openBatch = dirBatches[0]
+            openBatchCost = dirCost
+        else:
+            openBatch = None
+
+    return [batch for batch in batches if len(batch) > 1]
@@ -0,0 +1,267 @@
+import json
+import os
+
+import HelperVariables
+import link_graph
+
+# Validates a parsed cmake_data.json in a single pass, without touching the project's directories.
+# Every problem is collected, instead of stopping at the first one.
+
+# Value types
+TYPE_STRING = "a string"
+TYPE_BOOL = "a boolean"
+TYPE_POSITIVE_INT = "a positive integer"
+TYPE_OBJECT = "an object"
+TYPE_STRING_LIST = "an array of strings"
+TYPE_STANDARD = "a string or number"
+TYPE_STANDARD_LIST = "an array of strings or numbers"
+
+# Tag schemas map each allowed tag name to (isRequired, value type, why the tag is needed).
+# The 'why' messages match the ones Data gives when a tag is missing.
+
+ROOT_TAGS = {
+    HelperVariables.CMAKE_MIN_VERSION_TAGNAME: (False, TYPE_STANDARD, ""),
+    HelperVariables.PROJECT_NAME_TAGNAME: (True, TYPE_STRING, ""),
+    HelperVariables.DEFAULT_CPP_STANDARD_TAGNAME: (False, TYPE_STANDARD, ""),
+    HelperVariables.DEFAULT_C_STANDARD_TAGNAME: (False, TYPE_STANDARD, ""),
+    HelperVariables.ALLOWED_CPP_STANDARDS_TAGNAME: (True, TYPE_STANDARD_LIST, ""),
+    HelperVariables.ALLOWED_C_STANDARDS_TAGNAME: (True, TYPE_STANDARD_LIST, ""),
+    HelperVariables.OUTPUT_TAGNAME: (True, TYPE_OBJECT, ""),
+    HelperVariables.IMPORTED_LIBS_TAGNAME: (False, TYPE_OBJECT, ""),
+    HelperVariables.LINK_LIBS_TAGNAME: (False, TYPE_OBJECT, ""),
+    HelperVariables.TARGETS_TAGNAME: (True, TYPE_OBJECT, "Are you building a release binary? Or maybe a debug one? Add the 'targets' tag and add a build type to it."),
+    HelperVariables.DEFAULT_TARGET_TAGNAME: (False, TYPE_STRING, ""),
+    HelperVariables.EXCLUDE_TAGNAME: (False, TYPE_STRING_LIST, ""),
+    HelperVariables.USE_GITIGNORE_TAGNAME: (False, TYPE_BOOL, ""),
+    HelperVariables.FOLLOW_SYMLINKS_TAGNAME: (False, TYPE_BOOL, ""),
+    HelperVariables.CMAKE_FRAGMENTS_TAGNAME: (False, TYPE_BOOL, ""),
+    HelperVariables.COMPRESS_SOURCE_LISTS_TAGNAME: (False, TYPE_BOOL, ""),
+    HelperVariables.GLOB_SOURCES_TAGNAME: (False, TYPE_BOOL, ""),
+    HelperVariables.MINIMAL_INCLUDES_TAGNAME: (False, TYPE_BOOL, ""),
+    HelperVariables.UNITY_BUILD_TAGNAME: (False, TYPE_BOOL, ""),
+    HelperVariables.UNITY_BATCH_BYTES_TAGNAME: (False, TYPE_POSITIVE_INT, ""),
+    HelperVariables.PRECOMPILE_HEADERS_TAGNAME: (False, TYPE_BOOL, ""),
+    HelperVariables.PCH_BUDGET_BYTES_TAGNAME: (False, TYPE_POSITIVE_INT, ""),
+    HelperVariables.SHARE_OBJECT_FILES_TAGNAME: (False, TYPE_BOOL, "")
+}
+
+OUTPUT_ITEM_TAGS = {
+    HelperVariables.TYPE_TAGNAME: (True, TYPE_STRING, "Without a type, we do not know what to compile your code into. Options: \"executable\", \"static_lib\", \"shared_lib\""),
+    HelperVariables.BASE_FILE_TAGNAME: (False, TYPE_STRING, ""),
+    HelperVariables.R_SOURCE_DIRS_TAGNAME: (True, TYPE_STRING_LIST, "These are the base directories to be recursively searched for source files. If you are only compiling the (optional) base file, still include this tag with an empty array."),
+    HelperVariables.R_HEADER_DIRS_TAGNAME: (True, TYPE_STRING_LIST, "Without header files, your files will not be able to include other files, and your program may not compile."),
+    HelperVariables.R_INCLUDE_DIRS_TAGNAME: (True, TYPE_STRING_LIST, "Without passing the include directories of your header files to the compiler, there is a good chance they may not be included."),
+    HelperVariables.IND_INCLUDE_DIRS_TAGNAME: (False, TYPE_STRING_LIST, ""),
+    HelperVariables.EXCLUDE_TAGNAME: (False, TYPE_STRING_LIST, ""),
+    HelperVariables.EXE_OUTPUT_DIR_TAGNAME: (False, TYPE_STRING, ""),
+    HelperVariables.ARCHIVE_OUTPUT_DIR_TAGNAME: (False, TYPE_STRING, ""),
+    HelperVariables.LIB_OUTPUT_DIR_TAGNAME: (False, TYPE_STRING, ""),
+    HelperVariables.COMPRESS_SOURCE_LISTS_TAGNAME: (False, TYPE_BOOL, ""),
+    HelperVariables.GLOB_SOURCES_TAGNAME: (False, TYPE_BOOL, ""),
+    HelperVariables.MINIMAL_INCLUDES_TAGNAME: (False, TYPE_BOOL, ""),
+    HelperVariables.UNITY_BUILD_TAGNAME: (False, TYPE_BOOL, ""),
+    HelperVariables.UNITY_BATCH_BYTES_TAGNAME: (False, TYPE_POSITIVE_INT, ""),
+    HelperVariables.UNITY_EXCLUDE_TAGNAME: (False, TYPE_STRING_LIST, ""),
+    HelperVariables.PRECOMPILE_HEADERS_TAGNAME: (False, TYPE_BOOL, ""),
+    HelperVariables.PCH_BUDGET_BYTES_TAGNAME: (False, TYPE_POSITIVE_INT, ""),
+    HelperVariables.PCH_INCLUDE_TAGNAME: (False, TYPE_STRING_LIST, ""),
+    HelperVariables.PCH_EXCLUDE_TAGNAME: (False, TYPE_STRING_LIST, ""),
+    HelperVariables.SHARE_OBJECT_FILES_TAGNAME: (False, TYPE_BOOL, "")
+}
+
+# Output directory tags required by each output type
+EXE_OUTPUT_ITEM_TAGS = {
+    HelperVariables.EXE_OUTPUT_DIR_TAGNAME: (True, TYPE_STRING, "Specifies the directory into which the executable will be build. (Don't use a beginning /)")
+}
+
+LIB_OUTPUT_ITEM_TAGS = {
+    HelperVariables.ARCHIVE_OUTPUT_DIR_TAGNAME: (True, TYPE_STRING, "Specifies the directory into which the library 'archive' files will be built. (Don't use a beginning /)"),
+    HelperVariables.LIB_OUTPUT_DIR_TAGNAME: (True, TYPE_STRING, "Specifies the directory into which the library files will be built. (Don't use a beginning /)")
+}
+
+IMPORTED_LIB_TAGS = {
+    HelperVariables.TYPE_TAGNAME: (False, TYPE_STRING, ""),
+    HelperVariables.ROOT_DIR_TAGNAME: (True, TYPE_STRING, "A root directory should be defined so that library files can easily be found."),
+    HelperVariables.LIB_FILES_TAGNAME: (True, TYPE_STRING_LIST, "Imported library file names must be given, otherwise no libraries will be imported. Please add at least one lib name to import."),
+    HelperVariables.R_INCLUDE_DIRS_TAGNAME: (True, TYPE_STRING_LIST, "An array of directories to recursively search for header files should be given here, so that header files needed on library import can be found. If for some reason you do not to import any header files for this project, please define this as an empty array."),
+    HelperVariables.R_HEADER_DIRS_TAGNAME: (True, TYPE_STRING_LIST, "An array of directories to recursively search for header files should be given here, so that header files needed on library import can be found. If for some reason you do not to import any header files for this project, please define this as an empty array."),
+    HelperVariables.IND_INCLUDE_DIRS_TAGNAME: (False, TYPE_STRING_LIST, ""),
+    HelperVariables.EXCLUDE_TAGNAME: (False, TYPE_STRING_LIST, ""),
+    HelperVariables.FROZEN_TAGNAME: (False, TYPE_BOOL, "")
+}
+
+TARGET_TAGS = {
+    HelperVariables.CPP_FLAGS_TAGNAME: (True, TYPE_STRING_LIST, "C++ compiler flags must be defined (as an array). If for some reason you aren't using any compiler flags, still define this tag as an empty array."),
+    HelperVariables.C_FLAGS_TAGNAME: (True, TYPE_STRING_LIST, "C compiler flags must be defined (as an array). If for some reason you aren't using any compiler flags, still define this tag as an emtpy string.")
+}
+
+IMPORTED_LIB_TYPES = ["shared", HelperVariables.OUTPUT_TYPES["SHARED_LIB"], "static", HelperVariables.OUTPUT_TYPES["STATIC_LIB"]]
+
+# Raised by Data when cmake_data.json is invalid. Holds every problem found, one per line.
+class ValidationError(KeyError):
+    def __init__(self, errors):
+        super().__init__("\n".join(errors))
+        self.errors = errors
+
+    # KeyError would show the message quoted, on a single line
+    def __str__(self):
+        return self.args[0]
+
+def getMissingTagMessage(tag, parentTag="", why=""):
+    errorMessage = "Tag \"" + tag + "\" missing in " + HelperVariables.JSON_FILE_NAME + ". "
+
+    if parentTag == "":
+        errorMessage += "Please add it to the file."
+    else:
+        errorMessage += "Please add it inside its parent tag \"" + parentTag + "\"."
+
+    if why != "":
+        errorMessage += "\n" + why
+    return errorMessage
+
+def _isStandard(value):
+    return isinstance(value, str) or (isinstance(value, (int, float)) and not isinstance(value, bool))
+
+def _hasType(value, valueType):
+    if valueType == TYPE_STRING:
+        return isinstance(value, str)
+    elif valueType == TYPE_BOOL:
+        return isinstance(value, bool)
+    elif valueType == TYPE_POSITIVE_INT:
+        return isinstance(value, int) and not isinstance(value, bool) and value > 0
+    elif valueType == TYPE_OBJECT:
+        return isinstance(value, dict)
+    elif valueType == TYPE_STRING_LIST:
+        return isinstance(value, list) and all(isinstance(item, str) for item in value)
+    elif valueType == TYPE_STANDARD:
+        return _isStandard(value)
+    elif valueType == TYPE_STANDARD_LIST:
+        return isinstance(value, list) and all(_isStandard(item) for item in value)
+    return False
+
+# Check jsonObject against tagSchema, adding any problems to 'errors' and 'warnings'.
+# Returns True if jsonObject is an object, so its tags can be looked at further.
+def _checkObject(jsonObject, tagSchema, parentTag, errors, warnings):
+    if not isinstance(jsonObject, dict):
+        errors.append("\"" + parentTag + "\" must be an object.")
+        return False
+
+    for tag, (isRequired, valueType, why) in tagSchema.items():
+        if not tag in jsonObject:
+            if isRequired:
+                errors.append(getMissingTagMessage(tag, parentTag, why))
+        elif not _hasType(jsonObject[tag], valueType):
+            errors.append("Tag \"" + tag + "\"" + ("" if parentTag == "" else " in \"" + parentTag + "\"") + " must be " + valueType + ".")
+
+    for tag in jsonObject:
+        if not tag in tagSchema:
+            warnings.append("Unknown tag \"" + tag + "\"" + ("" if parentTag == "" else " in \"" + parentTag + "\"") + " is ignored.")
+    return True
+
+def _checkOutputItem(outputName, outputItem, errors, warnings):
+    if not _checkObject(outputItem, OUTPUT_ITEM_TAGS, outputName, errors, warnings):
+        return
+
+    # Types are case insensitive
+    outputType = outputItem.get(HelperVariables.TYPE_TAGNAME)
+    if isinstance(outputType, str) and outputType.lower() == HelperVariables.OUTPUT_TYPES["EXE"]:
+        _checkObject(outputItem, EXE_OUTPUT_ITEM_TAGS, outputName, errors, [])
+    elif isinstance(outputType, str) and outputType.lower() in [HelperVariables.OUTPUT_TYPES["STATIC_LIB"], HelperVariables.OUTPUT_TYPES["SHARED_LIB"]]:
+        _checkObject(outputItem, LIB_OUTPUT_ITEM_TAGS, outputName, errors, [])
+    elif isinstance(outputType, str):
+        errors.append("Invalid type \"" + outputType + "\" given to output item \"" + outputName + "\". Options: \"executable\", \"static_lib\", \"shared_lib\"")
+
+def _checkImportedLib(libName, importedLib, errors, warnings):
+    if not _checkObject(importedLib, IMPORTED_LIB_TAGS, libName, errors, warnings):
+        return
+
+    libType = importedLib.get(HelperVariables.TYPE_TAGNAME)
+    if libType == None:
+        warnings.append("Imported lib \"" + libName + "\" has no \"" + HelperVariables.TYPE_TAGNAME + "\". Options: \"" + "\", \"".join(IMPORTED_LIB_TYPES) + "\"")
+    elif isinstance(libType, str) and not libType in IMPORTED_LIB_TYPES:
+        errors.append("Invalid type \"" + libType + "\" given to imported lib \"" + libName + "\". Options: \"" + "\", \"".join(IMPORTED_LIB_TYPES) + "\"")
+
+def _checkLinks(parsedJSON, errors):
+    outputNames = parsedJSON[HelperVariables.OUTPUT_TAGNAME] if isinstance(parsedJSON.get(HelperVariables.OUTPUT_TAGNAME), dict) else {}
+    importedLibNames = parsedJSON[HelperVariables.IMPORTED_LIBS_TAGNAME] if isinstance(parsedJSON.get(HelperVariables.IMPORTED_LIBS_TAGNAME), dict) else {}
+    errorCount = len(errors)
+
+    for outputName, libNames in parsedJSON[HelperVariables.LINK_LIBS_TAGNAME].items():
+        if not outputName in outputNames:
+            errors.append("\"" + outputName + "\" tag in \"link_libs\" not found in \"output\". Make sure your names match.")
+        if not _hasType(libNames, TYPE_STRING_LIST):
+            errors.append("Tag \"" + outputName + "\" in \"link_libs\" must be " + TYPE_STRING_LIST + ".")
+            continue
+        for libName in libNames:
+            if not libName in outputNames and not libName in importedLibNames:
+                errors.append("\"" + libName + "\" linked to \"" + outputName + "\" in \"link_libs\" not found in \"output\" nor \"imported_libs\". Make sure your names match.")
+            elif libName == outputName:
+                errors.append("\"" + outputName + "\" can't link to itself in \"link_libs\".")
+
+    # Loops longer than a single item can only be found once every linked name is known to exist
+    if len(errors) == errorCount and isinstance(parsedJSON.get(HelperVariables.OUTPUT_TAGNAME), dict) and isinstance(parsedJSON.get(HelperVariables.IMPORTED_LIBS_TAGNAME, {}), dict):
+        try:
+            link_graph.LinkGraph(parsedJSON)
+        except KeyError as e:
+            errors.append(e.args[0])
+
+# Check a parsed cmake_data.json. Returns (errors, warnings), both lists of messages.
+# Errors stop the project from being generated. Warnings are things which are ignored, such as unknown tags.
+def validateJSON(parsedJSON):
+    errors = []
+    warnings = []
+    if not _checkObject(parsedJSON, ROOT_TAGS, "", errors, warnings):
+        return errors, warnings
+
+    if isinstance(parsedJSON.get(HelperVariables.OUTPUT_TAGNAME), dict):
+        if len(parsedJSON[HelperVariables.OUTPUT_TAGNAME]) == 0:
+            errors.append(getMissingTagMessage("any tag name", HelperVariables.OUTPUT_TAGNAME, "An item must be added to the output tag, otherwise nothing will be compiled and/or built"))
+        for outputName, outputItem in parsedJSON[HelperVariables.OUTPUT_TAGNAME].items():
+            _checkOutputItem(outputName, outputItem, errors, warnings)
+
+    if isinstance(parsedJSON.get(HelperVariables.IMPORTED_LIBS_TAGNAME), dict):
+        for libName, importedLib in parsedJSON[HelperVariables.IMPORTED_LIBS_TAGNAME].items():
+            _checkImportedLib(libName, importedLib, errors, warnings)
+
+    if isinstance(parsedJSON.get(HelperVariables.TARGETS_TAGNAME), dict):
+        for targetName, target in parsedJSON[HelperVariables.TARGETS_TAGNAME].items():
+            _checkObject(target, TARGET_TAGS, targetName, errors, warnings)
+        defaultTarget = parsedJSON.get(HelperVariables.DEFAULT_TARGET_TAGNAME, "")
+        if isinstance(defaultTarget, str) and defaultTarget != "" and not defaultTarget in parsedJSON[HelperVariables.TARGETS_TAGNAME]:
+            errors.append("\"" + HelperVariables.DEFAULT_TARGET_TAGNAME + "\" \"" + defaultTarget + "\" not found in \"targets\".")
+
+    if isinstance(parsedJSON.get(HelperVariables.LINK_LIBS_TAGNAME), dict):
+        _checkLinks(parsedJSON, errors)
+
+    return errors, warnings
+
+# Raise a ValidationError listing every error in parsedJSON, if there are any
+def raiseIfInvalid(parsedJSON):
+    errors, _warnings = validateJSON(parsedJSON)
+    if len(errors) > 0:
+        raise ValidationError(errors)
+
+# Validate the cmake_data.json file of each project directory, printing every problem found.
+# Only the cmake_data.json files are read. Returns the process exit code (1 if any file is invalid).
+def checkProjects(projectDirs):
+    invalidCount = 0
+    for projectDir in projectDirs:
+        jsonFilePath = os.path.join(projectDir, HelperVariables.JSON_FILE_NAME)
+        try:
+            with open(jsonFilePath) as jsonFile:
+                errors, warnings = validateJSON(json.load(jsonFile))
+        except OSError as e:
+            errors, warnings = ["Could not read " + jsonFilePath + ": " + e.strerror], []
+        except json.JSONDecodeError as e:
+            errors, warnings = ["Problem with JSON: " + str(e)], []
+
+        if len(errors) > 0:
+            invalidCount += 1
+        print(("INVALID " if len(errors) > 0 else "OK      ") + jsonFilePath)
+        for message in errors:
+            print("    ERROR: " + message.replace("\n", "\n        "))
+        for message in warnings:
+            print("    WARNING: " + message)
+
+    print("\n{} checked, {} invalid".format(len(projectDirs), invalidCount))
+    return 1 if invalidCount > 0 else 0
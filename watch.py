@@ -0,0 +1,247 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from json.decoder import JSONDecodeError
+from pathlib import Path
+
+import data
+import file_scan
+import ignore_rules
+import write_organizer
+
+POLL_INTERVAL_SECONDS = 1.0
+# Changes which arrive this close together are handled by a single regeneration.
+# (Editors and version control tend to touch several files at once)
+DEBOUNCE_SECONDS = 0.1
+
+# Values from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+INOTIFY_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+INOTIFY_EVENT_HEADER = struct.Struct("iIII")
+
+# Watches directories using Linux's inotify, through libc.
+# Raises OSError on construction if inotify isn't available.
+class InotifyWatcher():
+    def __init__(self):
+        libcName = ctypes.util.find_library("c")
+        if libcName == None:
+            raise OSError("libc not found, so inotify can't be used")
+        libc = ctypes.CDLL(libcName, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not supported on this platform")
+
+        self._addWatch = libc.inotify_add_watch
+        self._addWatch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._removeWatch = libc.inotify_rm_watch
+        self._removeWatch.argtypes = [ctypes.c_int, ctypes.c_int]
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, "inotify_init1 failed: " + os.strerror(errno))
+
+        self.dirsByWatch = {}
+        self.watchesByDir = {}
+        self.contentPaths = set()
+
+    # Watch exactly the given directories. Paths which aren't existing directories are skipped.
+    # Writes to the files in contentPathStrings (which must be inside watched directories) are reported too.
+    def setWatchedPaths(self, pathStrings, contentPathStrings=()):
+        self.contentPaths = set(contentPathStrings)
+        wantedDirs = set(pathStrings)
+        for dirPathString in list(self.watchesByDir):
+            if not dirPathString in wantedDirs:
+                self._removeWatch(self.fd, self.watchesByDir.pop(dirPathString))
+
+        for dirPathString in wantedDirs:
+            if not dirPathString in self.watchesByDir:
+                watchDescriptor = self._addWatch(self.fd, os.fsencode(dirPathString), INOTIFY_WATCH_MASK)
+                if watchDescriptor >= 0:
+                    self.watchesByDir[dirPathString] = watchDescriptor
+                    self.dirsByWatch[watchDescriptor] = dirPathString
+
+    # Block until something changes. Returns a list of (absolute path, isDir) tuples, or None if
+    # events were lost and everything should be regenerated.
+    def waitForChanges(self):
+        changes = []
+        lostEvents = False
+
+        select.select([self.fd], [], [])
+        while True:
+            try:
+                eventBuffer = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                readyFds, _, _ = select.select([self.fd], [], [], DEBOUNCE_SECONDS)
+                if len(readyFds) == 0:
+                    break
+                continue
+
+            offset = 0
+            while offset < len(eventBuffer):
+                watchDescriptor, mask, _cookie, nameLength = INOTIFY_EVENT_HEADER.unpack_from(eventBuffer, offset)
+                offset += INOTIFY_EVENT_HEADER.size
+                name = os.fsdecode(eventBuffer[offset : offset + nameLength].rstrip(b'\0'))
+                offset += nameLength
+
+                if mask & IN_Q_OVERFLOW:
+                    lostEvents = True
+                elif mask & IN_IGNORED:
+                    dirPathString = self.dirsByWatch.pop(watchDescriptor, None)
+                    if dirPathString != None and self.watchesByDir.get(dirPathString) == watchDescriptor:
+                        del self.watchesByDir[dirPathString]
+                elif mask & IN_CLOSE_WRITE and name != data.jsonFileName and name != ignore_rules.GITIGNORE_FILE_NAME and not os.path.join(self.dirsByWatch.get(watchDescriptor, ""), name) in self.contentPaths:
+                    # Only the contents of cmake_data.json, .gitignore and the content paths matter.
+                    # Edits to any other file don't change what gets generated
+                    continue
+                elif watchDescriptor in self.dirsByWatch:
+                    dirPathString = self.dirsByWatch[watchDescriptor]
+                    if name == "":
+                        changes.append((dirPathString, True))
+                    else:
+                        changes.append((os.path.join(dirPathString, name), bool(mask & IN_ISDIR)))
+
+        return None if lostEvents else changes
+
+# Fallback watcher which compares stat snapshots of the watched paths every pollInterval seconds.
+# The content paths are files, which are compared by modification time and size.
+class PollingWatcher():
+    def __init__(self, pollInterval=POLL_INTERVAL_SECONDS):
+        self.pollInterval = pollInterval
+        self.snapshot = {}
+        self.contentPaths = set()
+
+    @staticmethod
+    def takeSnapshot(pathStrings):
+        snapshot = {}
+        for pathString in pathStrings:
+            try:
+                pathStat = os.stat(pathString)
+                snapshot[pathString] = (pathStat.st_mtime_ns, pathStat.st_size)
+            except OSError:
+                snapshot[pathString] = None
+        return snapshot
+
+    def setWatchedPaths(self, pathStrings, contentPathStrings=()):
+        self.contentPaths = set(contentPathStrings)
+        self.snapshot = PollingWatcher.takeSnapshot(list(pathStrings) + list(contentPathStrings))
+
+    def waitForChanges(self):
+        while True:
+            time.sleep(self.pollInterval)
+            newSnapshot = PollingWatcher.takeSnapshot(self.snapshot)
+            changes = [(pathString, not pathString in self.contentPaths) for pathString in newSnapshot if newSnapshot[pathString] != self.snapshot[pathString]]
+            if len(changes) > 0:
+                self.snapshot = newSnapshot
+                return changes
+
+# Use inotify when possible, otherwise fall back to polling
+def createWatcher(forcePolling=False):
+    if not forcePolling:
+        try:
+            return InotifyWatcher()
+        except OSError as e:
+            print("inotify unavailable (" + str(e) + "), falling back to polling")
+    return PollingWatcher()
+
+# Every path which should be watched for the given project. jsonDataObject may be None
+# if the project couldn't be loaded, in which case only cmake_data.json and .gitignore are watched.
+def getWatchedPaths(rootDirAbs, jsonDataObject, watcher):
+    if isinstance(watcher, InotifyWatcher):
+        # cmake_data.json and .gitignore changes are seen through the project root directory
+        watchedPaths = [rootDirAbs]
+    else:
+        watchedPaths = [os.path.join(rootDirAbs, data.jsonFileName), os.path.join(rootDirAbs, ignore_rules.GITIGNORE_FILE_NAME)]
+
+    if jsonDataObject != None:
+        watchedPaths += jsonDataObject.scanIndex.getListedDirPaths()
+        watchedPaths += [os.path.normpath(os.path.join(rootDirAbs, scanRoot)) for scanRoot in jsonDataObject.getScanRoots()]
+    return list(dict.fromkeys(watchedPaths))
+
+# Files whose edits change the generated CMakeLists.txt (see Data.getContentDependentPaths)
+def getContentWatchedPaths(jsonDataObject):
+    if jsonDataObject == None:
+        return []
+    return jsonDataObject.getContentDependentPaths()
+
+# Sort raw watcher changes into whether cmake_data.json (or the project's .gitignore, which changes what
+# is scanned) changed, and the relative paths of changed directories and source/header files. Everything
+# else (hidden files, files with irrelevant extensions such as the generated CMakeLists.txt) is ignored.
+def getRelevantChanges(rootDirAbs, changes):
+    jsonChanged = False
+    changedRelPaths = []
+    for pathString, isDir in changes:
+        relPath = Path(os.path.relpath(pathString, rootDirAbs)).as_posix()
+        name = Path(relPath).name
+
+        if relPath == data.jsonFileName or relPath == ignore_rules.GITIGNORE_FILE_NAME:
+            jsonChanged = True
+        elif relPath != "." and name[0] == '.':
+            continue
+        elif isDir or file_scan.getFileExtension(name) in data.allFileTypes:
+            changedRelPaths.append(relPath)
+    return jsonChanged, changedRelPaths
+
+def _reportWrite(wasWritten):
+    if wasWritten:
+        print("CMakeLists.txt file written successfully!")
+    else:
+        print("CMakeLists.txt unchanged")
+
+def _loadAndWrite(rootDir, useScanCache, jobs, onlyOutputs):
+    try:
+        jsonDataObject = write_organizer.loadData(rootDir, useScanCache, jobs, onlyOutputs=onlyOutputs)
+        _reportWrite(write_organizer.writeDataToCMakeFiles(rootDir, jsonDataObject))
+        return jsonDataObject
+    except (OSError, JSONDecodeError, KeyError, TypeError) as e:
+        print("ERROR:", str(e))
+        print("Waiting for cmake_data.json to change...")
+        return None
+
+# Stay resident and regenerate CMakeLists.txt whenever cmake_data.json changes, or a source or
+# header file is added to (or removed from) one of the scanned directories. Edits to the files of output
+# items using minimal_includes, unity_build or precompile_headers regenerate too. Only the output
+# items and imported libs affected by a file change are rescanned.
+# With onlyOutputs, only those output items (and whatever they link to) are generated and watched.
+def watchProject(rootDir, useScanCache=True, forcePolling=False, jobs=1, onlyOutputs=None):
+    rootDirAbs = os.path.abspath(rootDir)
+    watcher = createWatcher(forcePolling)
+
+    jsonDataObject = _loadAndWrite(rootDir, useScanCache, jobs, onlyOutputs)
+    print("Watching", rootDirAbs, "for changes. Press Ctrl+C to stop.")
+    sys.stdout.flush()
+
+    while True:
+        watcher.setWatchedPaths(getWatchedPaths(rootDirAbs, jsonDataObject, watcher), getContentWatchedPaths(jsonDataObject))
+        changes = watcher.waitForChanges()
+
+        if changes == None:
+            jsonChanged, changedRelPaths = True, []
+        else:
+            jsonChanged, changedRelPaths = getRelevantChanges(rootDirAbs, changes)
+
+        if jsonChanged or (jsonDataObject == None and len(changedRelPaths) > 0):
+            jsonDataObject = _loadAndWrite(rootDir, useScanCache, jobs, onlyOutputs)
+        elif len(changedRelPaths) > 0:
+            try:
+                if jsonDataObject.applyChanges(changedRelPaths):
+                    _reportWrite(write_organizer.writeDataToCMakeFiles(rootDir, jsonDataObject))
+            except (OSError, KeyError, TypeError) as e:
+                print("ERROR:", str(e))
+        sys.stdout.flush()
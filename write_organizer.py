@@ -1,39 +1,68 @@
 from json.decoder import JSONDecodeError
+import os
 from data import Data
 from file_write import CMakeBuilder
 
 import HelperFunctions
 import HelperVariables
+import instrumentation
 
 # Write CMake project version
+@instrumentation.timed("write_organizer.writeProjectVersion")
 def writeProjectVersion(fileWriter, jsonDataObject):
     # fileWriter.writeVersion(jsonDataObject.cmake_tag_version)
     fileWriter.writeVersion("3.12")
 
 # Write project name
+@instrumentation.timed("write_organizer.writeProjectName")
 def writeProjectName(fileWriter, jsonDataObject):
     fileWriter.writeProjectName(jsonDataObject.project_name)
 
 # Write project output items
+@instrumentation.timed("write_organizer.writeProjectOutputs")
 def writeProjectOutputs(fileWriter, jsonDataObject):
     for outputNameKey in jsonDataObject.output:
-        outputItem = jsonDataObject.output[outputNameKey]
-        if outputItem[HelperVariables.TYPE_TAGNAME] == HelperVariables.OUTPUT_TYPES["EXE"]:
-            fileWriter.writeExecutableOutput(outputNameKey, outputItem[HelperVariables.SOURCE_FILES_TAGNAME], outputItem[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME], outputItem[HelperVariables.EXE_OUTPUT_DIR_TAGNAME])
-        elif outputItem[HelperVariables.TYPE_TAGNAME] == HelperVariables.OUTPUT_TYPES["STATIC_LIB"]:
-            fileWriter.writeLibraryOutput(outputNameKey, True, outputItem[HelperVariables.SOURCE_FILES_TAGNAME], outputItem[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME], outputItem[HelperVariables.ARCHIVE_OUTPUT_DIR_TAGNAME], outputItem[HelperVariables.LIB_OUTPUT_DIR_TAGNAME])
-        elif outputItem[HelperVariables.TYPE_TAGNAME] == HelperVariables.OUTPUT_TYPES["SHARED_LIB"]:
-            # Can assume the output type is "shared_lib" at this point
-            fileWriter.writeLibraryOutput(outputNameKey, False, outputItem[HelperVariables.SOURCE_FILES_TAGNAME], outputItem[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME], outputItem[HelperVariables.ARCHIVE_OUTPUT_DIR_TAGNAME], outputItem[HelperVariables.LIB_OUTPUT_DIR_TAGNAME])
-        # else:
-            # Raise some sort of 'invalid output type given' error. This code should never be reached due to type checking in the data class, but you never know.
+        writeProjectOutput(fileWriter, jsonDataObject, outputNameKey)
+
+# Write a single output item
+@instrumentation.timed("write_organizer.writeProjectOutput")
+def writeProjectOutput(fileWriter, jsonDataObject, outputNameKey):
+    outputItem = jsonDataObject.output[outputNameKey]
+    # OBJECT libraries are written just before the first output item using them
+    for objectLibName in outputItem[HelperVariables.OBJECT_LIBS_TAGNAME]:
+        if jsonDataObject.object_libs[objectLibName][HelperVariables.OBJECT_LIB_OWNERS_TAGNAME][0] == outputNameKey:
+            writeProjectObjectLib(fileWriter, jsonDataObject, objectLibName)
+
+    sourceFiles = jsonDataObject.getCompiledSourceFiles(outputNameKey)
+    if outputItem[HelperVariables.TYPE_TAGNAME] == HelperVariables.OUTPUT_TYPES["EXE"]:
+        fileWriter.writeExecutableOutput(outputNameKey, sourceFiles, outputItem[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME], outputItem[HelperVariables.EXE_OUTPUT_DIR_TAGNAME], outputItem[HelperVariables.COMPRESS_SOURCE_LISTS_TAGNAME], outputItem[HelperVariables.SOURCE_GLOBS_TAGNAME], outputItem[HelperVariables.UNITY_BATCHES_TAGNAME], outputItem[HelperVariables.UNITY_EXCLUDED_FILES_TAGNAME], outputItem[HelperVariables.PRECOMPILED_HEADERS_TAGNAME], jsonDataObject.follow_symlinks)
+    elif outputItem[HelperVariables.TYPE_TAGNAME] == HelperVariables.OUTPUT_TYPES["STATIC_LIB"]:
+        fileWriter.writeLibraryOutput(outputNameKey, True, sourceFiles, outputItem[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME], outputItem[HelperVariables.ARCHIVE_OUTPUT_DIR_TAGNAME], outputItem[HelperVariables.LIB_OUTPUT_DIR_TAGNAME], outputItem[HelperVariables.COMPRESS_SOURCE_LISTS_TAGNAME], outputItem[HelperVariables.SOURCE_GLOBS_TAGNAME], outputItem[HelperVariables.UNITY_BATCHES_TAGNAME], outputItem[HelperVariables.UNITY_EXCLUDED_FILES_TAGNAME], outputItem[HelperVariables.PRECOMPILED_HEADERS_TAGNAME], jsonDataObject.follow_symlinks)
+    elif outputItem[HelperVariables.TYPE_TAGNAME] == HelperVariables.OUTPUT_TYPES["SHARED_LIB"]:
+        # Can assume the output type is "shared_lib" at this point
+        fileWriter.writeLibraryOutput(outputNameKey, False, sourceFiles, outputItem[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME], outputItem[HelperVariables.ARCHIVE_OUTPUT_DIR_TAGNAME], outputItem[HelperVariables.LIB_OUTPUT_DIR_TAGNAME], outputItem[HelperVariables.COMPRESS_SOURCE_LISTS_TAGNAME], outputItem[HelperVariables.SOURCE_GLOBS_TAGNAME], outputItem[HelperVariables.UNITY_BATCHES_TAGNAME], outputItem[HelperVariables.UNITY_EXCLUDED_FILES_TAGNAME], outputItem[HelperVariables.PRECOMPILED_HEADERS_TAGNAME], jsonDataObject.follow_symlinks)
+    # else:
+        # Raise some sort of 'invalid output type given' error. This code should never be reached due to type checking in the data class, but you never know.
+
+# Write a single OBJECT library of files shared by several output items
+@instrumentation.timed("write_organizer.writeProjectObjectLib")
+def writeProjectObjectLib(fileWriter, jsonDataObject, objectLibName):
+    objectLib = jsonDataObject.object_libs[objectLibName]
+    fileWriter.writeObjectLibrary(objectLibName, objectLib[HelperVariables.SOURCE_FILES_TAGNAME], objectLib[HelperVariables.INCLUDE_DIRECTORIES_TAGNAME], objectLib[HelperVariables.COMPRESS_SOURCE_LISTS_TAGNAME])
 
 # Write imported_libs
+@instrumentation.timed("write_organizer.writeProjectImportedLibs")
 def writeProjectImportedLibs(fileWriter, jsonDataObject):
     for importedLibName in jsonDataObject.imported_libs:
-        fileWriter.writeImportedLib(importedLibName, jsonDataObject.imported_libs[importedLibName][HelperVariables.LIB_FILES_TAGNAME], jsonDataObject.imported_libs[importedLibName][HelperVariables.INCLUDE_DIRECTORIES_TAGNAME], jsonDataObject.imported_libs[importedLibName][HelperVariables.HEADER_FILES_TAGNAME])
+        writeProjectImportedLib(fileWriter, jsonDataObject, importedLibName)
+
+# Write a single imported lib
+@instrumentation.timed("write_organizer.writeProjectImportedLib")
+def writeProjectImportedLib(fileWriter, jsonDataObject, importedLibName):
+    fileWriter.writeImportedLib(importedLibName, jsonDataObject.imported_libs[importedLibName][HelperVariables.LIB_FILES_TAGNAME], jsonDataObject.imported_libs[importedLibName][HelperVariables.INCLUDE_DIRECTORIES_TAGNAME], jsonDataObject.imported_libs[importedLibName][HelperVariables.HEADER_FILES_TAGNAME])
 
 # Write linked_libs
+@instrumentation.timed("write_organizer.writeProjectLinks")
 def writeProjectLinks(fileWriter, jsonDataObject):
     for outputName in jsonDataObject.link_libs:
         # This if statement might be unnecessary, since if no elements are
@@ -42,14 +71,17 @@ def writeProjectLinks(fileWriter, jsonDataObject):
             fileWriter.writeLinkedLibs(outputName, jsonDataObject.link_libs[outputName], jsonDataObject.imported_libs)
 
 # Write C++ standards
+@instrumentation.timed("write_organizer.writeProjectCppStandards")
 def writeProjectCppStandards(fileWriter, jsonDataObject):
     fileWriter.writeCppStandards(jsonDataObject.allowed_cpp_standards, jsonDataObject.default_cpp_standard)
 
 # Write C standards
+@instrumentation.timed("write_organizer.writeProjectCStandards")
 def writeProjectCStandards(fileWriter, jsonDataObject):
     fileWriter.writeCStandards(jsonDataObject.allowed_c_standards, jsonDataObject.default_c_standard)
 
 # Write project build targets
+@instrumentation.timed("write_organizer.writeProjectBuildTargets")
 def writeProjectBuildTargets(fileWriter, jsonDataObject):
     targetKeys = list(jsonDataObject.targets)
 
@@ -62,27 +94,119 @@ def writeProjectBuildTargets(fileWriter, jsonDataObject):
     for buildTargetName in targetKeys:
         fileWriter.writeBuildTarget(buildTargetName, jsonDataObject.targets[buildTargetName][HelperVariables.C_FLAGS_TAGNAME], jsonDataObject.targets[buildTargetName][HelperVariables.CPP_FLAGS_TAGNAME])
 
-def writeCMakeFiles(rootDir):
+# Build the Data object for the project in rootDir
+def loadData(rootDir, useScanCache=True, jobs=1, sharedListings=None, onlyOutputs=None, streamSources=False):
+    try:
+        return Data(rootDir, useScanCache, jobs, sharedListings, onlyOutputs, streamSources)
+    except FileNotFoundError as e:
+        print("In initialization of Data object: ")
+        raise e
+    except JSONDecodeError as e:
+        print("Invalid JSON provided in initialization of Data object...")
+        raise e
+
+# Write the C and C++ standards, then the build targets
+@instrumentation.timed("write_organizer.writeProjectSettings")
+def writeProjectSettings(fileWriter, jsonDataObject):
+    writeProjectCStandards(fileWriter, jsonDataObject)
+    writeProjectCppStandards(fileWriter, jsonDataObject)
+    writeProjectBuildTargets(fileWriter, jsonDataObject)
+
+FRAGMENT_EXTENSION = ".cmake"
+IMPORTED_LIB_FRAGMENT_PREFIX = "imported_"
+OUTPUT_FRAGMENT_PREFIX = "output_"
+LINKS_FRAGMENT_NAME = "links" + FRAGMENT_EXTENSION
+SETTINGS_FRAGMENT_NAME = "settings" + FRAGMENT_EXTENSION
+
+# Each fragment is a (file name, write function) pair, in the order they must be included.
+def getProjectFragments(jsonDataObject):
+    fragments = []
+    for importedLibName in jsonDataObject.imported_libs:
+        fragments.append((IMPORTED_LIB_FRAGMENT_PREFIX + importedLibName + FRAGMENT_EXTENSION, lambda fileWriter, name=importedLibName : writeProjectImportedLib(fileWriter, jsonDataObject, name)))
+    for outputNameKey in jsonDataObject.output:
+        fragments.append((OUTPUT_FRAGMENT_PREFIX + outputNameKey + FRAGMENT_EXTENSION, lambda fileWriter, name=outputNameKey : writeProjectOutput(fileWriter, jsonDataObject, name)))
+    fragments.append((LINKS_FRAGMENT_NAME, lambda fileWriter : writeProjectLinks(fileWriter, jsonDataObject)))
+    fragments.append((SETTINGS_FRAGMENT_NAME, lambda fileWriter : writeProjectSettings(fileWriter, jsonDataObject)))
+    return fragments
+
+# True if the file in the fragment directory is one getProjectFragments could have generated: it is named like
+# a fragment and starts with the fragment watermark. Anything else (such as hand-written .cmake files) is left alone.
+def isGeneratedFragment(fragmentDir, fileName):
+    if not fileName.endswith(FRAGMENT_EXTENSION):
+        return False
+    if not (fileName == LINKS_FRAGMENT_NAME or fileName == SETTINGS_FRAGMENT_NAME or fileName.startswith(IMPORTED_LIB_FRAGMENT_PREFIX) or fileName.startswith(OUTPUT_FRAGMENT_PREFIX)):
+        return False
     try:
+        with open(os.path.join(fragmentDir, fileName), "r", encoding="utf-8", errors="replace") as fragmentFile:
+            return fragmentFile.readline().rstrip("\r\n") == HelperVariables.CMAKE_FRAGMENT_WATERMARK
+    except OSError:
+        return False
+
+# Write each imported lib, output item, the links and the project settings into their own
+# .cmake fragment file, which CMakeLists.txt include()s. Only fragments whose content changed are
+# rewritten, so adding a file to one library only touches that library's fragment.
+# Generated fragments left over from removed items are deleted (see isGeneratedFragment).
+# Returns True if any file was written.
+@instrumentation.timed("write_organizer.writeFragmentedCMakeFiles")
+def writeFragmentedCMakeFiles(rootDir, jsonDataObject):
+    fragmentDir = os.path.join(rootDir, HelperVariables.CMAKE_FRAGMENTS_DIR)
+    os.makedirs(fragmentDir, exist_ok=True)
+
+    mainFileWriter = CMakeBuilder(rootDir + "/CMakeLists.txt")
+    mainFileWriter.writeWaterMark()
+    writeProjectVersion(mainFileWriter, jsonDataObject)
+    writeProjectName(mainFileWriter, jsonDataObject)
+    mainFileWriter.writeNewlines()
+
+    anyWritten = False
+    fragmentFileNames = set()
+    for fragmentFileName, writeFragment in getProjectFragments(jsonDataObject):
+        fragmentFileNames.add(fragmentFileName)
+        fragmentWriter = CMakeBuilder(os.path.join(fragmentDir, fragmentFileName), jsonDataObject.streamSources)
         try:
-            jsonDataObject = Data(rootDir)
-        except FileNotFoundError as e:
-            print("In initialization of Data object: ")
-            raise e
-        except JSONDecodeError as e:
-            print("Invalid JSON provided in initialization of Data object...")
-            raise e
-        fileWriter = CMakeBuilder(rootDir + "/CMakeLists.txt")
+            fragmentWriter.writeFragmentWaterMark()
+            writeFragment(fragmentWriter)
+            anyWritten = fragmentWriter.save() or anyWritten
+        finally:
+            fragmentWriter.discard()
+
+        mainFileWriter.writeInclude(HelperFunctions.inBraces("PROJECT_SOURCE_DIR") + "/" + HelperVariables.CMAKE_FRAGMENTS_DIR + "/" + fragmentFileName)
+
+    for existingFileName in os.listdir(fragmentDir):
+        if not existingFileName in fragmentFileNames and isGeneratedFragment(fragmentDir, existingFileName):
+            os.remove(os.path.join(fragmentDir, existingFileName))
+            anyWritten = True
 
+    return mainFileWriter.save() or anyWritten
+
+# Write CMakeLists.txt for an already built Data object.
+# Returns True if CMakeLists.txt was written, or False if it already had the generated content
+def writeDataToCMakeFiles(rootDir, jsonDataObject):
+    if jsonDataObject.cmake_fragments:
+        return writeFragmentedCMakeFiles(rootDir, jsonDataObject)
+
+    fileWriter = CMakeBuilder(rootDir + "/CMakeLists.txt", jsonDataObject.streamSources)
+    try:
         fileWriter.writeWaterMark()
         writeProjectVersion(fileWriter, jsonDataObject)
         writeProjectName(fileWriter, jsonDataObject)
         writeProjectImportedLibs(fileWriter, jsonDataObject)
         writeProjectOutputs(fileWriter, jsonDataObject)
         writeProjectLinks(fileWriter, jsonDataObject)
-        writeProjectCStandards(fileWriter, jsonDataObject)
-        writeProjectCppStandards(fileWriter, jsonDataObject)
-        writeProjectBuildTargets(fileWriter, jsonDataObject)
+        writeProjectSettings(fileWriter, jsonDataObject)
+
+        return fileWriter.save()
+    finally:
+        fileWriter.discard()
+
+# Returns True if CMakeLists.txt was written, or False if it already had the generated content.
+# With onlyOutputs, only those output items (and whatever they link to) are generated.
+# With streamSources, file lists are streamed from the directory walk into the generated file (see Data).
+@instrumentation.timed("write_organizer.writeCMakeFiles")
+def writeCMakeFiles(rootDir, useScanCache=True, jobs=1, sharedListings=None, onlyOutputs=None, streamSources=False):
+    try:
+        jsonDataObject = loadData(rootDir, useScanCache, jobs, sharedListings, onlyOutputs, streamSources)
+        return writeDataToCMakeFiles(rootDir, jsonDataObject)
 
     except KeyError as e:
         print("ERROR: Problem with JSON file. See below:\n")